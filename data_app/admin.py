@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Program, Block, Term, Course, ProgramCourse, TermCourses, Student, AdminUser, LogEntry
+from .models import Program, Block, Term, Course, ProgramCourse, TermCourses, Student, AdminUser, LogEntry, ScheduleRun
 
 admin.site.register(Program)
 admin.site.register(Block)
@@ -9,4 +9,5 @@ admin.site.register(ProgramCourse)
 admin.site.register(TermCourses)
 admin.site.register(Student)
 admin.site.register(AdminUser)
-admin.site.register(LogEntry)
\ No newline at end of file
+admin.site.register(LogEntry)
+admin.site.register(ScheduleRun)
@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class DataAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'data_app'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+
+        from .models import Course
+        from .services.bundle_catalogue import invalidate_bundle_catalogue
+
+        # Any edit to the Course table makes the cached bundle catalogue stale
+        post_save.connect(invalidate_bundle_catalogue, sender=Course, dispatch_uid="catalogue_course_saved")
+        post_delete.connect(invalidate_bundle_catalogue, sender=Course, dispatch_uid="catalogue_course_deleted")
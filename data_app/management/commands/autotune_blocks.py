@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from data_app.services.block_autotune import adopt_block_sizes, autotune_block_sizes
+from data_app.services.schedule_builder import ScheduleBuilder
+
+
+class Command(BaseCommand):
+    help = "Try several block sizes in parallel and report missing courses, ranking and seat use"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", type=int, nargs="+", default=[20, 25, 30, 35, 40],
+            help="Block sizes to try"
+        )
+        parser.add_argument("--per-program", action="store_true", help="Pick the best size for each program")
+        parser.add_argument("--workers", type=int, default=None, help="Worker processes (1 = run in this process)")
+        parser.add_argument("--adopt", action="store_true", help="Generate the schedule with the chosen sizes")
+
+    def handle(self, *args, **options):
+        report = autotune_block_sizes(
+            options["sizes"], per_program=options["per_program"], workers=options["workers"]
+        )
+
+        self.stdout.write(f"{'Size':>6} | {'Blocks':>6} | {'Missing':>8} | {'Rank':>8} | {'Seat use':>8}")
+        self.stdout.write("-" * 48)
+        for row in report["trials"]:
+            self.stdout.write(
+                f"{row['block_size']:>6} | {row['blocks']:>6} | {row['missing']:>8} | "
+                f"{row['average_rank']:>8.1f} | {row['utilization']:>8.1%}"
+            )
+        self.stdout.write(f"Best block size: {report['best_size']}")
+        for program_id, size in report["best_by_program"].items():
+            self.stdout.write(f"  Program {program_id}: {size}")
+
+        if options["adopt"]:
+            builder = adopt_block_sizes(ScheduleBuilder(), report)
+            builder.generate_schedule(in_memory=True)
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from data_app.services.schedule_builder import ScheduleBuilder
+
+
+class Command(BaseCommand):
+    help = "Compare greedy placement policies on the current blocks (nothing is written)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=5, help="Seeded runs per policy")
+
+    def handle(self, *args, **options):
+        results = ScheduleBuilder().benchmark_placement_policies(runs=options["runs"])
+
+        self.stdout.write(f"{'Policy':<10} | {'Missing':>8} | {'Failed':>8} | {'Repairs':>8} | {'Seconds':>8}")
+        self.stdout.write("-" * 54)
+        for policy, row in results.items():
+            self.stdout.write(
+                f"{policy:<10} | {row['missing']:>8.1f} | {row['failed_placements']:>8.1f} | "
+                f"{row['force_attempts']:>8.1f} | {row['seconds']:>8.3f}"
+            )
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+from data_app.models import Program
+from data_app.services.schedule_builder import ScheduleBuilder
+
+
+class Command(BaseCommand):
+    help = "Generate block schedules, optionally only for selected programs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--program", action="append", dest="programs", default=[],
+            help="Program id or exact program name to regenerate (repeatable). "
+                 "Other programs keep their schedules as fixed load."
+        )
+        parser.add_argument("--in-memory", action="store_true", help="Run the search in memory and write once at the end")
+        parser.add_argument("--restarts", type=int, default=1, help="Number of seeded attempts to run in parallel")
+        parser.add_argument("--workers", type=int, default=None, help="Worker processes for --restarts / --time-budget")
+        parser.add_argument("--time-budget", type=float, default=None, help="Keep improving for this many seconds")
+        parser.add_argument("--improve", type=float, default=None, help="Seconds of local search after placement")
+        parser.add_argument("--symmetry", action="store_true", help="Share conflict-free course patterns between a program's blocks")
+        parser.add_argument("--diverse", action="store_true", help="With --symmetry, spread blocks over different patterns")
+        parser.add_argument("--engine", choices=ScheduleBuilder.ENGINES, default="greedy", help="Scheduling engine")
+        parser.add_argument("--dynamic-order", action="store_true", help="Always place the most constrained course next")
+        parser.add_argument("--batch-shared", action="store_true", help="Allocate shared courses to all their terms at once")
+        parser.add_argument("--policy", choices=ScheduleBuilder.PLACEMENT_POLICIES, default="random", help="Greedy bundle choice")
+
+    def handle(self, *args, **options):
+        program_ids = None
+        if options["programs"]:
+            program_ids = []
+            for value in options["programs"]:
+                program = (
+                    Program.objects.filter(pk=int(value)).first() if value.isdigit()
+                    else Program.objects.filter(program_name=value).first()
+                )
+                if not program:
+                    raise CommandError(f"Program not found: {value}")
+                program_ids.append(program.pk)
+
+        ScheduleBuilder().generate_schedule(
+            in_memory=options["in_memory"],
+            restarts=options["restarts"],
+            workers=options["workers"],
+            time_budget=options["time_budget"],
+            program_ids=program_ids,
+            improve=options["improve"],
+            symmetry=options["symmetry"],
+            diverse=options["diverse"],
+            engine=options["engine"],
+            dynamic_order=options["dynamic_order"],
+            batch_shared=options["batch_shared"],
+            policy=options["policy"],
+        )
+
+        self.stdout.write(self.style.SUCCESS("Schedule generation complete."))
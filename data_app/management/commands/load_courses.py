@@ -1,6 +1,7 @@
 import csv
 from django.core.management.base import BaseCommand
 from data_app.models import Course
+from data_app.services.bundle_catalogue import invalidate_bundle_catalogue
 
 
 class Command(BaseCommand):
@@ -83,4 +84,7 @@ class Command(BaseCommand):
                     course.parent = parent
                     course.save()
 
+        # Bundles are derived from the Course table, drop the cached copy
+        invalidate_bundle_catalogue()
+
         self.stdout.write(self.style.SUCCESS("Course import complete."))
\ No newline at end of file
@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand, CommandError
+from data_app.models import ScheduleRun
+from data_app.services.schedule_runs import diff_runs, restore_run
+
+
+class Command(BaseCommand):
+    help = "List, restore or compare saved schedule runs"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--restore", type=int, metavar="VERSION", help="Swap this run back in")
+        parser.add_argument("--diff", type=int, nargs=2, metavar=("OLD", "NEW"), help="Compare two runs")
+        parser.add_argument(
+            "--force", action="store_true",
+            help="Restore even if some of the run's terms or sections no longer exist"
+        )
+
+    def _get(self, version):
+        run = ScheduleRun.objects.filter(version=version).first()
+        if not run:
+            raise CommandError(f"Schedule run not found: v{version}")
+        return run
+
+    def handle(self, *args, **options):
+        if options["restore"] is not None:
+            try:
+                result = restore_run(self._get(options["restore"]), force=options["force"])
+            except ValueError as e:
+                raise CommandError(str(e).replace("force=True", "--force"))
+            self.stdout.write(self.style.SUCCESS(
+                f"Restored run v{result['version']}: {result['rows']} rows in {result['terms']} terms"
+            ))
+            if result["skipped_terms"] or result["missing_sections"]:
+                self.stdout.write(self.style.WARNING(
+                    f"Skipped {result['skipped_terms']} terms and {result['missing_sections']} sections "
+                    "that no longer exist"
+                ))
+            for key, reason in (
+                ("invalid_groups", "no longer a bundle of the course"),
+                ("conflicts", "time conflict"),
+                ("dropped_for_capacity", "section full"),
+            ):
+                for label in result[key]:
+                    self.stdout.write(self.style.WARNING(f"Dropped {label}: {reason}"))
+            for label in result["over_capacity"]:
+                self.stdout.write(self.style.WARNING(f"Over capacity in the run: {label}"))
+            return
+
+        if options["diff"]:
+            old, new = (self._get(v) for v in options["diff"])
+            diff = diff_runs(old, new)
+            for term in diff["terms"]:
+                self.stdout.write(f"{term['block']} ({term['term']}) [program {term['program_id']}]")
+                for label in term["removed"]:
+                    self.stdout.write(f"  - {label}")
+                for label in term["added"]:
+                    self.stdout.write(f"  + {label}")
+            for row in diff["enrollment"]:
+                self.stdout.write(f"  {row['section']}: enrolled {row['old']} -> {row['new']}")
+            if not diff["terms"] and not diff["enrollment"]:
+                self.stdout.write("No differences.")
+            return
+
+        for run in ScheduleRun.objects.all():
+            rows = sum(len(ids) for ids in run.assignments.values())
+            self.stdout.write(f"v{run.version:<4} {run.created_at:%Y-%m-%d %H:%M:%S}  {run.label:<12} {rows} rows")
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_app', '0006_alter_logentry_options_logentry_level_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='logentry',
+            name='metrics',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:12
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_app', '0007_logentry_metrics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduleRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField(unique=True)),
+                ('label', models.CharField(blank=True, max_length=255)),
+                ('assignments', models.JSONField(default=dict)),
+                ('terms', models.JSONField(default=dict)),
+                ('enrollment', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['-version'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_app', '0008_schedulerun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='block',
+            name='ranked_fingerprint',
+            field=models.CharField(blank=True, default='', max_length=40),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_app', '0009_block_ranked_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='block',
+            name='score_breakdown',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -15,6 +15,10 @@ class Block(models.Model):
     ranking = models.IntegerField()
     timestamp = models.DateTimeField()
     size = models.IntegerField(null=True, blank=True)
+    # Schedule content the ranking was computed from (see ScheduleRanker._block_fingerprint)
+    ranked_fingerprint = models.CharField(max_length=40, blank=True, default="")
+    # Per-term, per-rule scores and notes of the last ranking (see ScheduleRanker._block_breakdowns)
+    score_breakdown = models.JSONField(blank=True, default=dict)
 
 
 class Term(models.Model):
@@ -103,6 +107,7 @@ class LogEntry(models.Model):
     action = models.CharField(max_length=255)
     details = models.TextField(blank=True, null=True)
     level = models.CharField(max_length=10, choices=LEVEL_CHOICES, default="INFO")
+    metrics = models.JSONField(blank=True, null=True)  # structured run data, e.g. generation stats
     timestamp = models.DateTimeField(default=timezone.now, db_index=True)
 
     class Meta:
@@ -111,3 +116,25 @@ class LogEntry(models.Model):
 
     def __str__(self):
         return f"[{self.level}] {self.action} ({self.timestamp:%Y-%m-%d %H:%M:%S})"
+
+
+class ScheduleRun(models.Model):
+    """
+    Versioned snapshot of a generated schedule (see services/schedule_runs.py).
+    assignments: {term id: [course id, ...]}
+    terms:       {term id: [program id, block name, term name]}, used to find the
+                 matching Term again after blocks were rebuilt
+    enrollment:  {course id: enrolled} for every section with enrolled > 0
+    """
+    version = models.PositiveIntegerField(unique=True)
+    label = models.CharField(max_length=255, blank=True)
+    assignments = models.JSONField(default=dict)
+    terms = models.JSONField(default=dict)
+    enrollment = models.JSONField(default=dict)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["-version"]
+
+    def __str__(self):
+        return f"Run v{self.version} {self.label} ({self.created_at:%Y-%m-%d %H:%M:%S})"
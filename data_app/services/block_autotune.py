@@ -0,0 +1,112 @@
+"""
+Block-size autotuner.
+
+Each trial rebuilds the program blocks of an in-memory ScheduleState for one
+block size (ScheduleState.use_trial_blocks, nothing is saved), runs a seeded
+in-memory generation pass and measures missing courses, the average block
+ranking and seat utilization. Trials run in parallel worker processes on a
+pickled snapshot, all with the same seed so they are comparable.
+
+Trials use one size for every program; with per_program, the best size of
+each program is picked from the same trials using that program's own
+metrics (programs still share seats, so this is an approximation of a full
+per-program search).
+"""
+
+import pickle
+import random
+
+from data_app.models import Program
+
+from .ranking import ScheduleRanker
+from .restart_pool import run_block_size_trials
+from .schedule_state import ScheduleState
+
+
+def _utilization(state):
+    """
+    Seats filled / seats offered, over the capped sections the trial used.
+    """
+    enrolled = capacity = 0
+    for course in state.courses.values():
+        if course.enrolled > 0 and course.capacity:
+            enrolled += course.enrolled
+            capacity += course.capacity
+    return enrolled / capacity if capacity else 0.0
+
+
+def run_trial(state, trial, seed):
+    """
+    Schedules `state` with trial["default_size"] blocks (trial["block_sizes"]
+    overrides per program) and returns the trial's metrics.
+    """
+    from .schedule_builder import ScheduleBuilder
+
+    state.use_trial_blocks(trial["enrollment"], trial["block_sizes"], trial["default_size"])
+    result = ScheduleBuilder()._run_in_memory_attempt(state, seed)
+
+    ranker = ScheduleRanker()
+    programs = {}
+    for program_id in sorted({block.program_id for block in state.blocks.values()}):
+        state.restrict_to_programs([program_id])
+        programs[program_id] = {
+            "missing": state.count_missing(),
+            "average_rank": ranker.score_state(state),
+        }
+    state.program_ids = None
+
+    return {
+        "block_size": trial["default_size"],
+        "blocks": len(state.blocks),
+        "missing": result["missing"],
+        "average_rank": result["score"],
+        "utilization": _utilization(state),
+        "programs": programs,
+    }
+
+
+def _trial_key(metrics):
+    return (metrics["missing"], -metrics["average_rank"])
+
+
+def autotune_block_sizes(sizes, per_program=False, workers=None, seed=None):
+    """
+    Tries every block size in `sizes` and returns
+    {"trials": [...], "best_size": int, "best_by_program": {program id: size}}.
+    best_by_program is only filled with per_program=True.
+    workers=1 runs the trials in this process.
+    """
+    enrollment = dict(Program.objects.values_list("pk", "enrolled"))
+    state = ScheduleState.load(reset_enrollment=True)
+    seed = seed if seed is not None else random.randrange(2 ** 32)
+    trials = [
+        {"default_size": size, "block_sizes": {}, "enrollment": enrollment}
+        for size in sizes
+    ]
+
+    if workers == 1:
+        snapshot = pickle.dumps(state)
+        results = [run_trial(pickle.loads(snapshot), trial, seed) for trial in trials]
+    else:
+        results = run_block_size_trials(state, trials, seed, workers)
+
+    best = min(results, key=lambda r: (_trial_key(r), -r["utilization"]))
+    report = {"trials": results, "best_size": best["block_size"], "best_by_program": {}}
+
+    if per_program:
+        for program_id in best["programs"]:
+            candidates = [r for r in results if program_id in r["programs"]]
+            report["best_by_program"][program_id] = min(
+                candidates, key=lambda r: _trial_key(r["programs"][program_id])
+            )["block_size"]
+
+    return report
+
+
+def adopt_block_sizes(builder, report):
+    """
+    Makes `builder` build blocks with the report's best setting.
+    """
+    builder.BLOCK_SIZE = report["best_size"]
+    builder.block_size_overrides = dict(report["best_by_program"])
+    return builder
@@ -0,0 +1,235 @@
+"""
+Precomputed lecture/lab/tutorial bundles for every course.
+
+The catalogue is built with a single Course query and cached at module
+level, so a generation run (and every repair step inside it) reads bundles
+from memory instead of re-querying parents and children. The cache is
+dropped by invalidate_bundle_catalogue(), which load_courses and the Course
+save/delete signals call whenever the Course table changes. Edits that
+bypass both (queryset .update(), raw SQL) are caught by the signature
+check in refresh_enrollment() at the start of every run.
+
+Every caller of get_bundle_catalogue() gets its own copy of the cached
+catalogue, with its own Course objects: runs change Course.enrolled as they
+place blocks, and concurrent requests must not see each other's counters.
+
+Bundles with identical meeting times are interchangeable for conflict checks
+and scoring, so they are also grouped into time-signature classes: the
+scheduler checks a class once and then takes seats from any member.
+"""
+
+import copy
+import threading
+
+from data_app.models import Course
+
+
+def section_term(course):
+    """
+    Normalized term a section is offered in ("" if the section has no term).
+    """
+    return (course.term or "").strip().lower()
+
+
+# Columns the bundles depend on; a change to any of them makes the catalogue stale
+SIGNATURE_FIELDS = (
+    "course_code", "section", "term", "instr_type", "parent_id",
+    "days", "start_time", "end_time", "capacity",
+)
+
+
+def _signature(course):
+    return tuple(getattr(course, field) for field in SIGNATURE_FIELDS)
+
+
+def time_signature(bundle):
+    """
+    Meeting times of a bundle's parts; bundles with the same signature only differ in seats.
+    """
+    return tuple(sorted(
+        (c.instr_type or "", c.days or "", str(c.start_time or ""), str(c.end_time or ""))
+        for c in bundle
+    ))
+
+
+def group_by_time_signature(bundles):
+    """
+    Splits bundles into classes of identical time signature (first-seen order).
+    """
+    classes = {}
+    for bundle in bundles:
+        classes.setdefault(time_signature(bundle), []).append(bundle)
+    return list(classes.values())
+
+
+class BundleCatalogue:
+
+    def __init__(self, courses):
+        self.courses = {}            # course pk -> Course
+        self.sections = {}           # (course_code, section) -> Course
+        self._bundles = {}           # course_code -> [bundle]
+        self._term_bundles = {}      # (course_code, term_name) -> [bundle]
+        self._untermed = {}          # course_code -> [bundle] offered in every term
+        self._classes = {}           # (course_code, term_name) -> [[bundle]] by time signature
+
+        children_by_parent = {}
+        parents_by_code = {}
+        for course in courses:
+            self.courses[course.pk] = course
+            self.sections[(course.course_code, course.section)] = course
+            if course.parent_id is None:
+                parents_by_code.setdefault(course.course_code, []).append(course)
+            else:
+                children_by_parent.setdefault(course.parent_id, []).append(course)
+
+        for code, parents in parents_by_code.items():
+            self._bundles[code] = self._combine(parents, children_by_parent)
+
+            # Partition by the parent section's term; sections without a term
+            # are treated as offered in every term
+            for bundle in self._bundles[code]:
+                term_name = section_term(bundle[0])
+                if term_name:
+                    self._term_bundles.setdefault((code, term_name), []).append(bundle)
+                else:
+                    self._untermed.setdefault(code, []).append(bundle)
+
+    @classmethod
+    def build(cls):
+        return cls(Course.objects.all().order_by("pk"))
+
+    def copy(self):
+        """
+        The same bundles over copies of every Course, so seat counters can be
+        changed without touching any other holder of this catalogue.
+        """
+        clone = BundleCatalogue.__new__(BundleCatalogue)
+        courses = {pk: copy.copy(course) for pk, course in self.courses.items()}
+
+        def remap(bundles):
+            return [[courses[c.pk] for c in bundle] for bundle in bundles]
+
+        clone.courses = courses
+        clone.sections = {key: courses[c.pk] for key, c in self.sections.items()}
+        clone._bundles = {code: remap(bundles) for code, bundles in self._bundles.items()}
+        clone._term_bundles = {key: remap(bundles) for key, bundles in self._term_bundles.items()}
+        clone._untermed = {code: remap(bundles) for code, bundles in self._untermed.items()}
+        clone._classes = {
+            key: [remap(bundle_class) for bundle_class in classes]
+            for key, classes in self._classes.items()
+        }
+        return clone
+
+    def _combine(self, parents, children_by_parent):
+        """
+        For each parent, find all combinations of its children (labs, tuts).
+        """
+        bundles = []
+        for parent in parents:
+            children = children_by_parent.get(parent.pk, [])
+
+            labs = [c for c in children if c.instr_type == "LAB"]
+            tuts = [c for c in children if c.instr_type == "TUT"]
+
+            if not labs and not tuts:
+                bundles.append([parent])
+                continue
+
+            for lab in (labs or [None]):
+                for tut in (tuts or [None]):
+                    bundle = [parent]
+                    if lab: bundle.append(lab)
+                    if tut: bundle.append(tut)
+                    bundles.append(bundle)
+
+        return bundles
+
+    def bundles(self, course_code, term_name=None):
+        """
+        Returns a fresh list of bundles (callers shuffle it in place).
+        With term_name, only sections offered in that term are returned.
+        """
+        if term_name is None:
+            return list(self._bundles.get(course_code, []))
+        return (
+            self._term_bundles.get((course_code, term_name.lower()), [])
+            + self._untermed.get(course_code, [])
+        )
+
+    def bundle_classes(self, course_code, term_name=None):
+        """
+        Bundles grouped by time signature. Returns fresh lists (callers shuffle them in place).
+        """
+        key = (course_code, term_name.lower() if term_name else None)
+        if key not in self._classes:
+            self._classes[key] = group_by_time_signature(self.bundles(course_code, term_name))
+        return [list(bundle_class) for bundle_class in self._classes[key]]
+
+    def flexibility(self, course_code, term_name=None):
+        if term_name is None:
+            return len(self._bundles.get(course_code, []))
+        return (
+            len(self._term_bundles.get((course_code, term_name.lower()), []))
+            + len(self._untermed.get(course_code, []))
+        )
+
+    def reset_enrollment(self):
+        for course in self.courses.values():
+            course.enrolled = 0
+
+    def refresh_enrollment(self):
+        """
+        Re-sync Course.enrolled from the database with one query.
+        Returns False if sections were added, removed or edited (times, capacity,
+        parent, ...) behind the catalogue's back and it has to be rebuilt.
+        """
+        rows = Course.objects.values_list("pk", "enrolled", *SIGNATURE_FIELDS)
+        if len(rows) != len(self.courses):
+            return False
+
+        enrolled_by_pk = {}
+        for pk, enrolled, *signature in rows:
+            course = self.courses.get(pk)
+            if course is None or _signature(course) != tuple(signature):
+                return False
+            enrolled_by_pk[pk] = enrolled
+
+        for pk, enrolled in enrolled_by_pk.items():
+            self.courses[pk].enrolled = enrolled
+        return True
+
+
+_catalogue = None
+_catalogue_lock = threading.Lock()
+
+
+def get_bundle_catalogue(reset_enrollment=False):
+    """
+    Returns a private copy of the cached catalogue, rebuilding the cache if it
+    was invalidated. Enrollment counters are reset to 0 or re-synced from the
+    database.
+    """
+    global _catalogue
+
+    with _catalogue_lock:
+        if _catalogue is not None and not _catalogue.refresh_enrollment():
+            _catalogue = None
+
+        if _catalogue is None:
+            _catalogue = BundleCatalogue.build()
+
+        catalogue = _catalogue.copy()
+
+    if reset_enrollment:
+        catalogue.reset_enrollment()
+
+    return catalogue
+
+
+def invalidate_bundle_catalogue(**kwargs):
+    """
+    Drops the cached catalogue. Accepts signal kwargs so it can be used as a receiver.
+    """
+    global _catalogue
+    with _catalogue_lock:
+        _catalogue = None
@@ -0,0 +1,260 @@
+"""
+Constraint-propagation engine for the in-memory scheduler.
+
+CSPSolver treats every (Term, required course) pair that is still missing in
+a ScheduleState as a variable whose domain is the course's time-signature
+classes offered in that term. The search is a depth-first branch and bound:
+
+  * MRV ordering: the variable with the fewest feasible classes goes next
+    (larger blocks first on ties, since they need the most seats),
+  * forward checking: a placement removes the classes that now conflict with
+    the term's occupancy from every other variable of that term,
+  * capacity propagation: it also removes the classes of the same course that
+    no longer have a member with seats for the other variables' blocks.
+
+A variable whose domain is wiped out can be left unplaced, so the solver
+always returns the best schedule found (fewest unplaced pairs); branches that
+cannot beat it are pruned. An incumbent schedule (e.g. the greedy pass's) can
+be given as the one to beat, so the result is never worse than it. The search
+stops at a complete schedule, at the node limit or at the time limit. The
+state is left holding the best schedule.
+"""
+
+import random
+import time
+
+from .schedule_validator import can_add_group_to_mask
+
+SKIP = None  # the "leave this pair unplaced" choice
+
+
+class _Frame:
+
+    def __init__(self, var, options):
+        self.var = var
+        self.options = options      # classes to try, then SKIP
+        self.index = 0
+        self.choice = None          # ("place", bundle) / ("skip", None) while applied
+        self.removed = []           # (var, bundle_class) pruned by this choice
+
+
+class CSPSolver:
+
+    NODE_LIMIT = 20000
+    TIME_LIMIT = 30  # seconds
+
+    def __init__(self, state, node_limit=None, time_limit=None, stats=None, incumbent=None, rng=None):
+        self.state = state
+        self.rng = rng or random.Random()  # orders each variable's classes
+        self.incumbent = incumbent  # export_assignments() of a schedule to beat
+        self.node_limit = node_limit if node_limit is not None else self.NODE_LIMIT
+        self.time_limit = time_limit if time_limit is not None else self.TIME_LIMIT
+        self.stats = stats
+
+        self.domains = {}           # (term pk, course_code) -> [bundle_class]
+        self.by_term = {}           # term pk -> [var]
+        self.by_code = {}           # course_code -> [var]
+        self.unassigned = set()
+        self.unplaced = 0
+        self.nodes = 0
+        self.backtracks = 0
+
+        for term in state.scoped_terms():
+            for code in sorted(state.missing_for_term(term)):
+                var = (term.pk, code)
+                self.domains[var] = [
+                    bundle_class
+                    for bundle_class in state.catalogue.bundle_classes(code, term.term_name)
+                    if self._feasible(term, bundle_class)
+                ]
+                self.by_term.setdefault(term.pk, []).append(var)
+                self.by_code.setdefault(code, []).append(var)
+                self.unassigned.add(var)
+
+    # --- Constraints ---
+
+    def _pick(self, term, bundle_class):
+        """
+        A member of the class with seats for the term's block, or None.
+        """
+        block_size = term.block.size or 0
+        for bundle in bundle_class:
+            if all(
+                part.capacity is None or part.enrolled + block_size <= part.capacity
+                for part in bundle
+            ):
+                return bundle
+        return None
+
+    def _feasible(self, term, bundle_class):
+        if self.stats is not None:
+            self.stats.conflict_checks += 1
+        if not can_add_group_to_mask(bundle_class[0], self.state.term_mask(term)):
+            return False
+        return self._pick(term, bundle_class) is not None
+
+    def _propagate(self, var, frame):
+        """
+        Forward checking after placing `var`: prune the term's other variables
+        (time conflicts) and the course's other variables (seats).
+        """
+        term_pk, code = var
+        for other in set(self.by_term[term_pk]) | set(self.by_code[code]):
+            if other not in self.unassigned:
+                continue
+            term = self.state.terms[other[0]]
+            keep = []
+            for bundle_class in self.domains[other]:
+                if self._feasible(term, bundle_class):
+                    keep.append(bundle_class)
+                else:
+                    frame.removed.append((other, bundle_class))
+            self.domains[other] = keep
+
+    def _count_unplaced(self, encoded):
+        """
+        Variables without their course in an export_assignments() schedule.
+        """
+        placed = {
+            (term_pk, self.state.courses[group[0]].course_code)
+            for term_pk, groups in encoded.items()
+            for group in groups
+            if group and group[0] in self.state.courses
+        }
+        return sum(1 for var in self.domains if var not in placed)
+
+    # --- Search ---
+
+    def _select_var(self):
+        """
+        MRV: fewest feasible classes, then the largest block.
+        """
+        best = None
+        best_key = None
+        for var in self.unassigned:
+            key = (len(self.domains[var]), -(self.state.terms[var[0]].block.size or 0), var)
+            if best_key is None or key < best_key:
+                best, best_key = var, key
+        return best
+
+    def _lower_bound(self):
+        return self.unplaced + sum(1 for var in self.unassigned if not self.domains[var])
+
+    def _apply(self, frame, option):
+        term_pk, code = frame.var
+        term = self.state.terms[term_pk]
+        self.unassigned.discard(frame.var)
+
+        if option is SKIP:
+            self.unplaced += 1
+            frame.choice = ("skip", None)
+            return
+
+        bundle = self._pick(term, option)
+        self.state.commit(term, bundle, term.block.size or 0)
+        frame.choice = ("place", bundle)
+        self._propagate(frame.var, frame)
+
+    def _undo(self, frame):
+        if frame.choice is None:
+            return
+        term_pk, code = frame.var
+        term = self.state.terms[term_pk]
+
+        kind, _ = frame.choice
+        if kind == "skip":
+            self.unplaced -= 1
+        else:
+            self.state.release(term, code, term.block.size or 0)
+            for other, bundle_class in reversed(frame.removed):
+                self.domains[other].append(bundle_class)
+            frame.removed = []
+
+        self.unassigned.add(frame.var)
+        frame.choice = None
+
+    def solve(self):
+        """
+        Runs the search and leaves the best schedule found in the state.
+        Returns a summary of the search.
+        """
+        start = time.monotonic()
+        deadline = start + self.time_limit
+        variables = len(self.domains)
+
+        best = None
+        best_unplaced = variables + 1
+        if self.incumbent is not None:
+            best = self.incumbent
+            best_unplaced = self._count_unplaced(self.incumbent)
+        stack = []
+        descend = True
+        stopped = None
+
+        while True:
+            if self.nodes >= self.node_limit:
+                stopped = "node_limit"
+                break
+            if time.monotonic() >= deadline:
+                stopped = "time_limit"
+                break
+
+            if descend:
+                if self._lower_bound() >= best_unplaced:
+                    descend = False
+                else:
+                    var = self._select_var()
+                    if var is None:
+                        best_unplaced = self.unplaced
+                        best = self.state.export_assignments()
+                        if best_unplaced == 0:
+                            break
+                        descend = False
+                    else:
+                        options = list(self.domains[var])
+                        self.rng.shuffle(options)
+                        stack.append(_Frame(var, options + [SKIP]))
+
+            if not stack:
+                break
+
+            frame = stack[-1]
+            if frame.choice is not None:
+                self._undo(frame)
+                self.backtracks += 1
+            if frame.index >= len(frame.options):
+                stack.pop()
+                descend = False
+                continue
+
+            option = frame.options[frame.index]
+            frame.index += 1
+            self.nodes += 1
+            self._apply(frame, option)
+            descend = True
+
+        if best is None:
+            # Stopped before the first full descent: keep the partial schedule
+            best = self.state.export_assignments()
+            best_unplaced = sum(
+                1 for term_pk, code in self.domains
+                if not self.state.has_course(self.state.terms[term_pk], code)
+            )
+
+        # Unwind the search and keep the best assignment
+        while stack:
+            self._undo(stack.pop())
+        self.state.apply_assignments(best)
+
+        if self.stats is not None:
+            self.stats.csp_nodes += self.nodes
+            self.stats.csp_backtracks += self.backtracks
+
+        return {
+            'variables': variables,
+            'unplaced': best_unplaced,
+            'nodes': self.nodes,
+            'backtracks': self.backtracks,
+            'stopped': stopped,
+            'elapsed': time.monotonic() - start,
+        }
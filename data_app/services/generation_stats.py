@@ -0,0 +1,94 @@
+"""
+Timing and counters for a schedule generation run.
+
+ScheduleBuilder keeps one GenerationStats per run. Phases are timed with the
+phase() context manager, per-course time and search counters are updated from
+the scheduling loop, and database queries are counted with a connection
+execute wrapper. to_dict() gives the JSON stored with the run's LogEntry.
+"""
+
+import time
+from contextlib import contextmanager
+
+from django.db import connection
+
+
+class GenerationStats:
+
+    COUNTERS = (
+        "greedy_attempts",     # _attempt_to_schedule_term calls
+        "greedy_successes",
+        "batch_placements",    # terms placed by cohort batching
+        "force_attempts",      # _attempt_force_schedule calls
+        "force_successes",
+        "kicks",               # victims removed by kick-and-repair
+        "rollbacks",           # in-memory repair chains undone through the undo log
+        "failed_placements",   # (term, course) pairs the top-level pass left unplaced
+        "conflict_checks",     # bundle-vs-term conflict tests
+        "moves_evaluated",     # local-search moves scored
+        "moves_applied",       # local-search moves made
+        "csp_nodes",           # constraint-solver search nodes
+        "csp_backtracks",
+        "db_queries",
+    )
+
+    def __init__(self):
+        self.phases = {}         # phase name -> seconds
+        self.course_times = {}   # course_code -> seconds in top-level _schedule_course_globally
+        self.max_depth = 0       # deepest kick-and-repair recursion reached
+        for name in self.COUNTERS:
+            setattr(self, name, 0)
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def add_course_time(self, course_code, seconds):
+        self.course_times[course_code] = self.course_times.get(course_code, 0.0) + seconds
+
+    def reach_depth(self, depth):
+        self.max_depth = max(self.max_depth, depth)
+
+    @contextmanager
+    def track_queries(self):
+        def counter(execute, sql, params, many, context):
+            self.db_queries += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(counter):
+            yield
+
+    def merge(self, other):
+        """
+        Adds the counters and course times of another run's to_dict() output
+        (used to fold worker-process attempts into the parent's stats).
+        """
+        for name in self.COUNTERS:
+            setattr(self, name, getattr(self, name) + other["counters"].get(name, 0))
+        for code, seconds in other["course_times"].items():
+            self.add_course_time(code, seconds)
+        for name, seconds in other["phases"].items():
+            self.add_time(f"workers.{name}", seconds)
+        self.max_depth = max(self.max_depth, other["max_depth"])
+
+    def slowest_courses(self, limit=10):
+        return sorted(self.course_times.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+    def to_dict(self):
+        return {
+            "phases": {name: round(seconds, 4) for name, seconds in self.phases.items()},
+            "counters": {name: getattr(self, name) for name in self.COUNTERS},
+            "max_depth": self.max_depth,
+            "course_times": {code: round(seconds, 4) for code, seconds in self.course_times.items()},
+            "slowest_courses": [
+                {"course_code": code, "seconds": round(seconds, 4)}
+                for code, seconds in self.slowest_courses()
+            ],
+        }
@@ -0,0 +1,365 @@
+"""
+Local-search improvement phase for an in-memory schedule.
+
+LocalSearch runs a tabu search over bundle swaps inside each Term of a
+ScheduleState: a move replaces the bundle placed for one course with another
+bundle of the same course that fits the term's occupancy mask and has the
+seats. The objective is the ScheduleRanker term score. Every term keeps a
+per-day summary (class count, gap minutes, first start, last end), so a move
+is scored by re-summarizing only the days its old and new bundles touch.
+
+Terms with missing courses first try to insert them, directly or right after
+a swap that frees the time they need. The best schedule seen (fewest missing,
+then highest score) is restored at the end through the state's undo log.
+"""
+
+import random
+import time
+
+from .bundle_catalogue import time_signature
+from .ranking import ScheduleRanker
+from .schedule_validator import can_add_group_to_mask
+from .utils import group_mask
+
+WEEKDAYS = range(5)  # Mon..Fri, the days ScheduleRanker scores
+
+
+def _is_timed(course):
+    return bool(course.days and course.start_time and course.end_time)
+
+
+class TermScore:
+    """
+    ScheduleRanker score of one term, kept up to date move by move.
+    Matches ScheduleRanker._score_courses() before truncation to an int.
+    """
+
+    def __init__(self, ranker, groups):
+        self.ranker = ranker
+        self.day_classes = {d: [] for d in WEEKDAYS}  # day -> sorted [(start, end, course_code)]
+        self.code_days = {}                            # course_code -> days it meets
+        self.spreads = {}                              # course_code -> (spread sum, spread count)
+        self.spread_sum = 0
+        self.spread_count = 0
+
+        for code, group in groups.items():
+            slots = self._slots(group)
+            for day, start, end in slots:
+                self.day_classes[day].append((start, end, code))
+            self.code_days[code] = {day for day, _, _ in slots}
+            self._set_spread(code, group)
+
+        for classes in self.day_classes.values():
+            classes.sort()
+        self.day_summary = {d: self._summarize(self.day_classes[d]) for d in WEEKDAYS}
+        self.score = self._combine(self.day_summary, self.spread_sum, self.spread_count)
+
+    def _slots(self, group):
+        ranker = self.ranker
+        slots = []
+        for course in group:
+            if not _is_timed(course):
+                continue
+            start = ranker._parse_time(course.start_time)
+            end = ranker._parse_time(course.end_time)
+            for day in ranker._parse_days(course.days):
+                slots.append((day, start, end))
+        return slots
+
+    def _spread(self, group):
+        spreads = self.ranker._course_spreads([c for c in group if _is_timed(c)])
+        return sum(spreads), len(spreads)
+
+    def _set_spread(self, code, group):
+        old_sum, old_count = self.spreads.pop(code, (0, 0))
+        self.spread_sum -= old_sum
+        self.spread_count -= old_count
+        if group:
+            self.spreads[code] = self._spread(group)
+            self.spread_sum += self.spreads[code][0]
+            self.spread_count += self.spreads[code][1]
+
+    def _summarize(self, classes):
+        if not classes:
+            return (0, 0, None, None)
+        gap = 0
+        for i in range(len(classes) - 1):
+            gap += max(0, classes[i + 1][0] - classes[i][1])
+        return (len(classes), gap, classes[0][0], classes[-1][1])
+
+    def _combine(self, summary, spread_sum, spread_count):
+        ranker = self.ranker
+        active = [summary[d] for d in WEEKDAYS if summary[d][0]]
+        total_gap = sum(s[1] for s in active)
+
+        penalty = 0
+        for d in range(4):
+            if summary[d][0] and summary[d + 1][0]:
+                penalty += ranker._rest_penalty(summary[d][3], summary[d + 1][2])
+
+        scores = {
+            "compactness": 1 - min(total_gap / ranker.GAP_CAP, 1),
+            "days_used": ranker._days_used_score(len(active)),
+            "day_balance": 1 - (sum(1 for s in active if s[0] == 1) / len(active)) if active else 1.0,
+            "end_time_preference": ranker._end_time_score(max((s[3] for s in active), default=0)),
+            "start_time_preference": ranker._start_time_score(min((s[2] for s in active), default=1440)),
+            "late_to_early": max(0.0, 1 - (penalty / ranker.LATE_EARLY_MAX_PENALTY)),
+            "lab_spread": ranker._spread_score(spread_sum, spread_count),
+        }
+        return ranker._weighted_score(scores)
+
+    def evaluate(self, code, group):
+        """
+        Score of the term if `code` were placed as `group` (None = removed).
+        Returns (score, change); pass change to apply() to make the move.
+        """
+        slots = self._slots(group) if group else []
+        new_days = {day for day, _, _ in slots}
+
+        changed = {}
+        summary = dict(self.day_summary)
+        for day in self.code_days.get(code, set()) | new_days:
+            classes = [c for c in self.day_classes[day] if c[2] != code]
+            classes.extend((start, end, code) for d, start, end in slots if d == day)
+            classes.sort()
+            changed[day] = classes
+            summary[day] = self._summarize(classes)
+
+        old_sum, old_count = self.spreads.get(code, (0, 0))
+        new_sum, new_count = self._spread(group) if group else (0, 0)
+        score = self._combine(
+            summary,
+            self.spread_sum - old_sum + new_sum,
+            self.spread_count - old_count + new_count,
+        )
+        return score, (code, group, changed, new_days, score)
+
+    def apply(self, change):
+        code, group, changed, new_days, score = change
+        for day, classes in changed.items():
+            self.day_classes[day] = classes
+            self.day_summary[day] = self._summarize(classes)
+        self.code_days[code] = new_days
+        self._set_spread(code, group)
+        self.score = score
+
+
+class LocalSearch:
+
+    TABU_TENURE = 25        # iterations a course may not move back to the times it left
+    MAX_ITERATIONS = 2000   # used when neither a time limit nor an iteration count is given
+
+    def __init__(self, state, ranker=None, stats=None, rng=None):
+        self.state = state
+        self.rng = rng or random.Random()
+        self.ranker = ranker or ScheduleRanker()
+        self.stats = stats
+        self.terms = state.scoped_terms()
+        self.scores = {
+            term.pk: TermScore(self.ranker, state.assignments[term.pk])
+            for term in self.terms
+        }
+        self.total = sum(s.score for s in self.scores.values())
+        self.tabu = {}          # (term pk, course_code, time signature) -> iteration the ban ends
+        self.evaluated = 0
+        self.applied = 0
+
+    def run(self, time_limit=None, max_iterations=None):
+        """
+        Improves the state in place until time_limit seconds or max_iterations pass.
+        Returns a summary of the search.
+        """
+        if time_limit is None and max_iterations is None:
+            max_iterations = self.MAX_ITERATIONS
+
+        start = time.monotonic()
+        deadline = start + time_limit if time_limit is not None else None
+        missing = start_missing = self.state.count_missing()
+        start_total = best_total = self.total
+        best_missing = missing
+        iteration = 0
+
+        mark = self.state.checkpoint()
+        while self.terms:
+            if max_iterations is not None and iteration >= max_iterations:
+                break
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            iteration += 1
+
+            term = self.rng.choice(self.terms)
+            placed = self._place_missing(term)
+            if placed:
+                missing -= placed
+            else:
+                self._swap_step(term, iteration, best_total)
+
+            if (missing, -self.total) < (best_missing, -best_total):
+                best_missing, best_total = missing, self.total
+                self.state.accept(mark)
+                mark = self.state.checkpoint()
+
+        # Drop everything after the last improvement
+        self.state.rollback(mark)
+
+        elapsed = time.monotonic() - start
+        if self.stats is not None:
+            self.stats.moves_evaluated += self.evaluated
+            self.stats.moves_applied += self.applied
+
+        num_terms = max(len(self.terms), 1)
+        return {
+            'iterations': iteration,
+            'moves_evaluated': self.evaluated,
+            'moves_applied': self.applied,
+            'placed': start_missing - best_missing,
+            'missing': best_missing,
+            'start_score': start_total / num_terms,
+            'best_score': best_total / num_terms,
+            'elapsed': elapsed,
+            'moves_per_sec': self.evaluated / max(elapsed, 1e-9),
+        }
+
+    # --- Moves ---
+
+    def _other_masks(self, term):
+        """
+        {course_code: occupancy of the term without that course}.
+        """
+        groups = self.state.assignments[term.pk]
+        masks = {code: group_mask(group) for code, group in groups.items()}
+        others = {}
+        for code in masks:
+            mask = 0
+            for other_code, other_mask in masks.items():
+                if other_code != code:
+                    mask |= other_mask
+            others[code] = mask
+        return others
+
+    def _has_seats(self, bundle, block_size, held):
+        """
+        Every section has room for the block (sections in `held` already hold it).
+        """
+        for part in bundle:
+            if part.pk in held or part.capacity is None:
+                continue
+            if part.enrolled + block_size > part.capacity:
+                return False
+        return True
+
+    def _candidates(self, term, code, mask, current=()):
+        """
+        One bundle with seats per time-signature class of `code` that fits `mask`,
+        skipping the class of the currently placed group. Yields (signature, bundle).
+        """
+        block_size = term.block.size or 0
+        held = {c.pk for c in current}
+        current_signature = time_signature(current) if current else None
+        for bundle_class in self.state.catalogue.bundle_classes(code, term.term_name):
+            signature = time_signature(bundle_class[0])
+            if signature == current_signature:
+                continue
+            # Members share their times: one conflict check per class
+            if self.stats is not None:
+                self.stats.conflict_checks += 1
+            if not can_add_group_to_mask(bundle_class[0], mask):
+                continue
+            self.rng.shuffle(bundle_class)
+            for bundle in bundle_class:
+                if self._has_seats(bundle, block_size, held):
+                    yield signature, bundle
+                    break
+
+    def _apply(self, term, code, bundle, change):
+        block_size = term.block.size or 0
+        if self.state.has_course(term, code):
+            self.state.release(term, code, block_size)
+        self.state.commit(term, bundle, block_size)
+
+        scorer = self.scores[term.pk]
+        self.total += change[4] - scorer.score
+        scorer.apply(change)
+        self.applied += 1
+
+    def _best_insert(self, term, code, mask):
+        """
+        Highest-scoring bundle of `code` that fits `mask`, as (bundle, change), or None.
+        """
+        scorer = self.scores[term.pk]
+        best = None
+        for _, bundle in self._candidates(term, code, mask):
+            self.evaluated += 1
+            score, change = scorer.evaluate(code, bundle)
+            if best is None or score > best[1][4]:
+                best = (bundle, change)
+        return best
+
+    def _place_missing(self, term):
+        """
+        Inserts courses missing from the term, if necessary after moving one placed
+        course to another bundle. Returns the number of courses placed.
+        """
+        placed = 0
+        missing = list(self.state.missing_for_term(term))
+        self.rng.shuffle(missing)
+
+        for code in missing:
+            insert = self._best_insert(term, code, self.state.term_mask(term))
+            if insert is not None:
+                self._apply(term, code, *insert)
+                placed += 1
+                continue
+
+            # Swap + insert: move one placed course so the missing one fits
+            others = self._other_masks(term)
+            placed_codes = list(others)
+            self.rng.shuffle(placed_codes)
+            for other_code in placed_codes:
+                current = self.state.assignments[term.pk][other_code]
+                done = False
+                for _, bundle in self._candidates(term, other_code, others[other_code], current):
+                    mask = others[other_code] | group_mask(bundle)
+                    if next(self._candidates(term, code, mask), None) is None:
+                        continue
+
+                    self.evaluated += 1
+                    _, change = self.scores[term.pk].evaluate(other_code, bundle)
+                    self._apply(term, other_code, bundle, change)
+                    self._apply(term, code, *self._best_insert(term, code, mask))
+                    placed += 1
+                    done = True
+                    break
+                if done:
+                    break
+
+        return placed
+
+    def _swap_step(self, term, iteration, best_total):
+        """
+        One tabu step: apply the best non-tabu swap in the term, even if it is worse.
+        A tabu swap is allowed if it would beat the best total seen (aspiration).
+        """
+        scorer = self.scores[term.pk]
+        others = self._other_masks(term)
+        best = None
+
+        for code, mask in others.items():
+            current = self.state.assignments[term.pk][code]
+            current_key = time_signature(current)
+            for key, bundle in self._candidates(term, code, mask, current):
+                self.evaluated += 1
+                score, change = scorer.evaluate(code, bundle)
+                new_total = self.total - scorer.score + score
+                if self.tabu.get((term.pk, code, key), 0) > iteration and new_total <= best_total:
+                    continue
+                if best is None or new_total > best[0]:
+                    best = (new_total, code, bundle, change, current_key)
+
+        if best is None:
+            return False
+
+        _, code, bundle, change, old_key = best
+        self._apply(term, code, bundle, change)
+        self.tabu[(term.pk, code, old_key)] = iteration + self.TABU_TENURE
+        return True
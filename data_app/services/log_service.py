@@ -8,7 +8,7 @@ to the database via the LogEntry model.
 from data_app.models import AdminUser, LogEntry
 
 
-def create_log(action, details=None, level="INFO", admin=None):
+def create_log(action, details=None, level="INFO", admin=None, metrics=None):
     """
     Create a LogEntry record in the database.
 
@@ -21,6 +21,8 @@ def create_log(action, details=None, level="INFO", admin=None):
                         Defaults to "INFO".
         admin:          An AdminUser instance, an AdminUser pk (int),
                         or None for system-level actions.
+        metrics (dict): Optional JSON-serializable structured data stored
+                        alongside the entry (e.g. generation timings).
 
     Returns:
         LogEntry: The newly created log entry instance.
@@ -46,27 +48,28 @@ def create_log(action, details=None, level="INFO", admin=None):
         action=action,
         details=details,
         level=level,
+        metrics=metrics,
     )
 
 
-def log_info(action, details=None, admin=None):
+def log_info(action, details=None, admin=None, metrics=None):
     """Convenience wrapper - creates an INFO-level log."""
-    return create_log(action, details=details, level="INFO", admin=admin)
+    return create_log(action, details=details, level="INFO", admin=admin, metrics=metrics)
 
 
-def log_success(action, details=None, admin=None):
+def log_success(action, details=None, admin=None, metrics=None):
     """Convenience wrapper - creates a SUCCESS-level log."""
-    return create_log(action, details=details, level="SUCCESS", admin=admin)
+    return create_log(action, details=details, level="SUCCESS", admin=admin, metrics=metrics)
 
 
-def log_warning(action, details=None, admin=None):
+def log_warning(action, details=None, admin=None, metrics=None):
     """Convenience wrapper - creates a WARNING-level log."""
-    return create_log(action, details=details, level="WARNING", admin=admin)
+    return create_log(action, details=details, level="WARNING", admin=admin, metrics=metrics)
 
 
-def log_error(action, details=None, admin=None):
+def log_error(action, details=None, admin=None, metrics=None):
     """Convenience wrapper - creates an ERROR-level log."""
-    return create_log(action, details=details, level="ERROR", admin=admin)
+    return create_log(action, details=details, level="ERROR", admin=admin, metrics=metrics)
 
 
 def get_recent_logs(limit=50):
@@ -0,0 +1,137 @@
+"""
+Pre-flight feasibility analysis for schedule generation.
+
+Computes the seat demand of every required (course, term) pair - the sum of
+Block.size over the Terms that need it - and compares it with the summed
+capacity of the sections offered in that term. Also flags required courses
+with no sections, or with no sections that have a meeting time. Everything
+is computed from the cached bundle catalogue plus a few small queries, so it
+is cheap enough to run before every generation.
+"""
+
+import math
+
+from data_app.models import Block, Program, ProgramCourse
+
+from .bundle_catalogue import get_bundle_catalogue
+
+# Terms created for every block by ScheduleBuilder.build_blocks
+SCHEDULED_TERMS = ("fall", "winter")
+
+
+def _is_timed(course):
+    return bool(course.days and course.start_time and course.end_time)
+
+
+def _block_sizes_by_program(block_size, block_sizes=None):
+    """
+    Existing Block sizes per program. Programs without blocks yet get the
+    sizes build_blocks would create for their enrollment, with their size
+    from block_sizes ({program id: size}) or block_size.
+    """
+    block_sizes = block_sizes or {}
+    sizes = {}
+    for program_id, size in Block.objects.values_list("program_id", "size"):
+        sizes.setdefault(program_id, []).append(size or 0)
+
+    for program in Program.objects.exclude(pk__in=list(sizes)):
+        enrolled = program.enrolled or 0
+        if enrolled <= 0:
+            continue
+        size = block_sizes.get(program.pk, block_size)
+        num_blocks = math.ceil(enrolled / size)
+        sizes[program.pk] = [size] * (num_blocks - 1) + [enrolled - (num_blocks - 1) * size]
+
+    return sizes
+
+
+def _term_capacity(bundles):
+    """
+    Seats available per term for a course: the bottleneck over instruction types
+    of the summed section capacities (None = unlimited).
+    """
+    sections_by_type = {}
+    for bundle in bundles:
+        for course in bundle:
+            sections_by_type.setdefault(course.instr_type, {})[course.pk] = course
+
+    capacity = None
+    for sections in sections_by_type.values():
+        if any(c.capacity is None for c in sections.values()):
+            continue
+        type_capacity = sum(c.capacity for c in sections.values())
+        capacity = type_capacity if capacity is None else min(capacity, type_capacity)
+    return capacity
+
+
+def analyze_feasibility(block_size=20, block_sizes=None):
+    """
+    Returns {"demand": [...], "issues": [...]}.
+    block_sizes ({program id: size}) overrides block_size per program, as
+    ScheduleBuilder.block_size_overrides does.
+    Each demand row: course_code, term, demand (seats), capacity (None = unlimited),
+    sections (bundles offered in that term).
+    Each issue row adds a reason ("no_sections", "no_timed_sections", "capacity")
+    and the shortfall in seats.
+    """
+    catalogue = get_bundle_catalogue()
+    sizes = _block_sizes_by_program(block_size, block_sizes)
+
+    demand = {}
+    for program_id, code, term in (
+        ProgramCourse.objects.exclude(course_code__icontains="Elective")
+        .values_list("program_id", "course_code", "term")
+    ):
+        if term not in SCHEDULED_TERMS:
+            continue
+        demand[(code, term)] = demand.get((code, term), 0) + sum(sizes.get(program_id, []))
+
+    rows = []
+    issues = []
+    for (code, term), seats in sorted(demand.items()):
+        bundles = catalogue.bundles(code, term)
+        capacity = _term_capacity(bundles)
+        row = {
+            "course_code": code,
+            "term": term,
+            "demand": seats,
+            "capacity": capacity,
+            "sections": len(bundles),
+        }
+        rows.append(row)
+
+        if not bundles:
+            reason = "no_sections"
+        elif not any(all(_is_timed(c) for c in bundle) for bundle in bundles):
+            reason = "no_timed_sections"
+        elif capacity is not None and capacity < seats:
+            reason = "capacity"
+        else:
+            continue
+
+        if reason == "no_sections":
+            shortfall = seats
+        else:
+            shortfall = max(0, seats - capacity) if capacity is not None else 0
+        issues.append({**row, "reason": reason, "shortfall": shortfall})
+
+    return {"demand": rows, "issues": issues}
+
+
+def print_feasibility_report(report):
+    """
+    Prints the issues of an analyze_feasibility() report in the builder's log style.
+    """
+    if not report["issues"]:
+        print("Pre-flight: every required course has enough timed seats.")
+        return
+
+    print(f"Pre-flight: {len(report['issues'])} required courses need attention:")
+    for issue in report["issues"]:
+        if issue["reason"] == "no_sections":
+            detail = "no sections offered"
+        elif issue["reason"] == "no_timed_sections":
+            detail = "no sections with a meeting time"
+        else:
+            detail = f"demand {issue['demand']} > capacity {issue['capacity']}"
+        print(f"      [x] {issue['course_code']} ({issue['term']}): {detail} (short {issue['shortfall']} seats)")
@@ -1,5 +1,50 @@
+import hashlib
+from collections import OrderedDict
+
 from django.db import models
 from data_app.models import Block, Term, TermCourses, Course, ProgramCourse, Program
+from . import vector_ranking
+
+
+class TermScoreCache:
+    """
+    LRU memo of term scores, keyed by a term's placed sections and the ranker's
+    weight configuration (see ScheduleRanker._term_key). Entries are
+    {"score": int, "breakdown": dict or None}; the per-rule breakdown is filled
+    in the first time a caller needs it. Pass one instance to several rankers
+    to share it.
+    """
+
+    def __init__(self, max_size=4096):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, score, breakdown=None):
+        entry = self.entries[key] = {"score": score, "breakdown": breakdown}
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
 
 class ScheduleRanker:
     """
@@ -24,33 +69,82 @@ class ScheduleRanker:
     LATE_EARLY_MAX_PENALTY = 100  # Used to normalize late-to-early penalty to [0, 1]
     SLEEP_DEFICIT_PENALTY = 5  # 5 pts per 30-min sleep deficit (previously PENALTY_PER_30MIN_SLEEP_LOSS)
 
-    def rank_all_blocks(self):
+    # Scoring engines for score_terms(); "numpy" needs NumPy (see vector_ranking)
+    ENGINES = ("python", "numpy")
+
+    def __init__(self, engine=None, cache=None):
+        """
+        engine: one of ENGINES, None = "numpy" when NumPy is installed.
+        Both engines give the same scores.
+        cache: TermScoreCache to share between rankers (None = a new one, shared
+        by this ranker's rank_all_blocks and export_ranking_report).
+        """
+        if engine is None:
+            engine = "numpy" if vector_ranking.HAS_NUMPY else "python"
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown ranking engine {engine!r}; expected one of {self.ENGINES}")
+        if engine == "numpy" and not vector_ranking.HAS_NUMPY:
+            raise ImportError("The numpy ranking engine needs NumPy installed")
+        self.engine = engine
+        self.cache = cache if cache is not None else TermScoreCache()
+
+    def rank_all_blocks(self, incremental=False):
         """
         Calculates scores and saves them to the database.
         Prints a summary to the console.
+        Terms, placements and sections are loaded up front (see _load_block_terms),
+        so the number of queries does not grow with the number of blocks.
+        incremental: only re-rank blocks whose schedule fingerprint differs from
+        the one stored when they were last ranked.
+        Each block's per-term, per-rule scores and notes are stored in
+        Block.score_breakdown, so reports read them instead of scoring again.
+        Returns {"ranked": n, "skipped": n}.
         """
-        blocks = Block.objects.all()
-        print(f"Ranking {blocks.count()} blocks...")
-
-        for block in blocks:
-            # We only care about the integer score for the DB
-            final_score, _ = self._calculate_block_score_and_report(block)
-            
+        blocks = list(Block.objects.select_related("program"))
+        terms_by_block = self._load_block_terms()
+
+        fingerprints = {
+            block.pk: self._block_fingerprint(terms_by_block.get(block.pk, [])) for block in blocks
+        }
+        stale = blocks
+        if incremental:
+            stale = [
+                block for block in blocks
+                if block.ranked_fingerprint != fingerprints[block.pk] or not block.score_breakdown
+            ]
+            print(f"Ranking {len(stale)} of {len(blocks)} blocks (others unchanged since last ranking)...")
+        else:
+            print(f"Ranking {len(blocks)} blocks...")
+
+        # One scoring pass over every term of the stale blocks
+        breakdowns = self._block_breakdowns(stale, terms_by_block)
+
+        for block in stale:
+            final_score = self._block_score([term["score"] for term in breakdowns[block.pk]["terms"]])
             block.ranking = final_score
-            block.save()
+            block.ranked_fingerprint = fingerprints[block.pk]
+            block.score_breakdown = breakdowns[block.pk]
             print(f"  > Updated {block.block_name} ({block.program.program_name}): {final_score}/100")
 
+        Block.objects.bulk_update(stale, ["ranking", "ranked_fingerprint", "score_breakdown"])
+        return {"ranked": len(stale), "skipped": len(blocks) - len(stale)}
+
     def export_ranking_report(self, filename="ranking_report.txt"):
         """
         Generates a detailed text file explaining exactly why blocks got their scores.
+        Reads the breakdown stored by rank_all_blocks; only blocks that were never
+        ranked are scored here.
         """
         print(f"Generating detailed report to {filename}...")
-        blocks = Block.objects.all().order_by('program__program_name', 'block_name')
+        blocks = Block.objects.select_related("program").order_by('program__program_name', 'block_name')
 
         try:
             with open(filename, "w", encoding="utf-8") as f:
                 for block in blocks:
-                    score, report_lines = self._calculate_block_score_and_report(block)
+                    if block.score_breakdown:
+                        score, report_lines = block.ranking, self._report_lines(block.score_breakdown)
+                    else:
+                        score, report_lines = self._calculate_block_score_and_report(block)
                     
                     f.write("="*60 + "\n")
                     f.write(f"BLOCK: {block.block_name}  |  PROGRAM: {block.program.program_name}\n")
@@ -69,47 +163,101 @@ class ScheduleRanker:
         except IOError as e:
             print(f"Error writing file: {e}")
 
-    def _calculate_block_score_and_report(self, block):
+    def _load_block_terms(self, block_ids=None):
+        """
+        Loads terms with their placed sections in three queries.
+        Returns {block id: [(term, [Course])]}, terms in pk order.
+        Placements whose section no longer exists are skipped.
+        """
+        terms = Term.objects.order_by("pk")
+        links = TermCourses.objects.order_by("pk")
+        if block_ids is not None:
+            terms = terms.filter(block_id__in=block_ids)
+            links = links.filter(term__block_id__in=block_ids)
+
+        links_by_term = {}
+        codes = set()
+        for term_id, code, section in links.values_list("term_id", "course_code", "section"):
+            links_by_term.setdefault(term_id, []).append((code, section))
+            codes.add(code)
+
+        sections = {}
+        for course in Course.objects.filter(course_code__in=codes).order_by("pk"):
+            sections.setdefault((course.course_code, course.section), course)
+
+        terms_by_block = {}
+        for term in terms:
+            courses = [
+                sections[key] for key in links_by_term.get(term.pk, []) if key in sections
+            ]
+            terms_by_block.setdefault(term.block_id, []).append((term, courses))
+        return terms_by_block
+
+    def _calculate_block_score_and_report(self, block, terms=None):
         """
         Calculates score and aggregates report lines for the entire block.
+        terms: preloaded [(term, [Course])] from _load_block_terms (None = load them).
         Returns: (block_score, list_of_report_strings)
         """
-        terms = Term.objects.filter(block=block)
-        if not terms.exists():
-            return 0, ["Error: No terms found in block."]
+        if terms is None:
+            terms = self._load_block_terms([block.pk]).get(block.pk, [])
+
+        breakdown = self._block_breakdowns([block], {block.pk: terms})[block.pk]
+        return self._block_score([term["score"] for term in breakdown["terms"]]), self._report_lines(breakdown)
+
+    def _block_breakdowns(self, blocks, terms_by_block):
+        """
+        Scores every term of the blocks in one batch.
+        Returns {block id: {"terms": [{"term", "score", "rules", "notes"}]}}.
+        """
+        placed = [
+            (block.pk, term) for block in blocks for term, _ in terms_by_block.get(block.pk, [])
+        ]
+        results = self.term_breakdowns([
+            courses for block in blocks for _, courses in terms_by_block.get(block.pk, [])
+        ])
+
+        breakdowns = {block.pk: {"terms": []} for block in blocks}
+        for (block_id, term), breakdown in zip(placed, results):
+            breakdowns[block_id]["terms"].append(dict(breakdown, term=term.term_name))
+        return breakdowns
+
+    def _report_lines(self, breakdown):
+        """
+        Report lines of a stored block breakdown (see _block_breakdowns).
+        """
+        if not breakdown["terms"]:
+            return ["Error: No terms found in block."]
 
-        term_scores = []
         block_report = []
+        for term in breakdown["terms"]:
+            block_report.append(f"--- {term['term'].upper()} TERM (Score: {term['score']}) ---")
+            block_report.extend(self._format_rule_report(term["rules"], term["notes"]))
+            block_report.append("")
+        return block_report
 
-        for term in terms:
-            t_score, t_report = self._score_term(term, block.program)
-            term_scores.append(t_score)
-            if t_report:
-                block_report.append(f"--- {term.term_name.upper()} TERM (Score: {t_score}) ---")
-                block_report.extend(t_report)
-                block_report.append("")
-
-        # Block score: normalized sum of term scores
-        block_score = int(sum(term_scores) / (len(term_scores))) if term_scores else 0
-        return block_score, block_report
-
-
-    def _score_term(self, term, program):
-        """
-        Scores a term using modular rules and returns explanations.
-        """
-        # 1. Fetch courses
-        term_links = TermCourses.objects.filter(term=term)
-        courses = []
-        scheduled_codes = set()
-        for link in term_links:
-            scheduled_codes.add(link.course_code)
-            try:
-                c = Course.objects.get(course_code=link.course_code, section=link.section)
-                if c.days and c.start_time and c.end_time:
-                    courses.append(c)
-            except Course.DoesNotExist:
-                continue
+    def _block_score(self, term_scores):
+        """
+        Block score: normalized sum of term scores.
+        """
+        return int(sum(term_scores) / (len(term_scores))) if term_scores else 0
+
+
+    def _score_courses(self, courses):
+        """
+        Scores the sections placed in one term. Works on any Course-like objects,
+        so in-memory schedules can be ranked without touching the database.
+        Returns (term_score, report_lines).
+        """
+        breakdown = self._term_breakdown(courses)
+        return breakdown["score"], self._format_rule_report(breakdown["rules"], breakdown["notes"])
+
+    def _term_breakdown(self, courses):
+        """
+        Python rule engine: {"score": int, "rules": {rule: score}, "notes": [str]}
+        for the sections placed in one term.
+        """
+        courses = [c for c in courses if c.days and c.start_time and c.end_time]
 
         # 2. Build daily grid
         daily_grid = {0: [], 1: [], 2: [], 3: [], 4: []}
@@ -154,16 +302,124 @@ class ScheduleRanker:
         # Lab spread (stub)
         scores["lab_spread"] = self._lab_spread_score(courses)
 
-        # Weighted sum
+        return {"score": int(self._weighted_score(scores)), "rules": scores, "notes": notes}
+
+    def _weighted_score(self, scores):
+        """
+        Weighted sum of the rule scores on a 0-100 scale (not truncated).
+        """
         weighted_sum = 0
         weight_total = 0
         for k, w in self.WEIGHTS.items():
             weighted_sum += w * scores.get(k, 1.0)
             weight_total += w
 
-        term_score = int(100 * (weighted_sum / weight_total)) if weight_total else 0
-        return term_score, self._format_rule_report(scores, notes)
+        return 100 * (weighted_sum / weight_total) if weight_total else 0
+
+    def _section_key(self, course):
+        return tuple(
+            str(getattr(course, field, None) or "")
+            for field in ("course_code", "section", "instr_type", "days", "start_time", "end_time")
+        )
+
+    def _config_key(self):
+        return (
+            tuple(self.WEIGHTS.items()), self.GAP_CAP,
+            self.LATE_EARLY_MAX_PENALTY, self.SLEEP_DEFICIT_PENALTY,
+        )
+
+    def _term_key(self, courses):
+        """
+        Canonical form of a term's placed sections: (cache key, courses in key order).
+        Sections are scored in this order, so identical sets always get the same score.
+        """
+        keyed = sorted(((self._section_key(c), c) for c in courses), key=lambda pair: pair[0])
+        return (self._config_key(), tuple(key for key, _ in keyed)), [c for _, c in keyed]
+
+    def _block_fingerprint(self, terms):
+        """
+        Hash of everything a block's ranking depends on: each term's name and
+        placed sections (with their times) and the weight configuration.
+        terms: [(term, [Course])] as returned by _load_block_terms.
+        """
+        digest = hashlib.sha1(repr(self._config_key()).encode())
+        for term, courses in sorted(terms, key=lambda pair: (pair[0].term_name, pair[0].pk)):
+            digest.update(repr((term.term_name, self._term_key(courses)[0][1])).encode())
+        return digest.hexdigest()
+
+    def _score_with_report(self, courses):
+        """
+        _score_courses() through the cache: (term_score, report_lines).
+        """
+        breakdown = self.term_breakdowns([courses])[0]
+        return breakdown["score"], self._format_rule_report(breakdown["rules"], breakdown["notes"])
 
+    def _cached_terms(self, course_lists, breakdown=False):
+        """
+        Cache entries for every list of placed sections. Identical section sets
+        are looked up once; the missing ones are scored in one batch with the
+        ranker's engine.
+        breakdown: the entries must carry the per-rule breakdown, not just the score.
+        """
+        keys = []
+        known = {}      # key -> cache entry
+        pending = {}    # key -> canonical courses, for sets not in the cache
+        for courses in course_lists:
+            key, ordered = self._term_key(courses)
+            keys.append(key)
+            if key in known or key in pending:
+                continue
+            entry = self.cache.get(key)
+            if entry is None or (breakdown and entry["breakdown"] is None):
+                pending[key] = ordered
+            else:
+                known[key] = entry
+
+        if pending:
+            ordered_lists = list(pending.values())
+            if self.engine == "numpy" and not breakdown:
+                computed = [(t_score, None) for t_score in vector_ranking.score_terms(self, ordered_lists)]
+            elif self.engine == "numpy":
+                computed = [(b["score"], b) for b in vector_ranking.term_breakdowns(self, ordered_lists)]
+            else:
+                computed = [(b["score"], b) for b in map(self._term_breakdown, ordered_lists)]
+            for key, (t_score, result) in zip(pending, computed):
+                known[key] = self.cache.put(key, t_score, result)
+
+        return [known[key] for key in keys]
+
+    def score_terms(self, course_lists):
+        """
+        Term score of every list of placed sections, as _score_courses() would
+        give it (without the report lines).
+        """
+        return [entry["score"] for entry in self._cached_terms(course_lists)]
+
+    def term_breakdowns(self, course_lists):
+        """
+        {"score", "rules", "notes"} of every list of placed sections, as
+        _term_breakdown() would give it. The dicts are shared with the cache.
+        """
+        return [entry["breakdown"] for entry in self._cached_terms(course_lists, breakdown=True)]
+
+    def score_state(self, state):
+        """
+        Average block score of an in-memory ScheduleState (no queries).
+        Used to compare candidate schedules before one is written to the database.
+        """
+        terms = state.scoped_terms()
+        course_lists = [
+            [c for group in state.assignments[term.pk].values() for c in group]
+            for term in terms
+        ]
+        term_scores_by_block = {}
+        for term, t_score in zip(terms, self.score_terms(course_lists)):
+            term_scores_by_block.setdefault(term.block_id, []).append(t_score)
+
+        if not term_scores_by_block:
+            return 0
+        block_scores = [self._block_score(s) for s in term_scores_by_block.values()]
+        return sum(block_scores) / len(block_scores)
 
     # --- Modular rule helpers ---
     def _total_gap_minutes(self, daily_grid):
@@ -217,6 +473,9 @@ class ScheduleRanker:
         for classes in daily_grid.values():
             if classes:
                 latest_end = max(latest_end, classes[-1][1])
+        return self._end_time_score(latest_end, target_end, max_end)
+
+    def _end_time_score(self, latest_end, target_end=1020, max_end=1290):
         if latest_end <= target_end:
             return 1.0
         if latest_end >= max_end:
@@ -229,6 +488,9 @@ class ScheduleRanker:
         Returns 1.0 for starting at or after ideal_start, 0.0 for starting at or before max_early, linear in between.
         """
         earliest_start = min((classes[0][0] for classes in daily_grid.values() if classes), default=1440)
+        return self._start_time_score(earliest_start, ideal_start, max_early)
+
+    def _start_time_score(self, earliest_start, ideal_start=540, max_early=480):
         if earliest_start >= ideal_start:
             return 1.0
         if earliest_start <= max_early:
@@ -238,24 +500,32 @@ class ScheduleRanker:
     def _calc_late_to_early_penalty(self, daily_grid, day_names):
         penalty = 0
         notes = []
-        MIN_REST = 12 * 60 # 720 mins
         for d in range(4): # Mon(0) -> Thu(3)
             if not daily_grid[d] or not daily_grid[d+1]:
                 continue
             last_end = daily_grid[d][-1][1]
             first_start = daily_grid[d+1][0][0]
-            mins_until_midnight = 1440 - last_end
-            total_rest = mins_until_midnight + first_start
-            if total_rest < MIN_REST:
-                lost = MIN_REST - total_rest
-                # 5 pts per 30-min sleep deficit (see SLEEP_DEFICIT_PENALTY)
-                pts = (lost // 30) * self.SLEEP_DEFICIT_PENALTY
-                if pts > 0:
-                    penalty += pts
-                    rest_hrs = round(total_rest / 60, 1)
-                    notes.append(f"[late-to-early] Only {rest_hrs} hrs rest {day_names[d]}->{day_names[d+1]} (Req: 12 hrs)")
+            pts = self._rest_penalty(last_end, first_start)
+            if pts > 0:
+                penalty += pts
+                total_rest = (1440 - last_end) + first_start
+                rest_hrs = round(total_rest / 60, 1)
+                notes.append(f"[late-to-early] Only {rest_hrs} hrs rest {day_names[d]}->{day_names[d+1]} (Req: 12 hrs)")
         return penalty, notes
 
+    def _rest_penalty(self, last_end, first_start):
+        """
+        Penalty points for the night between a day ending at last_end and the next starting at first_start.
+        """
+        MIN_REST = 12 * 60 # 720 mins
+        mins_until_midnight = 1440 - last_end
+        total_rest = mins_until_midnight + first_start
+        if total_rest >= MIN_REST:
+            return 0
+        lost = MIN_REST - total_rest
+        # 5 pts per 30-min sleep deficit (see SLEEP_DEFICIT_PENALTY)
+        return (lost // 30) * self.SLEEP_DEFICIT_PENALTY
+
     def _lab_spread_score(self, courses):
         """
         Rewards schedules where labs/tutorials are scheduled close to their related lectures (prefer same or adjacent days).
@@ -266,25 +536,36 @@ class ScheduleRanker:
         for c in courses:
             course_map.setdefault(c.course_code, []).append(c)
         for code, comps in course_map.items():
-            lecs = [c for c in comps if getattr(c, 'instr_type', None) == "LEC"]
-            labs_tuts = [c for c in comps if getattr(c, 'instr_type', None) in ("LAB", "TUT")]
-            for lec in lecs:
-                lec_days = self._parse_days(getattr(lec, 'days', None))
-                for comp in labs_tuts:
-                    comp_days = self._parse_days(getattr(comp, 'days', None))
-                    if lec_days and comp_days:
-                        min_dist = min(abs(ld - cd) for ld in lec_days for cd in comp_days)
-                        spreads.append(min_dist)
-        if not spreads:
+            spreads.extend(self._course_spreads(comps))
+        return self._spread_score(sum(spreads), len(spreads))
+
+    def _course_spreads(self, comps):
+        """
+        Day distance between each lecture and each lab/tutorial of one course.
+        """
+        spreads = []
+        lecs = [c for c in comps if getattr(c, 'instr_type', None) == "LEC"]
+        labs_tuts = [c for c in comps if getattr(c, 'instr_type', None) in ("LAB", "TUT")]
+        for lec in lecs:
+            lec_days = self._parse_days(getattr(lec, 'days', None))
+            for comp in labs_tuts:
+                comp_days = self._parse_days(getattr(comp, 'days', None))
+                if lec_days and comp_days:
+                    min_dist = min(abs(ld - cd) for ld in lec_days for cd in comp_days)
+                    spreads.append(min_dist)
+        return spreads
+
+    def _spread_score(self, total_spread, count):
+        if not count:
             return 1.0
-        avg_spread = sum(spreads) / len(spreads)
+        avg_spread = total_spread / count
         # Normalize: 0 days apart = 1.0, 4 days apart = 0.0
         return 1.0 - min(avg_spread / 4, 1)
 
     def _format_rule_report(self, scores, notes):
         lines = []
         for rule, s in scores.items():
-            lines.append(f"[{rule}] score={round(s, 3)}")
+            lines.append(f"[{rule}] score={round(float(s), 3)}")
         lines.extend(notes)
         return lines
 
@@ -0,0 +1,69 @@
+"""
+Process-pool helpers for running independently seeded scheduling attempts
+and block-size trials.
+
+Each worker receives a pickled ScheduleState once (pool initializer) and
+runs every attempt on a fresh copy of it, so no worker ever touches the
+database. Django is imported lazily so spawned workers can call
+django.setup() before any model is unpickled.
+"""
+
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+_snapshot = None
+
+
+def _init_worker(snapshot_bytes):
+    global _snapshot
+    import django
+
+    django.setup()
+    _snapshot = snapshot_bytes
+
+
+def _run_attempt(seed, time_budget=None, options=None):
+    from .schedule_builder import ScheduleBuilder
+
+    state = pickle.loads(_snapshot)
+    builder = ScheduleBuilder()
+    for name, value in (options or {}).items():
+        setattr(builder, name, value)
+
+    if time_budget is not None:
+        return builder._run_anytime(state, time_budget, seed)
+    return builder._run_in_memory_attempt(state, seed)
+
+
+def run_attempts(state, seeds, workers=None, time_budget=None, options=None):
+    """
+    Runs one attempt per seed in a pool of worker processes.
+    With time_budget (seconds), each seed runs an anytime search until the budget is spent.
+    options are builder attributes set in every worker (e.g. use_patterns).
+    Returns the attempt results in seed order.
+    """
+    snapshot = pickle.dumps(state)
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(snapshot,)
+    ) as pool:
+        return list(pool.map(
+            _run_attempt, seeds, [time_budget] * len(seeds), [options] * len(seeds)
+        ))
+
+
+def _run_block_size_trial(trial, seed):
+    from .block_autotune import run_trial
+
+    return run_trial(pickle.loads(_snapshot), trial, seed)
+
+
+def run_block_size_trials(state, trials, seed, workers=None):
+    """
+    Runs one block-size trial (see block_autotune.run_trial) per worker task,
+    all with the same seed. Returns the trial results in order.
+    """
+    snapshot = pickle.dumps(state)
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(snapshot,)
+    ) as pool:
+        return list(pool.map(_run_block_size_trial, trials, [seed] * len(trials)))
@@ -1,10 +1,23 @@
+import heapq
+import io
 import math
+import time
+from contextlib import redirect_stdout
 from django.utils import timezone
 from data_app import models
 from data_app.models import Course, Program, Block, ProgramCourse, Term, Student, TermCourses
 import random
 from django.db import models
-from .schedule_validator import can_add_group_to_term
+from .schedule_validator import can_add_group_to_mask, term_mask
+from .schedule_state import ScheduleState
+from .bundle_catalogue import get_bundle_catalogue, group_by_time_signature, section_term
+from .ranking import ScheduleRanker
+from .restart_pool import run_attempts
+from .preflight import analyze_feasibility, print_feasibility_report
+from .generation_stats import GenerationStats
+from .local_search import LocalSearch
+from .csp_solver import CSPSolver
+from .schedule_runs import save_run
 from django.db import transaction
 from .utils import *
 
@@ -15,13 +28,75 @@ class ScheduleBuilder:
     
     PRIORITY_COURSES = ["ECOR 1041"]
 
-    def build_blocks(self):
+    # Kick-and-repair recursion limit. In-memory runs backtrack failed repair
+    # chains through the state's undo log, so this can be raised there.
+    MAX_RECURSION_DEPTH = 3
+    # Max kick attempts explored per top-level repair when backtracking
+    REPAIR_NODE_LIMIT = 500
+
+    # Symmetry pass: conflict-free patterns kept per program-term, and search nodes to find them
+    PATTERN_LIMIT = 20
+    PATTERN_NODE_LIMIT = 5000
+
+    # Scheduling engines: greedy + kick-and-repair, or the constraint solver (csp_solver.py)
+    ENGINES = ("greedy", "csp")
+    CSP_NODE_LIMIT = 20000
+    CSP_TIME_LIMIT = 30  # seconds
+
+    # Courses needed by at least this many terms are placed as one batch (see _place_course_batch)
+    BATCH_MIN_TERMS = 2
+
+    # Greedy bundle choice: first fitting shuffled bundle, or the one with the most seat headroom
+    PLACEMENT_POLICIES = ("random", "headroom")
+
+    def __init__(self):
+        # Per-program block sizes ({program id: size}); other programs use BLOCK_SIZE
+        self.block_size_overrides = {}
+        # In-memory snapshot used by the in_memory engine mode (None = ORM mode)
+        self._state = None
+        # Bundle catalogue for the current generation run (None = query per call)
+        self._catalogue = None
+        # Progress samples of the last time-budgeted run
+        self.progress = []
+        # Phase timings and search counters of the last run
+        self.stats = GenerationStats()
+        # Kick attempts left in the current top-level repair (in-memory backtracking)
+        self._repair_budget = 0
+        # Symmetry pass options (see _schedule_by_pattern)
+        self.use_patterns = False
+        self.diverse_patterns = False
+        # Engine used by _run_scheduling_pass (one of ENGINES)
+        self.engine = "greedy"
+        # ScheduleRun snapshot saved by the last generate_schedule / reschedule_incremental
+        self.last_run = None
+        # Greedy order: static find_shared_courses order, or live most-constrained-first
+        self.dynamic_order = False
+        # Place shared courses into all their terms at once (in-memory only)
+        self.batch_shared = False
+        # Bundle choice in _attempt_to_schedule_term (one of PLACEMENT_POLICIES)
+        self.placement_policy = "random"
+        # Random source of every pass; seeded per attempt so the process-wide random is untouched
+        self.rng = random.Random()
+
+    def build_blocks(self, program_ids=None):
         """
         Creates Block and Term objects based on Program enrollment.
+        If program_ids is given, only those programs' blocks are rebuilt.
         """
-        for program in Program.objects.all():
+        programs = Program.objects.all()
+        if program_ids is not None:
+            programs = programs.filter(pk__in=program_ids)
+
+        for program in programs:
             self._build_blocks_for_program(program)
 
+    def block_size_for(self, program_id):
+        """
+        Block size used for a program: a per-program override (e.g. adopted from
+        the block-size autotuner) or BLOCK_SIZE.
+        """
+        return self.block_size_overrides.get(program_id, self.BLOCK_SIZE)
+
     def _build_blocks_for_program(self, program: Program):
         enrolled = program.enrolled or 0
 
@@ -29,7 +104,8 @@ class ScheduleBuilder:
             print(f"Error : Program {program.program_name} has no enrolled students.")
             return
     
-        num_blocks = math.ceil(enrolled / self.BLOCK_SIZE)
+        block_size = self.block_size_for(program.pk)
+        num_blocks = math.ceil(enrolled / block_size)
         
         print(f"Building blocks for program: {program.program_name} with {enrolled} enrolled students.")
 
@@ -39,11 +115,11 @@ class ScheduleBuilder:
         for i in range(num_blocks):
             block_name = f"Block {chr(ord('A') + i)}"
             
-            # Calculate capacity: last block gets remaining students, others get full BLOCK_SIZE
+            # Calculate capacity: last block gets remaining students, others get full block_size
             if i == num_blocks - 1:
-                capacity = enrolled - (i * self.BLOCK_SIZE)
+                capacity = enrolled - (i * block_size)
             else:
-                capacity = self.BLOCK_SIZE
+                capacity = block_size
 
             block = Block.objects.create(
                 program=program,
@@ -66,18 +142,24 @@ class ScheduleBuilder:
         2. Flexibility (Fewest sections first)
         3. Random weight (To vary results on retries)
         """
-        course_stats = (
-            ProgramCourse.objects
-            .exclude(course_code__icontains="Elective")
-            .values('course_code')
-            .annotate(program_count=models.Count('program', distinct=True))
-        )
+        if self._state is not None:
+            course_stats = [
+                {'course_code': code, 'program_count': count}
+                for code, count in self._state.required_codes().items()
+            ]
+        else:
+            course_stats = (
+                ProgramCourse.objects
+                .exclude(course_code__icontains="Elective")
+                .values('course_code')
+                .annotate(program_count=models.Count('program', distinct=True))
+            )
         enriched_stats = []
         for entry in course_stats:
             code = entry['course_code']
             
             # Get total number of distinct sections (bundles)
-            num_bundles = len(self.get_course_bundles(code))
+            num_bundles = self._get_flexibility(code)
 
             # --- ADD THIS: Assign a score of 1 if it's in the priority list, else 0 ---
             priority_score = 1 if code in self.PRIORITY_COURSES else 0
@@ -86,7 +168,7 @@ class ScheduleBuilder:
                 'course_code': code,
                 'program_count': entry['program_count'],
                 'flexibility': num_bundles, 
-                'random_weight': random.random(),
+                'random_weight': self.rng.random(),
                 'priority_score': priority_score   # <--- Add to dictionary
             })
         
@@ -106,14 +188,20 @@ class ScheduleBuilder:
 
         return enriched_stats
     
-    def get_course_bundles(self, course_code):
+    def get_course_bundles(self, course_code, term_name=None):
         """
         Return a list of all possible course bundles for a given course code.
+        If term_name is given, only sections offered in that term (or with no term) are used.
         """
+        if self._catalogue is not None:
+            return self._catalogue.bundles(course_code, term_name)
+
         parents = Course.objects.filter(
             course_code=course_code,
             parent__isnull=True
         )
+        if term_name is not None:
+            parents = [p for p in parents if section_term(p) in ("", term_name.lower())]
         
         bundles = []
 
@@ -136,42 +224,148 @@ class ScheduleBuilder:
                     bundles.append(bundle)
 
         return bundles
+
+    def get_bundle_classes(self, course_code, term_name=None):
+        """
+        Bundles of a course grouped into classes with identical meeting times.
+        A conflict check on one member covers the whole class.
+        """
+        if self._catalogue is not None:
+            return self._catalogue.bundle_classes(course_code, term_name)
+        return group_by_time_signature(self.get_course_bundles(course_code, term_name))
+
+    def _get_flexibility(self, course_code, term_name=None):
+        if self._catalogue is not None:
+            return self._catalogue.flexibility(course_code, term_name)
+        return len(self.get_course_bundles(course_code, term_name))
     
-    def generate_schedule(self):
+    def generate_schedule(self, in_memory=False, restarts=1, workers=None, time_budget=None,
+                          program_ids=None, improve=None, symmetry=False, diverse=False,
+                          engine="greedy", dynamic_order=False, batch_shared=False,
+                          policy="random"):
+        """
+        Builds blocks and assigns course sections to every term.
+        With in_memory=True the catalogue is loaded once into a ScheduleState,
+        the greedy pass and kick-and-repair run without touching the database,
+        and the result is written back in one bulk transaction at the end.
+        With restarts > 1, that many independently seeded in-memory attempts
+        run in a pool of `workers` processes and only the best one is saved.
+        With time_budget (seconds), restarts and repair rounds continue until
+        the deadline and the best schedule found is saved (anytime mode).
+        With program_ids, only those programs are rebuilt and scheduled; every
+        other program's assignments and seats are kept as fixed load.
+        With improve (seconds), a tabu local search then swaps bundles inside
+        each term to raise the ranking score and place missing courses.
+        With symmetry=True, conflict-free course combinations are searched once
+        per program-term and shared by that program's blocks; diverse=True
+        spreads the blocks over different combinations.
+        engine="csp" searches with the constraint solver (MRV, forward checking,
+        capacity propagation; always in memory), starting from the greedy +
+        kick-and-repair schedule as the one to beat.
+        With dynamic_order=True, the greedy pass always places the (course, term)
+        pair with the fewest live feasible options next (always in memory).
+        With batch_shared=True, a course needed by several terms is first
+        allocated to all of them at once as a seat-constrained matching.
+        policy="headroom" makes the greedy step prefer the bundle with the most
+        seats left over, up to the course's still-unplaced demand (always in memory).
+        The result is saved as a new ScheduleRun version (self.last_run); a run
+        that stops before scheduling anything saves nothing (last_run is None).
+        Returns the run's GenerationStats (also kept on self.stats).
+        """
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown engine {engine!r}; expected one of {self.ENGINES}")
+        if policy not in self.PLACEMENT_POLICIES:
+            raise ValueError(f"Unknown placement policy {policy!r}; expected one of {self.PLACEMENT_POLICIES}")
+
+        self.stats = GenerationStats()
+        self.engine = engine
+        self.dynamic_order = dynamic_order
+        self.batch_shared = batch_shared
+        self.placement_policy = policy
+        self.use_patterns = symmetry
+        self.diverse_patterns = diverse
+        self.last_run = None
+        with self.stats.track_queries(), self.stats.phase("total"):
+            produced = self._generate(in_memory, restarts, workers, time_budget, program_ids, improve)
+            if produced:
+                with self.stats.phase("save_run"):
+                    self.last_run = save_run(label="scoped" if program_ids is not None else "full")
+        if self.last_run is not None:
+            print(f"Saved as schedule run v{self.last_run.version}.")
+        return self.stats
+
+    def _generate(self, in_memory, restarts, workers, time_budget, program_ids, improve=None):
+        """
+        Runs the generation; returns False if it stopped before producing a schedule.
+        """
         MAX_RETRIES = 1  # Try up to 50 times to get a perfect schedule
         
         print(f"\n=== STARTING SCHEDULE GENERATION (Max Retries: {MAX_RETRIES}) ===")
         
         # 1. Build the Structure ONCE
-        self.build_blocks()
+        with self.stats.phase("build_blocks"):
+            self.build_blocks(program_ids)
         
         if Block.objects.count() == 0:
             print("CRITICAL ERROR: No blocks were created. Check 'Program' table and 'enrolled' count.")
-            return
+            return False
+
+        # Report courses that cannot be fully placed before the expensive search
+        with self.stats.phase("preflight"):
+            print_feasibility_report(analyze_feasibility(self.BLOCK_SIZE, self.block_size_overrides))
+
+        if program_ids is not None:
+            # Scoped runs must keep the other programs' rows, so they never use the ORM wipe
+            in_memory = True
+            print(f"Scoped to program ids: {sorted(program_ids)}")
+
+        if (improve or self.use_patterns or self.engine == "csp" or self.dynamic_order
+                or self.batch_shared or self.placement_policy == "headroom"):
+            # These passes work on the in-memory snapshot (headroom's demand lookups
+            # would cost queries on every placement in ORM mode)
+            in_memory = True
+
+        if time_budget is not None:
+            produced = self._generate_anytime(time_budget, workers, program_ids, improve)
+            print("\n=== GENERATION COMPLETE ===")
+            return produced
+
+        if restarts > 1:
+            produced = self._generate_multi_restart(restarts, workers, program_ids, improve)
+            print("\n=== GENERATION COMPLETE ===")
+            return produced
 
         for attempt in range(1, MAX_RETRIES + 1):
             print(f"\n>>> ATTEMPT {attempt} / {MAX_RETRIES}")
 
             # 2. Clear ONLY the schedule assignments
-            with transaction.atomic():
-                TermCourses.objects.all().delete()
-                Course.objects.update(enrolled=0)
+            with self.stats.phase("load_state"):
+                if in_memory:
+                    self._state = self._load_run_state(program_ids)
+                    self._catalogue = self._state.catalogue
+                else:
+                    self._catalogue = get_bundle_catalogue(reset_enrollment=True)
+                    with transaction.atomic():
+                        TermCourses.objects.all().delete()
+                        Course.objects.update(enrolled=0)
             
-            # 3. Get Courses (Includes Random Weight for variation)
-            sorted_courses = self.find_shared_courses()
-            
-            if len(sorted_courses) == 0:
+            # 3-4. Prioritize courses and run the Scheduling Logic
+            if not self._run_scheduling_pass():
                 print("CRITICAL ERROR: No shared courses found. Check 'ProgramCourse' table.")
-                return
+                self._state = None
+                self._catalogue = None
+                return False
 
-            # 4. Run the Scheduling Logic
-            for course_info in sorted_courses:
-                course_code = course_info['course_code']
-                # print(f"--- Processing: {course_code} ---") 
-                self._schedule_course_globally(course_code)
+            if improve:
+                self._improve_state(self._state, improve)
 
             # 5. Check Result
             missing_count = self._count_missing_courses()
+
+            if self._state is not None:
+                with self.stats.phase("flush"):
+                    self._state.flush()
+                self._state = None
             
             if missing_count == 0:
                 print(f"\nSUCCESS: Perfect schedule generated on attempt {attempt}!")
@@ -181,12 +375,566 @@ class ScheduleBuilder:
                 if attempt == MAX_RETRIES:
                     print("\nWARNING: Max retries reached. The schedule is incomplete.")
 
+        self._catalogue = None
         print("\n=== GENERATION COMPLETE ===")
+        return True
+
+    def _load_run_state(self, program_ids=None):
+        """
+        Snapshot for a generation run. A full run starts from empty enrollment;
+        a scoped run keeps the other programs' placements as fixed load.
+        """
+        if program_ids is None:
+            return ScheduleState.load(reset_enrollment=True)
+
+        state = ScheduleState.load()
+        state.recount_enrollment()
+        state.restrict_to_programs(program_ids)
+        return state
+
+    def _run_scheduling_pass(self):
+        """
+        One greedy + kick-and-repair pass over every required course.
+        Returns the number of courses processed (0 means nothing to schedule).
+        """
+        if self.use_patterns and self._state is not None:
+            with self.stats.phase("patterns"):
+                self._schedule_by_pattern()
+
+        if self.engine == "csp" and self._state is not None:
+            return self._run_csp_pass()
+
+        return self._run_greedy_pass()
+
+    def _run_greedy_pass(self):
+        """
+        Greedy + kick-and-repair over every missing (term, course) pair.
+        Returns the number of courses (or pairs, with dynamic_order) processed.
+        """
+        if self.dynamic_order and self._state is not None:
+            with self.stats.phase("schedule_courses"):
+                return self._schedule_most_constrained_first()
+
+        # Get Courses (Includes Random Weight for variation)
+        with self.stats.phase("find_shared_courses"):
+            sorted_courses = self.find_shared_courses()
+
+        with self.stats.phase("schedule_courses"):
+            for course_info in sorted_courses:
+                course_code = course_info['course_code']
+                # print(f"--- Processing: {course_code} ---") 
+                self._schedule_course_globally(course_code)
+
+        return len(sorted_courses)
+
+    def _schedule_most_constrained_first(self):
+        """
+        Greedy pass over (term, course) pairs in live most-constrained-first order.
+        A heap is keyed by PRIORITY_COURSES first, then the number of time-signature
+        classes that still fit the term and have seats. A placement only changes the
+        counts of the term's other missing courses (time) and of the course's other
+        terms (seats), so only those pairs are re-keyed; stale heap entries are
+        skipped. After a kick-and-repair the heap is rebuilt, since kicks touch
+        other terms. Returns the number of pairs that needed placing.
+        """
+        priority = set(self.PRIORITY_COURSES)
+        versions = {}
+        failed = set()
+        heap = []
+
+        def push(term, code):
+            pair = (term.pk, code)
+            if pair in failed:
+                return
+            versions[pair] = versions.get(pair, 0) + 1
+            key = (
+                code not in priority,
+                self._live_options(term, code),
+                -(term.block.size or 0),
+                self.rng.random(),
+            )
+            heapq.heappush(heap, (key, versions[pair], term.pk, code))
+
+        def rebuild():
+            heap.clear()
+            for term in self._state.scoped_terms():
+                for code in self._state.missing_for_term(term):
+                    push(term, code)
+
+        rebuild()
+        total = len(heap)
+
+        while heap:
+            _, version, term_pk, code = heapq.heappop(heap)
+            term = self._state.terms[term_pk]
+            if versions.get((term_pk, code)) != version or self._state.has_course(term, code):
+                continue
+
+            course_start = time.perf_counter()
+            bundle_classes = self.get_bundle_classes(code, term.term_name)
+
+            if self._attempt_to_schedule_term(term, code, bundle_classes):
+                for other_code in self._state.missing_for_term(term):
+                    push(term, other_code)
+                for other_term in self._state.terms_needing(code):
+                    if not self._state.has_course(other_term, code):
+                        push(other_term, code)
+            elif self._attempt_force_schedule(term, code, bundle_classes, 0):
+                rebuild()
+            else:
+                failed.add((term_pk, code))
+                self.stats.failed_placements += 1
+                print(f"      [x] Failed to place {code} in {term.term_name}")
+
+            self.stats.add_course_time(code, time.perf_counter() - course_start)
+
+        return total
+
+    def _live_options(self, term, course_code):
+        """
+        Time-signature classes of the course that still fit the term and have seats.
+        """
+        block_size = term.block.size or 0
+        mask = self._state.term_mask(term)
+        count = 0
+        for bundle_class in self._catalogue.bundle_classes(course_code, term.term_name):
+            self.stats.conflict_checks += 1
+            if not can_add_group_to_mask(bundle_class[0], mask):
+                continue
+            if any(self._has_capacity(bundle, block_size) for bundle in bundle_class):
+                count += 1
+        return count
+
+    def _run_csp_pass(self):
+        """
+        Places every missing (term, course) pair with the constraint solver.
+        The greedy + kick-and-repair pass runs first and its schedule is the
+        solver's incumbent, so the search only keeps schedules that place more
+        pairs; kick-and-repair then retries whatever the solver left.
+        Returns the number of pairs it had to place.
+        """
+        if not self._state.required_codes():
+            return 0
+
+        start = self._state.export_assignments()
+        failed = self.stats.failed_placements
+        with self.stats.phase("csp_incumbent"):
+            self._run_greedy_pass()
+        incumbent = self._state.export_assignments()
+        print(f"      [i] CSP incumbent (greedy + repair): {self._state.count_missing()} pairs missing")
+        # Only the pairs still missing at the end count as failures
+        self.stats.failed_placements = failed
+        self._state.apply_assignments(start)
+
+        with self.stats.phase("csp"):
+            solver = CSPSolver(
+                self._state, node_limit=self.CSP_NODE_LIMIT,
+                time_limit=self.CSP_TIME_LIMIT, stats=self.stats, incumbent=incumbent, rng=self.rng
+            )
+            result = solver.solve()
+
+        stopped = f", stopped at {result['stopped'].replace('_', ' ')}" if result['stopped'] else ""
+        print(f"      [i] CSP: {result['variables'] - result['unplaced']}/{result['variables']} placements, "
+              f"{result['nodes']} nodes, {result['backtracks']} backtracks{stopped}")
+
+        with self.stats.phase("csp_repair"):
+            for term in self._state.scoped_terms():
+                for code in sorted(self._state.missing_for_term(term)):
+                    bundle_classes = self.get_bundle_classes(code, term.term_name)
+                    if not self._attempt_to_schedule_term(term, code, bundle_classes):
+                        self._attempt_force_schedule(term, code, bundle_classes, 0)
+
+        for term in self._state.scoped_terms():
+            for code in sorted(self._state.missing_for_term(term)):
+                self.stats.failed_placements += 1
+                print(f"      [x] Failed to place {code} in {term.term_name}")
+        return max(result['variables'], 1)
+
+    def _schedule_by_pattern(self):
+        """
+        Symmetry pass: all blocks of a program need the same courses in a term, so
+        conflict-free combinations of time-signature classes ("patterns") are found
+        once per program-term and handed to its empty terms, largest block first,
+        taking seats from any member of each class. Without diverse_patterns every
+        block reuses the first pattern that still has seats; with it, blocks start
+        from different patterns. Whatever a block could not get is left to the
+        regular greedy / kick-and-repair pass.
+        """
+        for (program_id, term_name), terms in self._state.terms_by_program.items():
+            required = self._state.program_requirements.get((program_id, term_name))
+            if not required or not self._state.in_scope(program_id):
+                continue
+
+            terms = [t for t in terms if not self._state.assignments[t.pk]]
+            if not terms:
+                continue
+
+            patterns = self._find_patterns(sorted(required), term_name)
+            if not patterns:
+                continue
+
+            terms.sort(key=lambda t: t.block.size or 0, reverse=True)
+            for i, term in enumerate(terms):
+                first = i % len(patterns) if self.diverse_patterns else 0
+                self._assign_pattern(term, patterns[first:] + patterns[:first])
+
+    def _find_patterns(self, course_codes, term_name):
+        """
+        Up to PATTERN_LIMIT conflict-free combinations of one time-signature class per course.
+        Courses are tried fewest classes first. If no combination covers every
+        course, the largest partial one is returned.
+        """
+        classes = {code: self.get_bundle_classes(code, term_name) for code in course_codes}
+        order = sorted((code for code in course_codes if classes[code]), key=lambda code: len(classes[code]))
+
+        patterns = []
+        best_partial = []
+        nodes = 0
+
+        def search(index, mask, chosen):
+            nonlocal nodes, best_partial
+            if len(patterns) >= self.PATTERN_LIMIT or nodes >= self.PATTERN_NODE_LIMIT:
+                return
+            nodes += 1
+
+            if index == len(order):
+                patterns.append(list(chosen))
+                return
+            if len(chosen) > len(best_partial):
+                best_partial = list(chosen)
+
+            code = order[index]
+            options = classes[code]
+            self.rng.shuffle(options)
+            for bundle_class in options:
+                self.stats.conflict_checks += 1
+                if not can_add_group_to_mask(bundle_class[0], mask):
+                    continue
+                chosen.append((code, bundle_class))
+                search(index + 1, mask | group_mask(bundle_class[0]), chosen)
+                chosen.pop()
+
+        search(0, 0, [])
+        return patterns or ([best_partial] if best_partial else [])
+
+    def _assign_pattern(self, term, patterns):
+        """
+        Commits the first pattern that has seats for the whole block; otherwise the
+        part of the pattern with the most courses that still have seats.
+        """
+        block_size = term.block.size or 0
+        best = []
+        for pattern in patterns:
+            picked = []
+            for code, bundle_class in pattern:
+                bundle = self._pick_bundle(bundle_class, block_size)
+                if bundle is not None:
+                    picked.append(bundle)
+            if len(picked) > len(best):
+                best = picked
+            if len(picked) == len(pattern):
+                break
+
+        for bundle in best:
+            self._state.commit(term, bundle, block_size)
+
+    def _worker_options(self):
+        """
+        Builder settings copied onto the ScheduleBuilder of every worker process.
+        """
+        return {
+            'use_patterns': self.use_patterns,
+            'diverse_patterns': self.diverse_patterns,
+            'engine': self.engine,
+            'dynamic_order': self.dynamic_order,
+            'batch_shared': self.batch_shared,
+            'placement_policy': self.placement_policy,
+        }
+
+    def benchmark_placement_policies(self, runs=5, policies=None, program_ids=None):
+        """
+        Compares placement policies on the current catalogue without writing anything:
+        each policy runs the same seeded in-memory greedy passes. Blocks must exist.
+        Returns {policy: {"missing", "failed_placements", "force_attempts", "seconds"}} averaged over runs.
+        """
+        policies = policies or self.PLACEMENT_POLICIES
+        state = self._load_run_state(program_ids)
+        seeds = [self.rng.randrange(2 ** 32) for _ in range(runs)]
+        saved_policy = self.placement_policy
+        results = {}
+
+        for policy in policies:
+            self.placement_policy = policy
+            totals = {'missing': 0, 'failed_placements': 0, 'force_attempts': 0, 'seconds': 0.0}
+            for seed in seeds:
+                state.clear_assignments()
+                self.stats = GenerationStats()
+                start = time.perf_counter()
+                result = self._run_in_memory_attempt(state, seed)
+                totals['seconds'] += time.perf_counter() - start
+                totals['missing'] += result['missing']
+                totals['failed_placements'] += self.stats.failed_placements
+                totals['force_attempts'] += self.stats.force_attempts
+            results[policy] = {name: value / runs for name, value in totals.items()}
+
+        self.placement_policy = saved_policy
+        return results
+
+    def _improve_state(self, state, time_limit):
+        """
+        Local-search improvement phase on an in-memory schedule (see local_search.py).
+        """
+        with self.stats.phase("improve"):
+            result = LocalSearch(state, stats=self.stats, rng=self.rng).run(time_limit=time_limit)
+
+        print(f"      [i] Local search: {result['iterations']} iterations, "
+              f"{result['moves_per_sec']:.0f} moves/sec, {result['moves_applied']} applied")
+        print(f"      [i] Average term score {result['start_score']:.1f} -> {result['best_score']:.1f}, "
+              f"{result['placed']} missing courses placed")
+        return result
+
+    def _run_in_memory_attempt(self, state, seed):
+        """
+        Runs one seeded pass on a ScheduleState without touching the database.
+        Returns the result summary used to compare restarts.
+        """
+        self.rng.seed(seed)
+        self._state = state
+        self._catalogue = state.catalogue
+
+        log_buffer = io.StringIO()
+        with redirect_stdout(log_buffer):
+            self._run_scheduling_pass()
+
+        result = {
+            'seed': seed,
+            'missing': state.count_missing(),
+            'score': ScheduleRanker().score_state(state),
+            'assignments': state.export_assignments(),
+            'log': log_buffer.getvalue(),
+            'stats': self.stats.to_dict(),
+        }
+        self._state = None
+        self._catalogue = None
+        return result
+
+    def _run_anytime(self, state, time_budget, seed):
+        """
+        Restarts and repair rounds on a ScheduleState until time_budget seconds pass.
+        Keeps the best schedule seen (fewest missing, then ranking score) and
+        samples progress after every attempt. Always completes at least one attempt.
+        """
+        self.rng.seed(seed)
+        self._state = state
+        self._catalogue = state.catalogue
+        ranker = ScheduleRanker()
+
+        start = time.monotonic()
+        deadline = start + time_budget
+        best = None
+        attempts = 0
+        progress = []
+
+        while True:
+            state.clear_assignments()
+            log_buffer = io.StringIO()
+
+            with redirect_stdout(log_buffer):
+                self._run_scheduling_pass()
+                missing = state.count_missing()
+
+                # Repair rounds: retry what is still missing while it keeps helping
+                while missing and time.monotonic() < deadline:
+                    self._repair_missing_courses()
+                    remaining = state.count_missing()
+                    if remaining >= missing:
+                        break
+                    missing = remaining
+
+            attempts += 1
+            if best is None or missing <= best['missing']:
+                score = ranker.score_state(state)
+                if best is None or (missing, -score) < (best['missing'], -best['score']):
+                    best = {
+                        'seed': seed,
+                        'missing': missing,
+                        'score': score,
+                        'assignments': state.export_assignments(),
+                        'log': log_buffer.getvalue(),
+                    }
+
+            elapsed = time.monotonic() - start
+            progress.append({
+                'elapsed': round(elapsed, 3),
+                'attempts': attempts,
+                'missing': missing,
+                'best_missing': best['missing'],
+            })
+
+            if time.monotonic() >= deadline:
+                break
+
+        best['attempts'] = attempts
+        best['attempts_per_sec'] = attempts / max(time.monotonic() - start, 1e-9)
+        best['progress'] = progress
+        best['stats'] = self.stats.to_dict()
+        self._state = None
+        self._catalogue = None
+        return best
+
+    def _repair_missing_courses(self):
+        """
+        One repair round: re-run greedy + kick-and-repair for every course still missing somewhere.
+        """
+        missing_codes = set()
+        for term in self._state.scoped_terms():
+            missing_codes |= self._state.missing_for_term(term)
+
+        missing_codes = list(missing_codes)
+        self.rng.shuffle(missing_codes)
+        for code in missing_codes:
+            self._schedule_course_globally(code)
+
+    def _generate_anytime(self, time_budget, workers=None, program_ids=None, improve=None):
+        """
+        Anytime generation: searches until time_budget seconds pass and saves the best schedule.
+        With workers > 1, each worker process runs its own anytime search on a snapshot.
+        """
+        state = self._load_run_state(program_ids)
+
+        if not state.required_codes():
+            print("CRITICAL ERROR: No shared courses found. Check 'ProgramCourse' table.")
+            return False
+
+        print(f"\n>>> ANYTIME SEARCH: {time_budget}s budget")
+
+        with self.stats.phase("anytime_search"):
+            if workers and workers > 1:
+                seeds = [self.rng.randrange(2 ** 32) for _ in range(workers)]
+                results = run_attempts(state, seeds, workers, time_budget=time_budget,
+                                       options=self._worker_options())
+                for result in results:
+                    self.stats.merge(result['stats'])
+            else:
+                results = [self._run_anytime(state, time_budget, self.rng.randrange(2 ** 32))]
+
+        # Merge progress samples of all workers into one timeline
+        self.progress = sorted(
+            (sample for result in results for sample in result['progress']),
+            key=lambda sample: sample['elapsed']
+        )
+        # Print roughly one line per second, plus every improvement
+        last_printed = None
+        for sample in self.progress:
+            if (last_printed is None or sample['elapsed'] - last_printed['elapsed'] >= 1
+                    or sample['best_missing'] < last_printed['best_missing']):
+                print(f"      [t={sample['elapsed']:.1f}s] attempt {sample['attempts']}: "
+                      f"missing={sample['missing']} (best {sample['best_missing']})")
+                last_printed = sample
+
+        total_attempts = sum(r['attempts'] for r in results)
+        rate = sum(r['attempts_per_sec'] for r in results)
+        best = min(results, key=lambda r: (r['missing'], -r['score']))
+        print(best['log'], end="")
+        print(f"      [i] {total_attempts} attempts, {rate:.1f} attempts/sec")
+
+        state.apply_assignments(best['assignments'])
+        if improve:
+            best['missing'] = self._improve_state(state, improve)['missing']
+        with self.stats.phase("flush"):
+            state.flush()
+
+        if best['missing'] == 0:
+            print(f"\nSUCCESS: Perfect schedule generated (seed {best['seed']}).")
+        else:
+            print(f"\nWARNING: Best schedule found still has {best['missing']} courses missing.")
+        return True
+
+    def _generate_multi_restart(self, restarts, workers=None, program_ids=None, improve=None):
+        """
+        Runs independently seeded attempts in worker processes and persists the best:
+        fewest missing courses first, ties broken by ScheduleRanker score.
+        """
+        state = self._load_run_state(program_ids)
+
+        if not state.required_codes():
+            print("CRITICAL ERROR: No shared courses found. Check 'ProgramCourse' table.")
+            return False
+
+        seeds = [self.rng.randrange(2 ** 32) for _ in range(restarts)]
+        print(f"\n>>> RUNNING {restarts} SEEDED ATTEMPTS ON {workers or 'ALL'} WORKER PROCESSES")
+
+        with self.stats.phase("parallel_attempts"):
+            results = run_attempts(state, seeds, workers, options=self._worker_options())
+        for result in results:
+            self.stats.merge(result['stats'])
+        for i, result in enumerate(results, 1):
+            print(f"      [{i}] seed={result['seed']} missing={result['missing']} score={result['score']:.1f}")
+
+        best = min(results, key=lambda r: (r['missing'], -r['score']))
+        print(best['log'], end="")
+
+        state.apply_assignments(best['assignments'])
+        if improve:
+            best['missing'] = self._improve_state(state, improve)['missing']
+        with self.stats.phase("flush"):
+            state.flush()
+
+        if best['missing'] == 0:
+            print(f"\nSUCCESS: Perfect schedule generated (seed {best['seed']}).")
+        else:
+            print(f"\nWARNING: Best attempt (seed {best['seed']}) still has {best['missing']} courses missing.")
+        return True
+
+    def reschedule_incremental(self, course_codes=None):
+        """
+        Repairs the current schedule after catalogue changes instead of rebuilding it.
+        Finds the placements invalidated by a section's time, capacity or existence
+        changing (optionally only for `course_codes`), releases their seats and
+        re-places just those courses in just those terms with the greedy and
+        kick-and-repair logic. Only the terms that changed are written back.
+        Returns the list of (term, course_code) placements that were released.
+        """
+        print("\n=== INCREMENTAL RESCHEDULE ===")
+
+        self._catalogue = get_bundle_catalogue()
+        self._state = ScheduleState.load(catalogue=self._catalogue)
+        self._state.recount_enrollment()
+
+        invalid = self._state.invalid_assignments(course_codes)
+        if not invalid:
+            print("No assignments were invalidated.")
+
+        affected = {}
+        for term, code in invalid:
+            print(f"      [-] Releasing {code} from {term.block.block_name} ({term.term_name})")
+            self._state.release(term, code, term.block.size or 0)
+            affected.setdefault(code, []).append(term)
+
+        for code, terms in affected.items():
+            self._schedule_course_globally(code, targets=terms)
+
+        missing = sum(
+            1 for term, code in invalid if not self._state.has_course(term, code)
+        )
+        if missing:
+            print(f"      [!] {missing} released placements could not be re-placed.")
+
+        self._state.flush(dirty_only=True)
+        self._state = None
+        self._catalogue = None
+
+        self.last_run = save_run(label="incremental")
+        print(f"\n=== RESCHEDULE COMPLETE (run v{self.last_run.version}) ===")
+        return invalid
 
     def _count_missing_courses(self):
         """
         Helper to count exactly how many required courses (excluding electives) failed to be scheduled.
         """
+        if self._state is not None:
+            return self._state.count_missing()
+
         missing_count = 0
         programs = Program.objects.all()
         for program in programs:
@@ -215,45 +963,161 @@ class ScheduleBuilder:
         
         return missing_count
 
-    def _schedule_course_globally(self, course_code, depth=0):
+    def _schedule_course_globally(self, course_code, depth=0, targets=None):
         """
-        Attempts to schedule the given course_code into all terms that require it.
+        Attempts to schedule the given course_code into all terms that require it
+        (or only into `targets`, if given).
         Added recursion depth to prevent infinite swapping loops.
+        Returns True if every target term ended up with the course.
         """
-        MAX_RECURSION_DEPTH = 3  
+        MAX_RECURSION_DEPTH = self.MAX_RECURSION_DEPTH
+
+        self.stats.reach_depth(depth)
         
         if depth > MAX_RECURSION_DEPTH:
             print(f"      [!] Max depth reached. Cannot schedule {course_code}.")
             return False
 
-        bundles = self.get_course_bundles(course_code)
-        if not bundles:
+        if self._get_flexibility(course_code) == 0:
             return False
 
         # Find all terms that need this course
-        targets = self._get_terms_needing_course(course_code)
+        if targets is None:
+            targets = self._get_terms_needing_course(course_code)
         
         # Filter targets: only keep terms where this course isn't ALREADY scheduled
-        targets = [t for t in targets if not TermCourses.objects.filter(term=t, course_code=course_code).exists()]
+        targets = [t for t in targets if not self._term_has_course(t, course_code)]
 
-        random.shuffle(targets)
+        course_start = time.perf_counter()
+        all_placed = True
+
+        if (depth == 0 and self.batch_shared and self._state is not None
+                and len(targets) >= self.BATCH_MIN_TERMS):
+            # Allocate sections to every target term together; leftovers go through greedy/repair
+            targets = self._place_course_batch(course_code, targets)
+
+        self.rng.shuffle(targets)
 
         for term in targets:
+            # A repair chain for an earlier target may already have placed it here
+            if self._term_has_course(term, course_code):
+                continue
+
+            # Only sections offered in this term are candidates
+            bundle_classes = self.get_bundle_classes(course_code, term.term_name)
+
             # 1. Try Standard Greedy Schedule
-            success = self._attempt_to_schedule_term(term, course_code, bundles)
+            step_start = time.perf_counter()
+            success = self._attempt_to_schedule_term(term, course_code, bundle_classes)
+            if depth == 0:
+                self.stats.add_time("greedy", time.perf_counter() - step_start)
             
             # 2. If Greedy failed, try "Kick and Repair"
             if not success and depth < MAX_RECURSION_DEPTH:
                 # print(f"      [?] Conflict in {term.term_name}. Attempting to resolve...")
-                success = self._attempt_force_schedule(term, course_code, bundles, depth)
+                step_start = time.perf_counter()
+                success = self._attempt_force_schedule(term, course_code, bundle_classes, depth)
+                if depth == 0:
+                    self.stats.add_time("force_schedule", time.perf_counter() - step_start)
 
             if not success:
+                 all_placed = False
+                 if depth == 0:
+                     # Nested failures belong to repair chains that may still be undone
+                     self.stats.failed_placements += 1
                  print(f"      [x] Failed to place {course_code} in {term.term_name}")
 
-    def _attempt_force_schedule(self, term, new_course_code, new_bundles, depth):
+        if depth == 0:
+            self.stats.add_course_time(course_code, time.perf_counter() - course_start)
+
+        return all_placed
+
+    def _place_course_batch(self, course_code, targets):
+        """
+        Cohort batching for a shared course: assigns a bundle to every target term
+        at once, as a seat-constrained matching of blocks to sections.
+        Terms with the fewest time-compatible bundles go first (largest block on
+        ties). When no compatible bundle has seats left for a term, an augmenting
+        path is tried: a term already matched in this batch that holds one of the
+        needed sections is moved to another bundle, recursively, so seats are not
+        lost to early arbitrary picks. Matched bundles are committed at the end.
+        Returns the targets that could not be matched.
+        """
+        options = {}
+        for term in targets:
+            mask = self._state.term_mask(term)
+            fitting = []
+            for bundle_class in self.get_bundle_classes(course_code, term.term_name):
+                self.stats.conflict_checks += 1
+                if can_add_group_to_mask(bundle_class[0], mask):
+                    self.rng.shuffle(bundle_class)
+                    fitting.extend(bundle_class)
+            options[term.pk] = fitting
+
+        used = {}      # course pk -> seats taken by this batch
+        matched = {}   # term pk -> bundle
+        sizes = {term.pk: term.block.size or 0 for term in targets}
+
+        def fits(bundle, size):
+            return all(
+                part.capacity is None
+                or part.enrolled + used.get(part.pk, 0) + size <= part.capacity
+                for part in bundle
+            )
+
+        def take(term_pk, bundle):
+            matched[term_pk] = bundle
+            for part in bundle:
+                used[part.pk] = used.get(part.pk, 0) + sizes[term_pk]
+
+        def give_back(term_pk):
+            for part in matched.pop(term_pk):
+                used[part.pk] -= sizes[term_pk]
+
+        def augment(term_pk, visited):
+            for bundle in options[term_pk]:
+                if fits(bundle, sizes[term_pk]):
+                    take(term_pk, bundle)
+                    return True
+
+            for bundle in options[term_pk]:
+                key = tuple(c.pk for c in bundle)
+                if key in visited:
+                    continue
+                visited.add(key)
+
+                parts = {c.pk for c in bundle}
+                holders = [pk for pk, held in matched.items() if parts & {c.pk for c in held}]
+                for holder in holders:
+                    old = matched[holder]
+                    give_back(holder)
+                    if fits(bundle, sizes[term_pk]):
+                        take(term_pk, bundle)
+                        if augment(holder, visited):
+                            return True
+                        give_back(term_pk)
+                    take(holder, old)
+            return False
+
+        order = sorted(targets, key=lambda t: (len(options[t.pk]), -sizes[t.pk], self.rng.random()))
+        unmatched = [term for term in order if not augment(term.pk, set())]
+
+        for term in order:
+            if term.pk in matched:
+                self._commit_bundle_to_term(term, matched[term.pk], sizes[term.pk])
+                self.stats.batch_placements += 1
+        return unmatched
+
+    def _attempt_force_schedule(self, term, new_course_code, new_classes, depth):
         """
         Kick and Repair logic with smart victim selection.
+        In in-memory mode every kick is a checkpoint on the state's undo log:
+        if the victim cannot be placed back into this term the whole chain is
+        rolled back and the next victim/bundle is tried.
         """
+        self.stats.force_attempts += 1
+        if depth == 0:
+            self._repair_budget = self.REPAIR_NODE_LIMIT
         existing_groups = self._get_existing_course_objects_for_term(term)
         
         # FIX: Get the block size once at the beginning (default to 0 if None)
@@ -263,21 +1127,24 @@ class ScheduleBuilder:
         victim_scores = []
         for group in existing_groups:
             c_code = group[0].course_code
-            num_options = len(self.get_course_bundles(c_code))
+            num_options = self._get_flexibility(c_code, term.term_name)
             victim_scores.append({
                 'group': group,
                 'code': c_code,
-                'score': num_options
+                'score': num_options,
+                'mask': group_mask(group)
             })
         
         # Sort: Highest score (easiest to move) first
         victim_scores.sort(key=lambda x: x['score'], reverse=True)
 
-        random.shuffle(new_bundles)
+        self.rng.shuffle(new_classes)
 
-        for new_bundle in new_bundles:
+        for bundle_class in new_classes:
             # FIX: Ensure the new bundle actually has enough capacity before proceeding!
-            if not self._has_capacity(new_bundle, block_size):
+            # Members of a class share their times, so one with seats stands for all of them
+            new_bundle = self._pick_bundle(bundle_class, block_size)
+            if new_bundle is None:
                 continue
             
             # Iterate through our SORTED list of victims
@@ -288,25 +1155,30 @@ class ScheduleBuilder:
                 if victim_code == new_course_code: 
                     continue
 
-                # Create temp schedule without this victim
-                temp_schedule = [
-                    g['group'] for g in victim_scores 
-                    if g['code'] != victim_code
-                ]
+                # Occupancy of the temp schedule without this victim
+                temp_mask = 0
+                for g in victim_scores:
+                    if g['code'] != victim_code:
+                        temp_mask |= g['mask']
                 
-                if can_add_group_to_term(new_bundle, temp_schedule):
+                self.stats.conflict_checks += 1
+                if can_add_group_to_mask(new_bundle, temp_mask):
+
+                    if self._state is not None:
+                        if self._repair_budget <= 0:
+                            return False
+                        self._repair_budget -= 1
+                        if self._try_repair_chain(term, new_course_code, new_bundle, victim_code, block_size, depth):
+                            self.stats.force_successes += 1
+                            return True
+                        continue
                     
                     # 1. Delete Victim and decrement enrollment for SPECIFIC sections
                     print(f"      [!] Kicking out {victim_code} to make room for {new_course_code}...")
                     
-                    # Decrement enrollment for each specific course in the victim bundle
-                    for course_part in existing_group:
-                        Course.objects.filter(pk=course_part.pk).update(
-                            enrolled=models.F('enrolled') - block_size
-                        )
-                    
-                    # Delete the TermCourses entries
-                    TermCourses.objects.filter(term=term, course_code=victim_code).delete()
+                    # Decrement enrollment and delete the TermCourses entries
+                    self._release_course_from_term(term, victim_code, existing_group, block_size)
+                    self.stats.kicks += 1
 
                     # 2. Add New Course
                     self._commit_bundle_to_term(term, new_bundle, block_size)
@@ -314,11 +1186,39 @@ class ScheduleBuilder:
                     # 3. Recurse (Try to fix the victim)
                     self._schedule_course_globally(victim_code, depth=depth + 1)
                     
+                    self.stats.force_successes += 1
                     return True 
 
         return False
 
+    def _try_repair_chain(self, term, new_course_code, new_bundle, victim_code, block_size, depth):
+        """
+        In-memory kick: place new_bundle in place of the victim, then try to put the
+        victim back into this term. Keeps the chain only if that succeeds, otherwise
+        rolls every change of the chain back through the undo log.
+        """
+        mark = self._state.checkpoint()
+
+        print(f"      [!] Kicking out {victim_code} to make room for {new_course_code}...")
+        self._state.release(term, victim_code, block_size)
+        self.stats.kicks += 1
+        self._state.commit(term, new_bundle, block_size)
+
+        self._schedule_course_globally(victim_code, depth=depth + 1)
+
+        if self._state.has_course(term, victim_code):
+            self._state.accept(mark)
+            return True
+
+        print(f"      [<] Undoing kick of {victim_code} (could not be placed back)")
+        self._state.rollback(mark)
+        self.stats.rollbacks += 1
+        return False
+
     def _get_terms_needing_course(self, course_code):
+        if self._state is not None:
+            return self._state.terms_needing(course_code)
+
         targets = []
         requirements = ProgramCourse.objects.filter(course_code=course_code)
 
@@ -329,27 +1229,94 @@ class ScheduleBuilder:
                 targets.extend(terms)
         return targets
 
-    def _attempt_to_schedule_term(self, term, course_code, bundles):
+    def _attempt_to_schedule_term(self, term, course_code, bundle_classes):
+        self.stats.greedy_attempts += 1
         block_size = term.block.size or 0
-        current_term_courses_objects = self._get_existing_course_objects_for_term(term)
+        occupied_mask = self._get_term_mask(term)
+
+        self.rng.shuffle(bundle_classes)
 
-        random.shuffle(bundles)
+        if self.placement_policy == "headroom":
+            bundle = self._pick_by_headroom(term, course_code, bundle_classes, occupied_mask, block_size)
+            if bundle is None:
+                return False
+            self._commit_bundle_to_term(term, bundle, block_size)
+            self.stats.greedy_successes += 1
+            return True
 
-        for bundle in bundles:
-            if not self._has_capacity(bundle, block_size):
+        for bundle_class in bundle_classes:
+            # One conflict check per time signature
+            self.stats.conflict_checks += 1
+            if not can_add_group_to_mask(bundle_class[0], occupied_mask):
                 continue
 
-            if not can_add_group_to_term(bundle, current_term_courses_objects):
+            bundle = self._pick_bundle(bundle_class, block_size)
+            if bundle is None:
                 continue
 
             self._commit_bundle_to_term(term, bundle, block_size)
+            self.stats.greedy_successes += 1
             return True
         
         return False
 
+    def _pick_by_headroom(self, term, course_code, bundle_classes, occupied_mask, block_size):
+        """
+        Headroom policy: among the fitting bundles with seats, the one whose fullest
+        section keeps the most free seats after this block. Headroom beyond the
+        course's unplaced demand in other terms is worth nothing extra, so ties
+        (including every bundle once demand is covered) stay randomly ordered.
+        """
+        demand = self._unplaced_demand(course_code, exclude=term)
+        best = None
+        best_score = None
+        for bundle_class in bundle_classes:
+            self.stats.conflict_checks += 1
+            if not can_add_group_to_mask(bundle_class[0], occupied_mask):
+                continue
+            self.rng.shuffle(bundle_class)
+            for bundle in bundle_class:
+                if not self._has_capacity(bundle, block_size):
+                    continue
+                score = min(self._headroom(bundle, block_size), demand)
+                if best_score is None or score > best_score:
+                    best, best_score = bundle, score
+        return best
+
+    def _headroom(self, bundle, block_size):
+        """
+        Seats left in the bundle's fullest section after placing the block (inf = no capacity limit).
+        """
+        return min(
+            (part.capacity - part.enrolled - block_size for part in bundle if part.capacity is not None),
+            default=math.inf,
+        )
+
+    def _unplaced_demand(self, course_code, exclude=None):
+        """
+        Seats still needed for the course: block sizes of the other terms that require it but lack it.
+        """
+        return sum(
+            term.block.size or 0
+            for term in self._get_terms_needing_course(course_code)
+            if term != exclude and not self._term_has_course(term, course_code)
+        )
+
     def _get_existing_course_objects_for_term(self, term):
+        if self._state is not None:
+            return self._state.groups_for_term(term)
+
         scheduled_entries = TermCourses.objects.filter(term=term)
         existing_groups = []
+
+        if self._catalogue is not None:
+            # Reuse the catalogue's Course instances so enrollment stays in sync
+            grouped = {}
+            for entry in scheduled_entries:
+                course = self._catalogue.sections.get((entry.course_code, entry.section))
+                if course is not None:
+                    grouped.setdefault(entry.course_code, []).append(course)
+            return list(grouped.values())
         
         grouped_codes = {}
         for entry in scheduled_entries:
@@ -364,6 +1331,21 @@ class ScheduleBuilder:
 
         return existing_groups
 
+    def _get_term_mask(self, term):
+        if self._state is not None:
+            return self._state.term_mask(term)
+        return term_mask(self._get_existing_course_objects_for_term(term))
+
+    def _pick_bundle(self, bundle_class, block_size):
+        """
+        A random member of a time-signature class with seats for the block, or None.
+        """
+        self.rng.shuffle(bundle_class)
+        for bundle in bundle_class:
+            if self._has_capacity(bundle, block_size):
+                return bundle
+        return None
+
     def _has_capacity(self, bundle, block_size):
         for course_part in bundle:
             if course_part.capacity is not None:
@@ -371,7 +1353,30 @@ class ScheduleBuilder:
                     return False
         return True
 
+    def _term_has_course(self, term, course_code):
+        if self._state is not None:
+            return self._state.has_course(term, course_code)
+        return TermCourses.objects.filter(term=term, course_code=course_code).exists()
+
+    def _release_course_from_term(self, term, course_code, group, block_size):
+        if self._state is not None:
+            self._state.release(term, course_code, block_size)
+            return
+
+        # Decrement enrollment for each specific course in the victim bundle
+        for course_part in group:
+            Course.objects.filter(pk=course_part.pk).update(
+                enrolled=models.F('enrolled') - block_size
+            )
+            course_part.enrolled -= block_size
+
+        TermCourses.objects.filter(term=term, course_code=course_code).delete()
+
     def _commit_bundle_to_term(self, term, bundle, block_size):
+        if self._state is not None:
+            self._state.commit(term, bundle, block_size)
+            return
+
         with transaction.atomic():
             for course_part in bundle:
                 TermCourses.objects.create(
@@ -0,0 +1,204 @@
+"""
+Versioned snapshots of generated schedules.
+
+save_run() stores the current TermCourses rows and section enrollment as a
+ScheduleRun with a compact encoding (term id -> course ids, course id ->
+enrolled). restore_run() swaps a stored version back in through a
+ScheduleState, dropping placements the current catalogue no longer allows,
+and diff_runs() compares two versions term by term.
+
+Blocks are rebuilt on every full generation, so Term ids do not survive
+between runs. Every run also records each term's (program, block name, term
+name), and terms are matched on that key when the stored id is gone.
+"""
+
+from django.db.models import Max
+
+from data_app.models import Course, ScheduleRun, Term, TermCourses
+
+from .schedule_state import ScheduleState
+
+
+def _term_key(term):
+    return [term.block.program_id, term.block.block_name, term.term_name]
+
+
+def save_run(label=""):
+    """
+    Snapshot the current schedule as the next ScheduleRun version.
+    """
+    sections = {
+        (code, section): pk
+        for pk, code, section in Course.objects.values_list("pk", "course_code", "section")
+    }
+
+    terms = {
+        str(term.pk): _term_key(term)
+        for term in Term.objects.select_related("block")
+    }
+    assignments = {term_id: [] for term_id in terms}
+    for term_id, code, section in TermCourses.objects.values_list("term_id", "course_code", "section"):
+        course_id = sections.get((code, section))
+        if course_id is not None and str(term_id) in assignments:
+            assignments[str(term_id)].append(course_id)
+
+    enrollment = {
+        str(pk): enrolled
+        for pk, enrolled in Course.objects.filter(enrolled__gt=0).values_list("pk", "enrolled")
+    }
+
+    version = (ScheduleRun.objects.aggregate(latest=Max("version"))["latest"] or 0) + 1
+    return ScheduleRun.objects.create(
+        version=version,
+        label=label,
+        assignments=assignments,
+        terms=terms,
+        enrollment=enrollment,
+    )
+
+
+def _resolve_terms(run, current):
+    """
+    {stored term id: current Term}, by id when the term still has the same
+    program/block/term name, otherwise by that key.
+    current: {term pk: Term} with blocks loaded.
+    """
+    by_key = {tuple(_term_key(term)): term for term in current.values()}
+
+    resolved = {}
+    for term_id, key in run.terms.items():
+        term = current.get(int(term_id))
+        if term is None or _term_key(term) != key:
+            term = by_key.get(tuple(key))
+        if term is not None:
+            resolved[term_id] = term
+    return resolved
+
+
+def _placement_label(term, code):
+    return f"{code} in {term.block.block_name} ({term.term_name})"
+
+
+def restore_run(run, force=False):
+    """
+    Replace the TermCourses rows of the run's terms with the run's. Terms or
+    sections that no longer exist make the restore refuse to run unless
+    force=True, in which case they are skipped and counted; rows of terms the
+    run does not cover are never touched.
+    Restored placements are checked against the current catalogue: groups
+    that are no longer a bundle of their course (e.g. a member was deleted),
+    time conflicts and placements that overfill a section are dropped and
+    reported. Section enrollment is recounted from the rows with the current
+    block sizes, so it stays consistent when blocks changed since the run.
+    """
+    state = ScheduleState.load()
+    resolved = _resolve_terms(run, state.terms)
+
+    placements = {}
+    missing_sections = 0
+    for term_id, course_ids in run.assignments.items():
+        term = resolved.get(term_id)
+        if term is None:
+            continue
+        groups = placements.setdefault(term.pk, {})
+        for course_id in course_ids:
+            course = state.courses.get(course_id)
+            if course is None:
+                missing_sections += 1
+                continue
+            groups.setdefault(course.course_code, []).append(course)
+
+    skipped_terms = len(run.terms) - len(resolved)
+    if (skipped_terms or missing_sections) and not force:
+        raise ValueError(
+            f"Run v{run.version} has {skipped_terms} terms and {missing_sections} sections "
+            "that no longer exist; restore with force=True to write the rest"
+        )
+
+    restored_ids = {term.pk for term in resolved.values()}
+    # Rows of restored terms are all rewritten, including ones for deleted sections
+    state.stale_rows = {(term_id, code) for term_id, code in state.stale_rows if term_id not in restored_ids}
+    for term in resolved.values():
+        block_size = term.block.size or 0
+        for code in list(state.assignments[term.pk]):
+            state.release(term, code, block_size)
+        for group in placements.get(term.pk, {}).values():
+            state.commit(term, group, block_size)
+        state.dirty_terms.add(term.pk)
+    state.recount_enrollment()
+
+    over_capacity = [
+        f"{course.course_code} {course.section} ({course.enrolled}/{course.capacity})"
+        for course in state.courses.values()
+        if course.capacity is not None and course.enrolled > course.capacity
+    ]
+    dropped = {"bundle": [], "conflict": [], "capacity": []}
+    for term, code, reason in state.invalid_assignments(term_ids=restored_ids, with_reasons=True):
+        state.release(term, code, term.block.size or 0)
+        dropped[reason].append(_placement_label(term, code))
+
+    state.flush(dirty_only=True)
+
+    return {
+        "version": run.version,
+        "terms": len(resolved),
+        "skipped_terms": skipped_terms,
+        "rows": sum(
+            len(group) for pk in restored_ids for group in state.assignments[pk].values()
+        ),
+        "missing_sections": missing_sections,
+        "invalid_groups": dropped["bundle"],
+        "conflicts": dropped["conflict"],
+        "over_capacity": over_capacity,
+        "dropped_for_capacity": dropped["capacity"],
+    }
+
+
+def _sections_by_key(run, labels):
+    by_key = {}
+    for term_id, course_ids in run.assignments.items():
+        key = tuple(run.terms.get(term_id, ()))
+        by_key[key] = {labels.get(course_id, f"#{course_id}") for course_id in course_ids}
+    return by_key
+
+
+def diff_runs(old, new):
+    """
+    Compares two runs. Returns {"terms": [...], "enrollment": [...]}:
+    terms lists {"program_id", "block", "term", "added", "removed"} for every
+    term whose sections differ; enrollment lists {"section", "old", "new"}.
+    """
+    course_ids = {pk for run in (old, new) for ids in run.assignments.values() for pk in ids}
+    course_ids |= {int(pk) for run in (old, new) for pk in run.enrollment}
+    labels = {
+        pk: f"{code} {section}"
+        for pk, code, section in Course.objects.filter(pk__in=course_ids)
+        .values_list("pk", "course_code", "section")
+    }
+
+    old_terms = _sections_by_key(old, labels)
+    new_terms = _sections_by_key(new, labels)
+
+    terms = []
+    for key in sorted(set(old_terms) | set(new_terms), key=lambda k: tuple(str(part) for part in k)):
+        before = old_terms.get(key, set())
+        after = new_terms.get(key, set())
+        if before == after:
+            continue
+        program_id, block_name, term_name = key
+        terms.append({
+            "program_id": program_id,
+            "block": block_name,
+            "term": term_name,
+            "added": sorted(after - before),
+            "removed": sorted(before - after),
+        })
+
+    enrollment = []
+    for pk in sorted(set(old.enrollment) | set(new.enrollment), key=int):
+        before = old.enrollment.get(pk, 0)
+        after = new.enrollment.get(pk, 0)
+        if before != after:
+            enrollment.append({"section": labels.get(int(pk), f"#{pk}"), "old": before, "new": after})
+
+    return {"terms": terms, "enrollment": enrollment}
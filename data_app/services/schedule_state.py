@@ -0,0 +1,406 @@
+"""
+In-memory snapshot of the scheduling tables.
+
+ScheduleState loads Course, ProgramCourse, Block, Term and TermCourses once
+into plain Python structures so the scheduling passes can run without
+touching the database. The final assignments are written back with
+flush() in a single transaction.
+"""
+
+from django.db import transaction
+
+from data_app.models import Block, Course, ProgramCourse, Term, TermCourses
+
+from .bundle_catalogue import get_bundle_catalogue
+from .utils import group_mask
+
+
+class ScheduleState:
+
+    def __init__(self, catalogue):
+        self.catalogue = catalogue      # BundleCatalogue shared with the builder
+        self.courses = catalogue.courses    # course pk -> Course
+        self.sections = catalogue.sections  # (course_code, section) -> Course
+        self.requirements = {}          # course_code -> [(program_id, term_name)]
+        self.program_requirements = {}  # (program_id, term_name) -> {course_code}
+        self.blocks = {}                # block pk -> Block
+        self.terms = {}                 # term pk -> Term
+        self.terms_by_program = {}      # (program_id, term_name) -> [Term]
+        self.assignments = {}           # term pk -> {course_code: [Course]}
+        self.term_masks = {}            # term pk -> running OR of occupancy bitmasks
+        self.dirty_terms = set()        # term pks changed since load
+        self.stale_rows = set()         # (term pk, course_code) rows pointing at deleted sections
+        self._loaded_enrolled = {}      # course pk -> enrolled at load time
+        self.program_ids = None         # programs being scheduled (None = all)
+        self.trail = []                 # undo log of (op, term, course_code, parts, block_size)
+        self._open_checkpoints = 0
+        self.synthetic = False          # blocks/terms are unsaved trial objects (see use_trial_blocks)
+
+    @classmethod
+    def load(cls, reset_enrollment=False, catalogue=None):
+        """
+        Build a snapshot with a fixed number of queries.
+        If reset_enrollment is True, every section starts with enrolled=0
+        and existing TermCourses rows are ignored (full regeneration).
+        """
+        if catalogue is None:
+            catalogue = get_bundle_catalogue(reset_enrollment=reset_enrollment)
+        elif reset_enrollment:
+            catalogue.reset_enrollment()
+
+        state = cls(catalogue)
+
+        for req in ProgramCourse.objects.exclude(course_code__icontains="Elective"):
+            state.requirements.setdefault(req.course_code, []).append(
+                (req.program_id, req.term)
+            )
+            state.program_requirements.setdefault(
+                (req.program_id, req.term), set()
+            ).add(req.course_code)
+
+        for block in Block.objects.all().order_by("pk"):
+            state.blocks[block.pk] = block
+
+        for term in Term.objects.all().order_by("pk"):
+            term.block = state.blocks[term.block_id]
+            state._add_term(term)
+
+        if not reset_enrollment:
+            for entry in TermCourses.objects.all().order_by("pk"):
+                course = state.sections.get((entry.course_code, entry.section))
+                if entry.term_id not in state.terms:
+                    continue
+                if course is None:
+                    state.stale_rows.add((entry.term_id, entry.course_code))
+                    continue
+                state.assignments[entry.term_id].setdefault(
+                    entry.course_code, []
+                ).append(course)
+                state.term_masks[entry.term_id] |= group_mask([course])
+
+        state._loaded_enrolled = {pk: c.enrolled for pk, c in state.courses.items()}
+        return state
+
+    def _add_term(self, term):
+        self.terms[term.pk] = term
+        self.assignments.setdefault(term.pk, {})
+        self.term_masks.setdefault(term.pk, 0)
+        key = (term.block.program_id, term.term_name)
+        self.terms_by_program.setdefault(key, []).append(term)
+
+    def use_trial_blocks(self, enrollment, block_sizes, default_size):
+        """
+        Replaces the loaded blocks and terms with unsaved ones built the way
+        ScheduleBuilder.build_blocks would for the given sizes, so a block size
+        can be tried without touching the database. Assignments start empty and
+        the state can no longer be flushed.
+        enrollment: {program id: enrolled}; block_sizes: {program id: size}.
+        """
+        self.blocks = {}
+        self.terms = {}
+        self.terms_by_program = {}
+        self.assignments = {}
+        self.term_masks = {}
+        self.stale_rows = set()
+        self.synthetic = True
+
+        # Negative pks cannot collide with saved rows
+        for program_id, enrolled in sorted(enrollment.items()):
+            if not enrolled or enrolled <= 0:
+                continue
+            size = block_sizes.get(program_id, default_size)
+            num_blocks = -(-enrolled // size)
+            for i in range(num_blocks):
+                block = Block(
+                    pk=-(len(self.blocks) + 1), program_id=program_id,
+                    block_name=f"Block {chr(ord('A') + i)}", ranking=0,
+                    size=enrolled - i * size if i == num_blocks - 1 else size,
+                )
+                self.blocks[block.pk] = block
+                for term_name in ("fall", "winter"):
+                    term = Term(pk=-(len(self.terms) + 1), term_name=term_name)
+                    term.block = block
+                    self._add_term(term)
+
+    def restrict_to_programs(self, program_ids):
+        """
+        Only terms of these programs are scheduled. Every other term keeps its
+        placements, and their seats stay counted as fixed load.
+        """
+        self.program_ids = set(program_ids)
+
+    def in_scope(self, program_id):
+        return self.program_ids is None or program_id in self.program_ids
+
+    def scoped_terms(self):
+        return [t for t in self.terms.values() if self.in_scope(t.block.program_id)]
+
+    # --- Queries ---
+
+    def required_codes(self):
+        """
+        Returns {course_code: program_count} for all non-elective requirements.
+        """
+        counts = {}
+        for code, reqs in self.requirements.items():
+            programs = {program_id for program_id, _ in reqs if self.in_scope(program_id)}
+            if programs:
+                counts[code] = len(programs)
+        return counts
+
+    def terms_needing(self, course_code):
+        targets = []
+        for program_id, term_name in self.requirements.get(course_code, []):
+            if not self.in_scope(program_id):
+                continue
+            targets.extend(self.terms_by_program.get((program_id, term_name), []))
+        return targets
+
+    def groups_for_term(self, term):
+        return [list(group) for group in self.assignments[term.pk].values()]
+
+    def term_mask(self, term):
+        return self.term_masks[term.pk]
+
+    def has_course(self, term, course_code):
+        return course_code in self.assignments[term.pk]
+
+    def missing_for_term(self, term):
+        required = self.program_requirements.get(
+            (term.block.program_id, term.term_name), set()
+        )
+        return required - set(self.assignments[term.pk])
+
+    def count_missing(self):
+        return sum(len(self.missing_for_term(term)) for term in self.scoped_terms())
+
+    def invalid_assignments(self, course_codes=None, term_ids=None, with_reasons=False):
+        """
+        Returns the (term, course_code) placements that are no longer legal after a
+        catalogue change, in the order they should be released:
+          1. the group is no longer a bundle of the course for that term
+             (section deleted, re-parented or moved to another term),
+          2. the group conflicts with an earlier group in the same term,
+          3. the group overfills a section (latest terms give up their seats first).
+        Enrollment must be consistent with the assignments (see recount_enrollment).
+        course_codes limits checks 1 and 3 to the given courses; term_ids limits
+        every check to placements in those terms (the others are kept as fixed).
+        With with_reasons=True, (term, course_code, reason) triples are returned,
+        reason being "bundle", "conflict" or "capacity".
+        """
+        invalid = []
+        invalid_keys = set()
+        valid_bundles = {}
+
+        def mark(term, code, reason):
+            if term_ids is not None and term.pk not in term_ids:
+                return False
+            if (term.pk, code) not in invalid_keys:
+                invalid_keys.add((term.pk, code))
+                invalid.append((term, code, reason) if with_reasons else (term, code))
+            return True
+
+        for term_id, code in sorted(self.stale_rows):
+            if course_codes is None or code in course_codes:
+                mark(self.terms[term_id], code, "bundle")
+
+        for term in self.terms.values():
+            occupied = 0
+            for code, group in self.assignments[term.pk].items():
+                checked = course_codes is None or code in course_codes
+                if checked:
+                    key = (code, term.term_name)
+                    if key not in valid_bundles:
+                        valid_bundles[key] = {
+                            frozenset(c.pk for c in bundle)
+                            for bundle in self.catalogue.bundles(code, term.term_name)
+                        }
+                    if frozenset(c.pk for c in group) not in valid_bundles[key] and mark(term, code, "bundle"):
+                        continue
+
+                mask = group_mask(group)
+                if mask & occupied and mark(term, code, "conflict"):
+                    continue
+                occupied |= mask
+
+        # Seats still held by placements that survive checks 1 and 2
+        load = {}
+        holders = {}
+        for term in self.terms.values():
+            for code, group in self.assignments[term.pk].items():
+                if (term.pk, code) in invalid_keys:
+                    continue
+                for course in group:
+                    load[course.pk] = load.get(course.pk, 0) + (term.block.size or 0)
+                    holders.setdefault(course.pk, []).append((term, code))
+
+        for pk, seats in load.items():
+            course = self.courses[pk]
+            if course.capacity is None or seats <= course.capacity:
+                continue
+            if course_codes is not None and course.course_code not in course_codes:
+                continue
+            for term, code in sorted(holders[pk], key=lambda h: h[0].pk, reverse=True):
+                if seats <= course.capacity:
+                    break
+                if (term.pk, code) not in invalid_keys and mark(term, code, "capacity"):
+                    seats -= term.block.size or 0
+
+        return invalid
+
+    # --- Mutations ---
+
+    def recount_enrollment(self):
+        """
+        Recompute Course.enrolled from the assignments (one block size per placement).
+        """
+        for course in self.courses.values():
+            course.enrolled = 0
+        for term_id, groups in self.assignments.items():
+            block_size = self.terms[term_id].block.size or 0
+            for group in groups.values():
+                for course in group:
+                    course.enrolled += block_size
+
+    def commit(self, term, bundle, block_size):
+        course_code = bundle[0].course_code
+        if course_code in self.assignments[term.pk]:
+            raise ValueError(f"{course_code} is already placed in term {term.pk}")
+
+        group = self.assignments[term.pk][course_code] = []
+        for course_part in bundle:
+            group.append(course_part)
+            course_part.enrolled += block_size
+        self.term_masks[term.pk] |= group_mask(bundle)
+        self.dirty_terms.add(term.pk)
+
+        if self._open_checkpoints:
+            self.trail.append(("commit", term, course_code, list(bundle), block_size))
+
+    def release(self, term, course_code, block_size):
+        group = self.assignments[term.pk].pop(course_code, [])
+        self.dirty_terms.add(term.pk)
+        for course_part in group:
+            course_part.enrolled -= block_size
+
+        self._recompute_mask(term)
+
+        if self._open_checkpoints and group:
+            self.trail.append(("release", term, course_code, group, block_size))
+        return group
+
+    def _uncommit(self, term, course_code, parts, block_size):
+        """
+        Inverse of commit(): takes exactly the committed parts back out of the group.
+        """
+        group = self.assignments[term.pk].get(course_code, [])
+        for course_part in parts:
+            group.remove(course_part)
+            course_part.enrolled -= block_size
+        if not group:
+            self.assignments[term.pk].pop(course_code, None)
+        self.dirty_terms.add(term.pk)
+        self._recompute_mask(term)
+
+    def _recompute_mask(self, term):
+        mask = 0
+        for remaining in self.assignments[term.pk].values():
+            mask |= group_mask(remaining)
+        self.term_masks[term.pk] = mask
+
+    # --- Undo log ---
+
+    def checkpoint(self):
+        """
+        Start recording commits/releases so they can be undone.
+        Returns a mark for rollback() or accept(). Checkpoints nest.
+        """
+        self._open_checkpoints += 1
+        return len(self.trail)
+
+    def rollback(self, mark):
+        """
+        Undo every commit/release made since the checkpoint, newest first.
+        """
+        while len(self.trail) > mark:
+            op, term, code, group, block_size = self.trail.pop()
+            if op == "commit":
+                self._uncommit(term, code, group, block_size)
+            else:
+                self.commit(term, group, block_size)
+                # The re-commit above was recorded too; drop it
+                self.trail.pop()
+        self._close_checkpoint()
+
+    def accept(self, mark):
+        """
+        Keep the changes made since the checkpoint.
+        """
+        self._close_checkpoint()
+
+    def _close_checkpoint(self):
+        self._open_checkpoints -= 1
+        if self._open_checkpoints == 0:
+            self.trail = []
+
+    def export_assignments(self):
+        """
+        Compact encoding of the current schedule: {term pk: [[course pk, ...], ...]}.
+        Only terms in scope are included.
+        """
+        return {
+            term.pk: [[course.pk for course in group] for group in self.assignments[term.pk].values()]
+            for term in self.scoped_terms()
+        }
+
+    def apply_assignments(self, encoded):
+        """
+        Replace the assignments of the encoded terms, keeping enrollment consistent.
+        """
+        for term_id, groups in encoded.items():
+            term = self.terms.get(term_id)
+            if term is None:
+                continue
+            block_size = term.block.size or 0
+            for code in list(self.assignments[term_id]):
+                self.release(term, code, block_size)
+            for group in groups:
+                bundle = [self.courses[pk] for pk in group if pk in self.courses]
+                if bundle:
+                    self.commit(term, bundle, block_size)
+
+    def clear_assignments(self):
+        """
+        Release every placement in scope, returning the snapshot to its loaded enrollment.
+        """
+        self.apply_assignments({term.pk: [] for term in self.scoped_terms()})
+
+    def flush(self, dirty_only=False):
+        """
+        Replace the TermCourses rows of every term in the snapshot and write
+        back Course.enrolled, all in one transaction.
+        With dirty_only=True, only terms changed since load and sections whose
+        enrollment changed are written; every other row is left untouched.
+        """
+        if self.synthetic:
+            raise RuntimeError("A state with trial blocks cannot be written to the database")
+
+        term_ids = self.dirty_terms if dirty_only else {t.pk for t in self.scoped_terms()}
+        rows = [
+            TermCourses(term_id=term_id, course_code=course.course_code, section=course.section)
+            for term_id in sorted(term_ids)
+            for group in self.assignments[term_id].values()
+            for course in group
+        ]
+        courses = [
+            c for pk, c in self.courses.items()
+            if not dirty_only or c.enrolled != self._loaded_enrolled.get(pk)
+        ]
+
+        with transaction.atomic():
+            TermCourses.objects.filter(term_id__in=list(term_ids)).delete()
+            TermCourses.objects.bulk_create(rows, batch_size=500)
+            Course.objects.bulk_update(courses, ["enrolled"], batch_size=500)
+
+        self.dirty_terms = set()
+        self._loaded_enrolled = {pk: c.enrolled for pk, c in self.courses.items()}
@@ -1,4 +1,4 @@
-from .utils import expand_course, slots_conflict
+from .utils import expand_course, group_mask, masks_conflict, slots_conflict
 
 # Returns True if there is a conflict between two courses
 def course_conflict(course_a, course_b) -> bool:
@@ -28,3 +28,19 @@ def group_conflicts_with_term(course_group, term_courses):
 # Returns True if the course group can be added to the term without conflicts
 def can_add_group_to_term(course_group, term_courses):
     return not group_conflicts_with_term(course_group, term_courses)
+
+# --- Bitmask API (same answers as the functions above, one AND per check) ---
+
+# Returns the running OR of every group already placed in the term
+def term_mask(term_courses) -> int:
+    """
+    term_courses: list[list[Course]]
+    """
+    mask = 0
+    for existing_group in term_courses:
+        mask |= group_mask(existing_group)
+    return mask
+
+# Returns True if the course group fits into a term with the given occupancy mask
+def can_add_group_to_mask(course_group, occupied_mask) -> bool:
+    return not masks_conflict(group_mask(course_group), occupied_mask)
@@ -1,3 +1,8 @@
+from functools import lru_cache
+
+# Bitmask occupancy encoding: one bit per minute, one 1440-bit lane per weekday.
+DAY_ORDER = "MTWRFSU"
+MINUTES_PER_DAY = 24 * 60
 
 def parse_time(t: str) -> int:
     """"
@@ -75,4 +80,56 @@ def check_course_capacities():
     print("-" * 65)
     
     for course in exceeding_courses:
-        print(f"{course.course_code:<15} | {course.section:<8} | {course.term:<10} | {course.enrolled:<10} | {course.capacity:<10}")
\ No newline at end of file
+        print(f"{course.course_code:<15} | {course.section:<8} | {course.term:<10} | {course.enrolled:<10} | {course.capacity:<10}")
+
+def _day_index(d: str) -> int:
+    """
+    Lane index for a day character. Unknown characters get their own lane,
+    matching slots_conflict, which treats every character as a separate day.
+    """
+    i = DAY_ORDER.find(d)
+    return i if i >= 0 else len(DAY_ORDER) + ord(d)
+
+@lru_cache(maxsize=None)
+def slot_mask(days, start_time, end_time) -> int:
+    """
+    Encode a meeting pattern as an integer bitmask.
+    Bit (day_lane * 1440 + minute) is set for every minute in [start, end).
+    For non-empty intervals, two masks overlap exactly when slots_conflict
+    would report a conflict.
+    """
+    if not days or not start_time or not end_time:
+        return 0
+
+    start = parse_time(start_time)
+    end = parse_time(end_time)
+    if end <= start:
+        return 0
+
+    minutes = ((1 << (end - start)) - 1) << start
+    mask = 0
+    for d in parse_days(days):
+        mask |= minutes << (_day_index(d) * MINUTES_PER_DAY)
+
+    return mask
+
+def course_mask(course) -> int:
+    """
+    Bitmask equivalent of expand_course. Results are cached per time pattern.
+    """
+    return slot_mask(course.days, course.start_time, course.end_time)
+
+def group_mask(course_group) -> int:
+    """
+    Union of the masks of every course in a group (e.g. LEC + LAB + TUT).
+    """
+    mask = 0
+    for course in course_group:
+        mask |= course_mask(course)
+    return mask
+
+def masks_conflict(mask_a: int, mask_b: int) -> bool:
+    """
+    Returns True if two occupancy masks share any minute.
+    """
+    return (mask_a & mask_b) != 0
@@ -0,0 +1,180 @@
+"""
+NumPy scoring engine for ScheduleRanker.
+
+Scores many terms at once. Every term's classes are laid out in
+(terms x 5 days x K slots) arrays of start and end minutes, K being the
+busiest day of any term, with each day's slots sorted by start time the
+same (stable) way ScheduleRanker._score_courses sorts its daily grid. All
+rules are then computed for every term with array operations.
+
+The rule formulas and the order of the weighted sum follow ScheduleRanker
+operation for operation, so the scores are identical to the Python rules.
+Lab spread depends on instruction types rather than the time grid and is
+still computed per term with ScheduleRanker._lab_spread_score.
+
+NumPy is optional: HAS_NUMPY is False when it is not installed, and
+ScheduleRanker then keeps using its Python rules.
+"""
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+HAS_NUMPY = np is not None
+
+_EMPTY = 10 ** 6  # start minute of an unused slot; sorts after every class
+
+
+def _encode(ranker, course_lists):
+    """
+    Returns (starts, ends, lab_spread): sorted (T, 5, K) start/end arrays
+    and the per-term lab spread scores.
+    """
+    entries = []     # (term, day, slot, start, end)
+    used = {}        # (term, day) -> slots used
+    lab_spread = []
+    for t, courses in enumerate(course_lists):
+        timed = [c for c in courses if c.days and c.start_time and c.end_time]
+        for c in timed:
+            start = ranker._parse_time(c.start_time)
+            end = ranker._parse_time(c.end_time)
+            for d in ranker._parse_days(c.days):
+                k = used.get((t, d), 0)
+                used[(t, d)] = k + 1
+                entries.append((t, d, k, start, end))
+        lab_spread.append(ranker._lab_spread_score(timed))
+
+    width = max(used.values(), default=1)
+    starts = np.full((len(course_lists), 5, width), _EMPTY, dtype=np.int64)
+    ends = np.zeros((len(course_lists), 5, width), dtype=np.int64)
+    if entries:
+        t, d, k, s, e = (np.array(column) for column in zip(*entries))
+        starts[t, d, k] = s
+        ends[t, d, k] = e
+
+    order = np.argsort(starts, axis=2, kind="stable")
+    return (
+        np.take_along_axis(starts, order, axis=2),
+        np.take_along_axis(ends, order, axis=2),
+        np.array(lab_spread, dtype=np.float64),
+    )
+
+
+def _evaluate(ranker, course_lists):
+    """
+    Returns ({rule: float array}, details): every rule's score for each term
+    in course_lists, plus the arrays the report notes are written from.
+    """
+    starts, ends, lab_spread = _encode(ranker, course_lists)
+    valid = starts != _EMPTY
+    counts = valid.sum(axis=2)                       # (T, 5) classes per day
+    active = counts > 0
+    days_used = active.sum(axis=1)
+
+    first_start = starts[:, :, 0]
+    last_end = np.take_along_axis(ends, np.maximum(counts - 1, 0)[:, :, None], axis=2)[:, :, 0]
+
+    # Compactness: gaps between consecutive classes of a day (overlaps count as 0)
+    gaps = np.maximum(starts[:, :, 1:] - ends[:, :, :-1], 0) * valid[:, :, 1:]
+    total_gap = gaps.sum(axis=(1, 2))
+
+    # Days used (ideal 4, max 5, as in _days_used_score)
+    days_used_score = np.where(
+        days_used <= 4, 1.0, np.where(days_used >= 5, 0.0, 1 - ((days_used - 4) / (5 - 4)))
+    )
+
+    # Day balance
+    singletons = (counts == 1).sum(axis=1)
+    day_balance = np.where(days_used == 0, 1.0, 1 - (singletons / np.maximum(days_used, 1)))
+
+    # End / start time preference (defaults of _end_time_score / _start_time_score)
+    latest_end = np.where(active, last_end, 0).max(axis=1)
+    end_pref = np.where(
+        latest_end <= 1020, 1.0, np.where(latest_end >= 1290, 0.0, 1 - ((latest_end - 1020) / (1290 - 1020)))
+    )
+    earliest_start = np.where(active, first_start, 1440).min(axis=1)
+    start_pref = np.where(
+        earliest_start >= 540, 1.0, np.where(earliest_start <= 480, 0.0, (earliest_start - 480) / (540 - 480))
+    )
+
+    # Late-to-early: Mon->Tue .. Thu->Fri, both days active
+    rest = (1440 - last_end[:, :4]) + first_start[:, 1:]
+    short = active[:, :4] & active[:, 1:] & (rest < 12 * 60)
+    points = np.where(short, ((12 * 60 - rest) // 30) * ranker.SLEEP_DEFICIT_PENALTY, 0)
+    late_to_early = np.maximum(0.0, 1 - (points.sum(axis=1) / ranker.LATE_EARLY_MAX_PENALTY))
+
+    scores = {
+        "compactness": 1 - np.minimum(total_gap / ranker.GAP_CAP, 1),
+        "days_used": days_used_score,
+        "day_balance": day_balance,
+        "end_time_preference": end_pref,
+        "start_time_preference": start_pref,
+        "late_to_early": late_to_early,
+        "lab_spread": lab_spread,
+    }
+    details = {"total_gap": total_gap, "days_used": days_used, "rest": rest, "points": points}
+    return scores, details
+
+
+def rule_scores(ranker, course_lists):
+    """
+    {rule: float array} with every rule's score for each term in course_lists.
+    """
+    return _evaluate(ranker, course_lists)[0]
+
+
+def _weighted(ranker, scores, num_terms):
+    weighted_sum = np.zeros(num_terms)
+    weight_total = 0
+    for k, w in ranker.WEIGHTS.items():
+        weighted_sum = weighted_sum + w * scores.get(k, 1.0)
+        weight_total += w
+    if not weight_total:
+        return np.zeros(num_terms)
+    return 100 * (weighted_sum / weight_total)
+
+
+def weighted_scores(ranker, course_lists):
+    """
+    ScheduleRanker._weighted_score for every term (float array, not truncated).
+    """
+    return _weighted(ranker, rule_scores(ranker, course_lists), len(course_lists))
+
+
+def score_terms(ranker, course_lists):
+    """
+    Integer term scores, equal to ScheduleRanker._score_courses(courses)[0].
+    """
+    if not course_lists:
+        return []
+    return [int(score) for score in weighted_scores(ranker, course_lists)]
+
+
+def term_breakdowns(ranker, course_lists):
+    """
+    {"score", "rules", "notes"} for every term, equal to
+    ScheduleRanker._term_breakdown(courses).
+    """
+    if not course_lists:
+        return []
+    scores, details = _evaluate(ranker, course_lists)
+    weighted = _weighted(ranker, scores, len(course_lists))
+    day_names = ["Mon", "Tue", "Wed", "Thu", "Fri"]
+
+    breakdowns = []
+    for t in range(len(course_lists)):
+        notes = [
+            f"[compactness] Total gap minutes: {int(details['total_gap'][t])}",
+            f"[days_used] Days scheduled: {int(details['days_used'][t])}",
+        ]
+        for d in range(4):
+            if details["points"][t, d] > 0:
+                rest_hrs = round(int(details["rest"][t, d]) / 60, 1)
+                notes.append(f"[late-to-early] Only {rest_hrs} hrs rest {day_names[d]}->{day_names[d+1]} (Req: 12 hrs)")
+        breakdowns.append({
+            "score": int(weighted[t]),
+            "rules": {rule: float(values[t]) for rule, values in scores.items()},
+            "notes": notes,
+        })
+    return breakdowns
@@ -0,0 +1,57 @@
+from django.test import TestCase
+from data_app.models import Block, Program, Course, ProgramCourse, TermCourses
+from data_app.services.block_autotune import adopt_block_sizes, autotune_block_sizes
+from data_app.services.schedule_builder import ScheduleBuilder
+from data_app.services.schedule_state import ScheduleState
+
+
+class BlockAutotuneTests(TestCase):
+
+    def setUp(self):
+        self.prog = Program.objects.create(program_name="Engineering", enrolled=60)
+        ProgramCourse.objects.create(program=self.prog, course_code="MATH100", term="fall")
+
+        # Two 30-seat sections: 30-student blocks fit, a 40-student block never does
+        for section, start in (("A", "0900"), ("B", "1100")):
+            Course.objects.create(
+                course_code="MATH100", section=section, instr_type="LEC", days="MWF",
+                start_time=start, end_time=str(int(start) + 100).zfill(4), capacity=30
+            )
+
+    def test_picks_size_that_fits_the_seats(self):
+        report = autotune_block_sizes([30, 40], workers=1, seed=7)
+
+        by_size = {row["block_size"]: row for row in report["trials"]}
+        self.assertEqual(by_size[30]["blocks"], 2)
+        self.assertEqual(by_size[30]["missing"], 0)
+        self.assertEqual(by_size[30]["utilization"], 1.0)
+        self.assertEqual(by_size[40]["missing"], 1)
+        self.assertEqual(report["best_size"], 30)
+        self.assertEqual(report["best_by_program"], {})
+
+    def test_trials_write_nothing(self):
+        ScheduleBuilder().build_blocks()
+        blocks = list(Block.objects.values_list("pk", "size"))
+
+        autotune_block_sizes([20, 30], workers=1, seed=1)
+
+        self.assertEqual(list(Block.objects.values_list("pk", "size")), blocks)
+        self.assertFalse(TermCourses.objects.exists())
+        self.assertEqual(Course.objects.filter(enrolled__gt=0).count(), 0)
+
+    def test_per_program_choice_and_adoption(self):
+        report = autotune_block_sizes([30, 40], per_program=True, workers=2, seed=3)
+        self.assertEqual(report["best_by_program"], {self.prog.pk: 30})
+
+        builder = adopt_block_sizes(ScheduleBuilder(), report)
+        builder.build_blocks()
+
+        self.assertEqual(sorted(Block.objects.values_list("size", flat=True)), [30, 30])
+
+    def test_trial_state_cannot_be_flushed(self):
+        state = ScheduleState.load(reset_enrollment=True)
+        state.use_trial_blocks({self.prog.pk: 60}, {}, 25)
+
+        self.assertEqual(sorted(b.size for b in state.blocks.values()), [10, 25, 25])
+        with self.assertRaises(RuntimeError):
+            state.flush()
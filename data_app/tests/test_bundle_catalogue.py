@@ -0,0 +1,106 @@
+from django.test import TestCase
+from data_app.models import Course
+from data_app.services import bundle_catalogue
+from data_app.services.bundle_catalogue import BundleCatalogue, get_bundle_catalogue, invalidate_bundle_catalogue
+from data_app.services.schedule_builder import ScheduleBuilder
+
+class BundleCatalogueTests(TestCase):
+
+    def setUp(self):
+        invalidate_bundle_catalogue()
+        self.lec = Course.objects.create(course_code="SYSC2006", section="A", instr_type="LEC")
+        Course.objects.create(course_code="SYSC2006", section="A1", instr_type="LAB", parent=self.lec)
+        Course.objects.create(course_code="SYSC2006", section="A2", instr_type="LAB", parent=self.lec)
+        Course.objects.create(course_code="SYSC2006", section="T1", instr_type="TUT", parent=self.lec)
+        Course.objects.create(course_code="MATH1001", section="A", instr_type="LEC")
+
+    def test_matches_get_course_bundles(self):
+        """The catalogue should hold the same combinations as the query-based lookup."""
+        catalogue = BundleCatalogue.build()
+        builder = ScheduleBuilder()
+
+        for code in ("SYSC2006", "MATH1001", "NOPE"):
+            expected = [[c.pk for c in b] for b in builder.get_course_bundles(code)]
+            actual = [[c.pk for c in b] for b in catalogue.bundles(code)]
+            self.assertEqual(actual, expected)
+            self.assertEqual(catalogue.flexibility(code), len(expected))
+
+    def test_cached_until_course_table_changes(self):
+        """The cached catalogue is reused until a Course row is saved."""
+        get_bundle_catalogue()
+        first = bundle_catalogue._catalogue
+        get_bundle_catalogue()
+        self.assertIs(bundle_catalogue._catalogue, first)
+
+        Course.objects.create(course_code="SYSC2006", section="A3", instr_type="LAB", parent=self.lec)
+
+        second = get_bundle_catalogue()
+        self.assertIsNot(bundle_catalogue._catalogue, first)
+        self.assertEqual(second.flexibility("SYSC2006"), 3)
+
+    def test_each_caller_gets_its_own_courses(self):
+        """A run's seat counters are not reset by another caller loading the catalogue."""
+        running = get_bundle_catalogue(reset_enrollment=True)
+        running.courses[self.lec.pk].enrolled = 30
+
+        other = get_bundle_catalogue()
+
+        self.assertEqual(running.courses[self.lec.pk].enrolled, 30)
+        self.assertEqual(other.courses[self.lec.pk].enrolled, 0)
+        self.assertIsNot(other.courses[self.lec.pk], running.courses[self.lec.pk])
+        # Bundles point at the copy's own Course objects
+        for bundle in running.bundles("SYSC2006") + [b for c in running.bundle_classes("SYSC2006") for b in c]:
+            for course in bundle:
+                self.assertIs(course, running.courses[course.pk])
+
+    def test_refresh_enrollment_from_database(self):
+        catalogue = get_bundle_catalogue()
+        Course.objects.filter(pk=self.lec.pk).update(enrolled=25)
+
+        catalogue = get_bundle_catalogue()
+        self.assertEqual(catalogue.courses[self.lec.pk].enrolled, 25)
+        self.assertEqual(get_bundle_catalogue(reset_enrollment=True).courses[self.lec.pk].enrolled, 0)
+
+    def test_term_partitioned_lookup(self):
+        """Sections tagged with a term are only offered to Terms with that name."""
+        Course.objects.create(course_code="ECOR1041", section="A", instr_type="LEC", term="fall")
+        Course.objects.create(course_code="ECOR1041", section="B", instr_type="LEC", term="winter")
+        catalogue = BundleCatalogue.build()
+
+        fall = catalogue.bundles("ECOR1041", "fall")
+        self.assertEqual([b[0].section for b in fall], ["A"])
+        self.assertEqual(catalogue.flexibility("ECOR1041", "winter"), 1)
+        self.assertEqual(catalogue.flexibility("ECOR1041"), 2)
+
+        # Sections without a term stay available everywhere
+        self.assertEqual(catalogue.flexibility("MATH1001", "winter"), 1)
+
+    def test_bundles_grouped_by_time_signature(self):
+        """Lab sections at the same time collapse into one class; seats come from any member."""
+        lec = Course.objects.create(
+            course_code="PHYS1007", section="A", instr_type="LEC",
+            days="MW", start_time="0900", end_time="1000", capacity=60
+        )
+        for section in ("L1", "L2", "L3"):
+            Course.objects.create(
+                course_code="PHYS1007", section=section, instr_type="LAB", parent=lec,
+                days="F", start_time="1300", end_time="1500", capacity=20
+            )
+        Course.objects.create(
+            course_code="PHYS1007", section="L4", instr_type="LAB", parent=lec,
+            days="R", start_time="1300", end_time="1500", capacity=20
+        )
+        catalogue = BundleCatalogue.build()
+
+        classes = catalogue.bundle_classes("PHYS1007")
+        self.assertEqual(sorted(len(c) for c in classes), [1, 3])
+
+        # Fill L1 and L2: the Friday class still has seats in L3
+        Course.objects.filter(section__in=["L1", "L2"]).update(enrolled=20)
+        builder = ScheduleBuilder()
+        friday = next(c for c in classes if len(c) == 3)
+        for bundle in friday:
+            for course in bundle:
+                course.refresh_from_db()
+        self.assertEqual(builder._pick_bundle(friday, 20)[1].section, "L3")
+        self.assertIsNone(builder._pick_bundle([b for b in friday if b[1].section != "L3"], 20))
@@ -0,0 +1,134 @@
+from django.test import TestCase
+from data_app.models import Program, Course, ProgramCourse, TermCourses
+from data_app.services.csp_solver import CSPSolver
+from data_app.services.schedule_builder import ScheduleBuilder
+from data_app.services.schedule_state import ScheduleState
+
+
+class CSPSolverTests(TestCase):
+
+    def setUp(self):
+        self.builder = ScheduleBuilder()
+        self.prog = Program.objects.create(program_name="Engineering", enrolled=40)
+        for code in ("MATH100", "PHYS100", "CHEM100"):
+            ProgramCourse.objects.create(program=self.prog, course_code=code, term="fall")
+
+        # Only one assignment works for every block:
+        # CHEM100 must take 0900, so MATH100 takes 1100 and PHYS100 takes 1300.
+        self._section("CHEM100", "A", "0900")
+        self._section("MATH100", "A", "0900")
+        self._section("MATH100", "B", "1100")
+        self._section("PHYS100", "A", "1100")
+        self._section("PHYS100", "B", "1300")
+
+    def _section(self, code, section, start, capacity=100):
+        return Course.objects.create(
+            course_code=code, section=section, instr_type="LEC", days="MWF",
+            start_time=start, end_time=str(int(start) + 100).zfill(4), capacity=capacity
+        )
+
+    def _load(self):
+        self.builder.build_blocks()
+        return ScheduleState.load(reset_enrollment=True)
+
+    def test_finds_complete_schedule(self):
+        state = self._load()
+
+        result = CSPSolver(state).solve()
+
+        self.assertEqual(result['variables'], 6)
+        self.assertEqual(result['unplaced'], 0)
+        self.assertEqual(state.count_missing(), 0)
+        for term in state.terms.values():
+            if term.term_name == "fall":
+                self.assertEqual(state.assignments[term.pk]["MATH100"][0].section, "B")
+                self.assertEqual(state.assignments[term.pk]["PHYS100"][0].section, "B")
+
+    def test_capacity_propagation_leaves_best_partial_schedule(self):
+        """CHEM100 has seats for one block only; the other block is left without it."""
+        Course.objects.filter(course_code="CHEM100").update(capacity=20)
+        state = self._load()
+
+        result = CSPSolver(state).solve()
+
+        self.assertEqual(result['unplaced'], 1)
+        self.assertEqual(state.count_missing(), 1)
+        chem = state.sections[("CHEM100", "A")]
+        self.assertEqual(chem.enrolled, 20)
+        self.assertEqual(state.trail, [])
+
+    def test_node_limit_stops_search(self):
+        state = self._load()
+
+        result = CSPSolver(state, node_limit=2).solve()
+
+        self.assertEqual(result['stopped'], "node_limit")
+        self.assertEqual(result['nodes'], 2)
+        # The partial schedule reached is kept and stays consistent
+        self.assertEqual(state.count_missing(), 6 - 2)
+
+    def test_incumbent_is_kept_when_search_cannot_beat_it(self):
+        state = self._load()
+        term = next(t for t in state.terms.values() if t.term_name == "fall")
+        state.commit(term, [state.sections[("CHEM100", "A")]], term.block.size)
+        state.commit(term, [state.sections[("MATH100", "B")]], term.block.size)
+        incumbent = state.export_assignments()
+        state.clear_assignments()
+
+        result = CSPSolver(state, node_limit=0, incumbent=incumbent).solve()
+
+        self.assertEqual(result['unplaced'], 4)
+        self.assertEqual(state.export_assignments(), incumbent)
+
+    def test_generate_schedule_with_csp_engine(self):
+        stats = self.builder.generate_schedule(engine="csp")
+
+        self.assertIn("csp", stats.phases)
+        self.assertEqual(TermCourses.objects.filter(course_code="PHYS100", section="B").count(), 2)
+        self.assertEqual(Course.objects.get(course_code="CHEM100").enrolled, 40)
+
+    def test_unknown_engine_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.builder.generate_schedule(engine="magic")
+
+
+class CSPBeatsGreedyTests(TestCase):
+    """
+    Both programs need MATH100, whose two sections only seat one block each.
+    Physics also needs PHYS100 (0900 only), Chemistry CHEM100 (1100 only).
+    Once the greedy pass gives Physics the 0900 MATH100, repair cannot help:
+    kicking MATH100 out of Physics does not free the 1100 seats Chemistry holds.
+    """
+
+    def setUp(self):
+        self.builder = ScheduleBuilder()
+        physics = Program.objects.create(program_name="Physics", enrolled=20)
+        chemistry = Program.objects.create(program_name="Chemistry", enrolled=20)
+        for program, code in ((physics, "PHYS100"), (chemistry, "CHEM100")):
+            ProgramCourse.objects.create(program=program, course_code="MATH100", term="fall")
+            ProgramCourse.objects.create(program=program, course_code=code, term="fall")
+
+        for code, section, start in (
+            ("MATH100", "A", "0900"), ("MATH100", "B", "1100"),
+            ("PHYS100", "A", "0900"), ("CHEM100", "A", "1100"),
+        ):
+            Course.objects.create(
+                course_code=code, section=section, instr_type="LEC", days="MWF",
+                start_time=start, end_time=str(int(start) + 100).zfill(4), capacity=20
+            )
+
+    def test_csp_places_courses_greedy_and_repair_miss(self):
+        for seed in range(20):
+            self.builder.rng.seed(seed)
+            stats = self.builder.generate_schedule(engine="greedy", in_memory=True)
+            if stats.failed_placements:
+                break
+        self.assertGreater(stats.failed_placements, 0)
+        self.assertLess(TermCourses.objects.count(), 4)
+
+        self.builder.rng.seed(seed)
+        stats = self.builder.generate_schedule(engine="csp")
+
+        self.assertEqual(stats.failed_placements, 0)
+        self.assertEqual(TermCourses.objects.count(), 4)
+        self.assertEqual(TermCourses.objects.get(course_code="MATH100", term__block__program__program_name="Physics").section, "B")
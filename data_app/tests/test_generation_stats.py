@@ -0,0 +1,47 @@
+import json
+from unittest.mock import patch
+from django.test import TestCase
+from django.urls import reverse
+from data_app.models import Program, Course, ProgramCourse, LogEntry
+from data_app.services.schedule_builder import ScheduleBuilder
+
+class GenerationStatsTests(TestCase):
+
+    def setUp(self):
+        self.prog = Program.objects.create(program_name="Engineering", enrolled=20)
+        ProgramCourse.objects.create(program=self.prog, course_code="MATH100", term="fall")
+        ProgramCourse.objects.create(program=self.prog, course_code="PHYS100", term="fall")
+
+        # Both only fit at the same time -> one greedy failure and a repair attempt
+        Course.objects.create(
+            course_code="MATH100", section="A", instr_type="LEC",
+            days="MWF", start_time="0900", end_time="1000", capacity=100
+        )
+        Course.objects.create(
+            course_code="PHYS100", section="A", instr_type="LEC",
+            days="MWF", start_time="0930", end_time="1030", capacity=100
+        )
+
+    def test_phases_and_counters(self):
+        stats = ScheduleBuilder().generate_schedule(in_memory=True).to_dict()
+
+        for phase in ("total", "build_blocks", "preflight", "find_shared_courses", "schedule_courses", "flush"):
+            self.assertIn(phase, stats["phases"])
+        self.assertEqual(set(stats["course_times"]), {"MATH100", "PHYS100"})
+        self.assertGreaterEqual(stats["counters"]["greedy_attempts"], 2)
+        self.assertGreater(stats["counters"]["force_attempts"], 0)
+        self.assertGreater(stats["counters"]["kicks"], 0)
+        self.assertGreater(stats["max_depth"], 0)
+        self.assertGreaterEqual(stats["counters"]["failed_placements"], 1)
+        self.assertGreater(stats["counters"]["conflict_checks"], 0)
+        self.assertGreater(stats["counters"]["db_queries"], 0)
+
+    @patch.object(ScheduleBuilder, "export_visual_grid")
+    @patch.object(ScheduleBuilder, "export_schedule_to_txt")
+    def test_api_returns_and_logs_stats(self, mock_export_txt, mock_export_grid):
+        response = self.client.post(reverse("api_generate_schedule"), json.dumps({}), content_type="application/json")
+
+        stats = response.json()["stats"]
+        self.assertIn("schedule_courses", stats["phases"])
+        entry = LogEntry.objects.get(action="Schedule Generation Completed")
+        self.assertEqual(entry.metrics["counters"], stats["counters"])
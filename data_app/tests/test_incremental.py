@@ -0,0 +1,72 @@
+from django.test import TestCase
+from data_app.models import Program, Course, ProgramCourse, TermCourses
+from data_app.services.schedule_builder import ScheduleBuilder
+
+class IncrementalRescheduleTests(TestCase):
+
+    def setUp(self):
+        self.builder = ScheduleBuilder()
+        self.eng = Program.objects.create(program_name="Engineering", enrolled=20)
+        self.sci = Program.objects.create(program_name="Science", enrolled=20)
+
+        ProgramCourse.objects.create(program=self.eng, course_code="MATH100", term="fall")
+        ProgramCourse.objects.create(program=self.eng, course_code="PHYS100", term="fall")
+        ProgramCourse.objects.create(program=self.sci, course_code="CHEM100", term="fall")
+
+        self.math_a = Course.objects.create(
+            course_code="MATH100", section="A", instr_type="LEC",
+            days="MWF", start_time="0900", end_time="1000", capacity=100
+        )
+        self.math_b = Course.objects.create(
+            course_code="MATH100", section="B", instr_type="LEC",
+            days="MWF", start_time="1300", end_time="1400", capacity=100
+        )
+        self.phys = Course.objects.create(
+            course_code="PHYS100", section="A", instr_type="LEC",
+            days="TR", start_time="0900", end_time="1030", capacity=100
+        )
+        self.chem = Course.objects.create(
+            course_code="CHEM100", section="A", instr_type="LEC",
+            days="MWF", start_time="0900", end_time="1000", capacity=100
+        )
+        self.builder.generate_schedule(in_memory=True)
+
+    def test_nothing_to_do(self):
+        before = list(TermCourses.objects.values_list("pk", flat=True))
+        self.assertEqual(self.builder.reschedule_incremental(), [])
+        self.assertEqual(list(TermCourses.objects.values_list("pk", flat=True)), before)
+
+    def test_time_change_moves_only_affected_course(self):
+        """A section moved onto another course's slot is re-placed; other programs are untouched."""
+        placed = TermCourses.objects.get(course_code="MATH100")
+        chem_row = TermCourses.objects.get(course_code="CHEM100")
+        moved = self.math_a if placed.section == "A" else self.math_b
+        moved.days, moved.start_time, moved.end_time = "TR", "0930", "1030"
+        moved.save()
+
+        released = self.builder.reschedule_incremental()
+
+        self.assertEqual([code for _, code in released], ["MATH100"])
+        self.assertNotEqual(TermCourses.objects.get(course_code="MATH100").section, moved.section)
+        self.assertTrue(TermCourses.objects.filter(pk=chem_row.pk).exists())
+        moved.refresh_from_db()
+        self.assertEqual(moved.enrolled, 0)
+
+    def test_deleted_section_is_replaced(self):
+        placed = TermCourses.objects.get(course_code="MATH100")
+        Course.objects.filter(course_code="MATH100", section=placed.section).delete()
+
+        self.builder.reschedule_incremental()
+
+        replacement = TermCourses.objects.get(course_code="MATH100")
+        self.assertNotEqual(replacement.section, placed.section)
+
+    def test_capacity_drop_releases_seats(self):
+        placed = TermCourses.objects.get(course_code="MATH100")
+        Course.objects.filter(course_code="MATH100", section=placed.section).update(capacity=10)
+
+        self.builder.reschedule_incremental(course_codes={"MATH100"})
+
+        replacement = TermCourses.objects.get(course_code="MATH100")
+        self.assertNotEqual(replacement.section, placed.section)
+        self.assertEqual(Course.objects.get(course_code="MATH100", section=replacement.section).enrolled, 20)
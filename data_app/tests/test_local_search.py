@@ -0,0 +1,96 @@
+import random
+
+from django.test import TestCase
+from data_app.models import Program, Course, ProgramCourse, TermCourses
+from data_app.services.local_search import LocalSearch, TermScore
+from data_app.services.ranking import ScheduleRanker
+from data_app.services.schedule_builder import ScheduleBuilder
+from data_app.services.schedule_state import ScheduleState
+
+
+class LocalSearchTests(TestCase):
+
+    def setUp(self):
+        self.builder = ScheduleBuilder()
+        self.prog = Program.objects.create(program_name="Engineering", enrolled=20)
+        ProgramCourse.objects.create(program=self.prog, course_code="MATH100", term="fall")
+        ProgramCourse.objects.create(program=self.prog, course_code="PHYS100", term="fall")
+
+        # MATH100: an early section and a late-morning one
+        self.math_early = Course.objects.create(
+            course_code="MATH100", section="A", instr_type="LEC",
+            days="MWF", start_time="0800", end_time="0900", capacity=100
+        )
+        self.math_late = Course.objects.create(
+            course_code="MATH100", section="B", instr_type="LEC",
+            days="MWF", start_time="1100", end_time="1200", capacity=100
+        )
+        # PHYS100 has a single section, at the same time as MATH100 B
+        self.phys = Course.objects.create(
+            course_code="PHYS100", section="A", instr_type="LEC",
+            days="MWF", start_time="1100", end_time="1200", capacity=100
+        )
+
+        self.builder.build_blocks()
+        self.state = ScheduleState.load(reset_enrollment=True)
+        self.term = next(t for t in self.state.terms.values() if t.term_name == "fall")
+
+    def test_term_score_matches_ranker(self):
+        ranker = ScheduleRanker()
+        random.seed(3)
+        for _ in range(50):
+            groups = {}
+            for i in range(random.randint(0, 6)):
+                start = random.randint(7, 20) * 100
+                groups[f"C{i}"] = [Course(
+                    pk=i, course_code=f"C{i}", section="A", instr_type=random.choice(["LEC", "LAB"]),
+                    days="".join(random.sample("MTWRF", random.randint(1, 3))),
+                    start_time=str(start).zfill(4), end_time=str(start + 120).zfill(4),
+                )]
+            courses = [c for group in groups.values() for c in group]
+
+            expected, _ = ranker._score_courses(courses)
+            self.assertEqual(int(TermScore(ranker, groups).score), expected)
+
+    def test_incremental_delta_matches_full_rescore(self):
+        ranker = ScheduleRanker()
+        self.state.commit(self.term, [self.math_early_instance()], 20)
+        scorer = TermScore(ranker, self.state.assignments[self.term.pk])
+
+        late = [self.state.courses[self.math_late.pk]]
+        score, change = scorer.evaluate("MATH100", late)
+        scorer.apply(change)
+
+        self.assertAlmostEqual(score, TermScore(ranker, {"MATH100": late}).score)
+
+    def test_swaps_to_a_better_bundle(self):
+        self.state.program_requirements[(self.prog.pk, "fall")] = {"MATH100"}
+        self.state.commit(self.term, [self.math_early_instance()], 20)
+
+        result = LocalSearch(self.state).run(max_iterations=20)
+
+        self.assertGreater(result['best_score'], result['start_score'])
+        self.assertEqual(self.state.assignments[self.term.pk]["MATH100"][0].section, "B")
+        self.assertEqual(self.state.courses[self.math_early.pk].enrolled, 0)
+        self.assertEqual(self.state.courses[self.math_late.pk].enrolled, 20)
+
+    def test_places_missing_course_after_swap(self):
+        self.state.commit(self.term, [self.state.courses[self.math_late.pk]], 20)
+        self.assertEqual(self.state.missing_for_term(self.term), {"PHYS100"})
+
+        result = LocalSearch(self.state).run(max_iterations=5)
+
+        self.assertEqual(result['placed'], 1)
+        self.assertEqual(self.state.missing_for_term(self.term), set())
+        self.assertEqual(self.state.assignments[self.term.pk]["MATH100"][0].section, "A")
+        self.assertEqual(self.state.trail, [])
+
+    def test_generate_schedule_with_improvement(self):
+        stats = self.builder.generate_schedule(improve=0.1)
+
+        self.assertIn("improve", stats.phases)
+        self.assertEqual(TermCourses.objects.filter(course_code="PHYS100").count(), 1)
+        self.assertEqual(TermCourses.objects.filter(course_code="MATH100", section="A").count(), 1)
+
+    def math_early_instance(self):
+        return self.state.courses[self.math_early.pk]
@@ -0,0 +1,186 @@
+from django.test import TestCase
+from data_app.models import Program, Course, ProgramCourse, TermCourses
+from data_app.services.schedule_builder import ScheduleBuilder
+from data_app.services.schedule_state import ScheduleState
+
+
+class PatternSchedulingTests(TestCase):
+
+    def setUp(self):
+        self.builder = ScheduleBuilder()
+        self.prog = Program.objects.create(program_name="Engineering", enrolled=60)
+        ProgramCourse.objects.create(program=self.prog, course_code="MATH100", term="fall")
+        ProgramCourse.objects.create(program=self.prog, course_code="PHYS100", term="fall")
+
+        self.math_a = Course.objects.create(
+            course_code="MATH100", section="A", instr_type="LEC",
+            days="MWF", start_time="0900", end_time="1000", capacity=100
+        )
+        self.math_b = Course.objects.create(
+            course_code="MATH100", section="B", instr_type="LEC",
+            days="MWF", start_time="1100", end_time="1200", capacity=100
+        )
+        Course.objects.create(
+            course_code="PHYS100", section="A", instr_type="LEC",
+            days="TR", start_time="0900", end_time="1030", capacity=100
+        )
+
+    def _load(self):
+        self.builder.build_blocks()
+        state = ScheduleState.load(reset_enrollment=True)
+        self.builder._state = state
+        self.builder._catalogue = state.catalogue
+        return state
+
+    def _math_sections(self, state):
+        return {
+            state.assignments[t.pk]["MATH100"][0].section
+            for t in state.terms.values() if t.term_name == "fall"
+        }
+
+    def test_patterns_are_found_once_and_shared(self):
+        state = self._load()
+
+        with self.assertNumQueries(0):
+            self.builder._schedule_by_pattern()
+
+        self.assertEqual(state.count_missing(), 0)
+        self.assertEqual(len(self._math_sections(state)), 1)
+
+    def test_diverse_patterns_spread_blocks(self):
+        self.builder.diverse_patterns = True
+        state = self._load()
+
+        self.builder._schedule_by_pattern()
+
+        self.assertEqual(state.count_missing(), 0)
+        self.assertEqual(self._math_sections(state), {"A", "B"})
+
+    def test_falls_back_to_next_pattern_when_seats_run_out(self):
+        Course.objects.filter(course_code="MATH100").update(capacity=40)
+        state = self._load()
+
+        self.builder._schedule_by_pattern()
+
+        self.assertEqual(state.count_missing(), 0)
+        self.assertEqual(state.courses[self.math_a.pk].enrolled + state.courses[self.math_b.pk].enrolled, 60)
+        self.assertLessEqual(state.courses[self.math_a.pk].enrolled, 40)
+        self.assertLessEqual(state.courses[self.math_b.pk].enrolled, 40)
+
+    def test_generate_schedule_with_symmetry(self):
+        stats = self.builder.generate_schedule(symmetry=True)
+
+        self.assertIn("patterns", stats.phases)
+        self.assertEqual(TermCourses.objects.filter(course_code="PHYS100").count(), 3)
+        self.assertEqual(TermCourses.objects.filter(course_code="MATH100").count(), 3)
+
+
+class DynamicOrderTests(TestCase):
+
+    def setUp(self):
+        self.builder = ScheduleBuilder()
+        self.prog = Program.objects.create(program_name="Engineering", enrolled=20)
+        ProgramCourse.objects.create(program=self.prog, course_code="MATH100", term="fall")
+        ProgramCourse.objects.create(program=self.prog, course_code="PHYS100", term="fall")
+
+        # Both courses have two sections, but PHYS100's 1300 section is full:
+        # only placing PHYS100 first avoids a repair.
+        for code, section, start, capacity in (
+            ("MATH100", "A", "0900", 100), ("MATH100", "B", "1100", 100),
+            ("PHYS100", "A", "0900", 100), ("PHYS100", "B", "1300", 0),
+        ):
+            Course.objects.create(
+                course_code=code, section=section, instr_type="LEC", days="MWF",
+                start_time=start, end_time=str(int(start) + 100).zfill(4), capacity=capacity
+            )
+
+    def test_most_constrained_course_goes_first(self):
+        for _ in range(5):
+            stats = self.builder.generate_schedule(dynamic_order=True)
+
+            self.assertEqual(stats.force_attempts, 0)
+            self.assertEqual(stats.failed_placements, 0)
+            self.assertEqual(TermCourses.objects.get(course_code="MATH100").section, "B")
+
+
+class CohortBatchingTests(TestCase):
+
+    def setUp(self):
+        self.builder = ScheduleBuilder()
+        self.small = Program.objects.create(program_name="Civil", enrolled=20)
+        self.large = Program.objects.create(program_name="Electrical", enrolled=40)
+        ProgramCourse.objects.create(program=self.small, course_code="ECOR100", term="fall")
+        ProgramCourse.objects.create(program=self.small, course_code="CIVE100", term="fall")
+        ProgramCourse.objects.create(program=self.large, course_code="ECOR100", term="fall")
+
+        # ECOR100: 40 seats at 0900, 20 seats at 1100. Civil's block is busy at 1100,
+        # so it must get the 0900 section - it can only do so if the electrical
+        # blocks don't both take it first.
+        for code, section, start, capacity in (
+            ("ECOR100", "A", "0900", 40), ("ECOR100", "B", "1100", 20),
+            ("CIVE100", "A", "1100", 100),
+        ):
+            Course.objects.create(
+                course_code=code, section=section, instr_type="LEC", days="MWF",
+                start_time=start, end_time=str(int(start) + 100).zfill(4), capacity=capacity
+            )
+
+        self.builder.build_blocks()
+        self.state = ScheduleState.load(reset_enrollment=True)
+        self.builder._state = self.state
+        self.builder._catalogue = self.state.catalogue
+        self.civil_term = next(
+            t for t in self.state.terms.values()
+            if t.block.program_id == self.small.pk and t.term_name == "fall"
+        )
+        self.state.commit(self.civil_term, self.state.catalogue.bundles("CIVE100")[0], 20)
+
+    def test_batch_matches_every_block_without_repair(self):
+        self.builder.batch_shared = True
+        for _ in range(5):
+            self.state.clear_assignments()
+            self.state.commit(self.civil_term, self.state.catalogue.bundles("CIVE100")[0], 20)
+            self.builder.stats.force_attempts = 0
+
+            self.assertTrue(self.builder._schedule_course_globally("ECOR100"))
+
+            self.assertEqual(self.builder.stats.force_attempts, 0)
+            self.assertEqual(self.state.count_missing(), 0)
+            self.assertEqual(self.state.assignments[self.civil_term.pk]["ECOR100"][0].section, "A")
+
+    def test_augmenting_path_moves_an_earlier_match(self):
+        """Three blocks, three 20-seat sections, each block blocked from one of them:
+        greedy picks can dead-end, the augmenting path always finds the full matching."""
+        Course.objects.filter(course_code="ECOR100").update(capacity=20)
+        Course.objects.create(
+            course_code="ECOR100", section="C", instr_type="LEC", days="MWF",
+            start_time="1300", end_time="1400", capacity=20
+        )
+        busy = {}
+        terms = []
+        for name, start in (("P1", "1300"), ("P2", "0900"), ("P3", "1100")):
+            program = Program.objects.create(program_name=name, enrolled=20)
+            ProgramCourse.objects.create(program=program, course_code="ECOR100", term="winter")
+            busy[name] = Course.objects.create(
+                course_code=f"BUSY{name}", section="A", instr_type="LEC", days="MWF",
+                start_time=start, end_time=str(int(start) + 100).zfill(4)
+            )
+
+        self.builder.build_blocks()
+        state = ScheduleState.load(reset_enrollment=True)
+        self.builder._state = state
+        self.builder._catalogue = state.catalogue
+        for name, course in busy.items():
+            term = next(t for t in state.terms.values()
+                        if t.block.program.program_name == name and t.term_name == "winter")
+            state.commit(term, [state.courses[course.pk]], 20)
+            terms.append(term)
+
+        for _ in range(10):
+            for term in terms:
+                state.release(term, "ECOR100", 20)
+
+            self.assertEqual(self.builder._place_course_batch("ECOR100", terms), [])
+            self.assertEqual(
+                sorted(state.assignments[t.pk]["ECOR100"][0].section for t in terms), ["A", "B", "C"]
+            )
@@ -0,0 +1,77 @@
+import io
+
+from django.core.management import call_command
+from django.test import TestCase
+from data_app.models import Program, Course, ProgramCourse, TermCourses
+from data_app.services.schedule_builder import ScheduleBuilder
+from data_app.services.schedule_state import ScheduleState
+
+
+class PlacementPolicyTests(TestCase):
+
+    def setUp(self):
+        self.builder = ScheduleBuilder()
+        self.prog = Program.objects.create(program_name="Engineering", enrolled=60)
+        ProgramCourse.objects.create(program=self.prog, course_code="MATH100", term="fall")
+
+        # Same time, different seat counts
+        self.small = Course.objects.create(
+            course_code="MATH100", section="A", instr_type="LEC", days="MWF",
+            start_time="0900", end_time="1000", capacity=30, enrolled=0
+        )
+        self.large = Course.objects.create(
+            course_code="MATH100", section="B", instr_type="LEC", days="MWF",
+            start_time="0900", end_time="1000", capacity=60, enrolled=0
+        )
+        self.builder.build_blocks()
+
+    def test_headroom_policy_prefers_emptier_section(self):
+        state = ScheduleState.load(reset_enrollment=True)
+        self.builder._state = state
+        self.builder._catalogue = state.catalogue
+        self.builder.placement_policy = "headroom"
+
+        self.builder._schedule_course_globally("MATH100")
+
+        # While other blocks still need seats, B keeps more headroom than A
+        self.assertEqual(state.count_missing(), 0)
+        self.assertGreaterEqual(state.courses[self.large.pk].enrolled, 40)
+
+    def test_headroom_generation_runs_in_memory(self):
+        stats = self.builder.generate_schedule(policy="headroom")
+
+        # Only the in-memory engine writes its schedule in a flush phase
+        self.assertIn("flush", stats.phases)
+        self.assertEqual(TermCourses.objects.count(), 3)
+
+    def test_unknown_policy_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.builder.generate_schedule(policy="fastest")
+
+    def test_benchmark_compares_policies(self):
+        results = self.builder.benchmark_placement_policies(runs=2)
+
+        self.assertEqual(set(results), {"random", "headroom"})
+        self.assertEqual(results["headroom"]["missing"], 0)
+        self.assertEqual(self.builder.placement_policy, "random")
+        # Nothing is written
+        self.assertEqual(Course.objects.get(pk=self.large.pk).enrolled, 0)
+
+    def test_benchmark_counts_only_top_level_failures(self):
+        """PHYS100 clashes with MATH100: every repair chain fails one level down and is rolled back."""
+        ProgramCourse.objects.create(program=self.prog, course_code="PHYS100", term="fall")
+        Course.objects.create(
+            course_code="PHYS100", section="A", instr_type="LEC", days="MWF",
+            start_time="0900", end_time="1000", capacity=100
+        )
+
+        results = self.builder.benchmark_placement_policies(runs=2)
+
+        for row in results.values():
+            self.assertGreater(row["missing"], 0)
+            self.assertEqual(row["failed_placements"], row["missing"])
+
+    def test_benchmark_command(self):
+        out = io.StringIO()
+        call_command("benchmark_placement", runs=1, stdout=out)
+        self.assertIn("headroom", out.getvalue())
@@ -0,0 +1,71 @@
+from django.test import TestCase
+from django.urls import reverse
+from data_app.models import Program, Course, ProgramCourse
+from data_app.services.preflight import _block_sizes_by_program, analyze_feasibility
+from data_app.services.schedule_builder import ScheduleBuilder
+
+class PreflightTests(TestCase):
+
+    def setUp(self):
+        self.eng = Program.objects.create(program_name="Engineering", enrolled=45)  # 20 + 20 + 5
+
+        ProgramCourse.objects.create(program=self.eng, course_code="MATH100", term="fall")
+        ProgramCourse.objects.create(program=self.eng, course_code="PHYS100", term="fall")
+        ProgramCourse.objects.create(program=self.eng, course_code="CHEM100", term="winter")
+        ProgramCourse.objects.create(program=self.eng, course_code="ECOR100", term="winter")
+
+        # MATH100: lecture has room, labs only seat 30 -> short 15
+        lec = Course.objects.create(
+            course_code="MATH100", section="A", instr_type="LEC", term="fall",
+            days="MW", start_time="0900", end_time="1000", capacity=100
+        )
+        Course.objects.create(
+            course_code="MATH100", section="A1", instr_type="LAB", term="fall",
+            days="F", start_time="0900", end_time="1100", capacity=30, parent=lec
+        )
+        # PHYS100: only offered in winter
+        Course.objects.create(
+            course_code="PHYS100", section="A", instr_type="LEC", term="winter",
+            days="TR", start_time="0900", end_time="1000", capacity=100
+        )
+        # CHEM100: no meeting time
+        Course.objects.create(course_code="CHEM100", section="A", instr_type="LEC", term="winter", capacity=100)
+        # ECOR100: fine
+        Course.objects.create(
+            course_code="ECOR100", section="A", instr_type="LEC", term="winter",
+            days="MW", start_time="1300", end_time="1400"
+        )
+
+    def test_demand_matrix_and_issues(self):
+        report = analyze_feasibility(block_size=20)
+
+        demand = {(r["course_code"], r["term"]): r for r in report["demand"]}
+        self.assertEqual(demand[("MATH100", "fall")]["demand"], 45)
+        self.assertEqual(demand[("MATH100", "fall")]["capacity"], 30)
+        self.assertIsNone(demand[("ECOR100", "winter")]["capacity"])
+
+        issues = {i["course_code"]: i for i in report["issues"]}
+        self.assertEqual(issues["MATH100"]["reason"], "capacity")
+        self.assertEqual(issues["MATH100"]["shortfall"], 15)
+        self.assertEqual(issues["PHYS100"]["reason"], "no_sections")
+        self.assertEqual(issues["CHEM100"]["reason"], "no_timed_sections")
+        self.assertNotIn("ECOR100", issues)
+
+    def test_unbuilt_programs_use_the_builder_block_sizes(self):
+        self.assertEqual(_block_sizes_by_program(20)[self.eng.pk], [20, 20, 5])
+        self.assertEqual(_block_sizes_by_program(20, {self.eng.pk: 15})[self.eng.pk], [15, 15, 15])
+
+    def test_built_blocks_follow_the_overrides(self):
+        builder = ScheduleBuilder()
+        builder.block_size_overrides = {self.eng.pk: 15}
+        builder.build_blocks()
+
+        self.assertEqual(_block_sizes_by_program(20)[self.eng.pk], [15, 15, 15])
+        report = analyze_feasibility(builder.BLOCK_SIZE, builder.block_size_overrides)
+        demand = {(r["course_code"], r["term"]): r["demand"] for r in report["demand"]}
+        self.assertEqual(demand[("MATH100", "fall")], 45)
+
+    def test_api_endpoint(self):
+        response = self.client.get(reverse("api_preflight"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["issues"]), 3)
@@ -0,0 +1,226 @@
+import json
+import os
+import random
+import tempfile
+from types import SimpleNamespace
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from data_app.models import Block, Program, Course, ProgramCourse, Term, TermCourses
+from data_app.services import vector_ranking
+from data_app.services.ranking import ScheduleRanker, TermScoreCache
+from data_app.services.schedule_builder import ScheduleBuilder
+
+
+class RankingTests(TestCase):
+
+    def setUp(self):
+        self.ranker = ScheduleRanker()
+        for name in ("Civil", "Electrical"):
+            program = Program.objects.create(program_name=name, enrolled=60)
+            ProgramCourse.objects.create(program=program, course_code="MATH100", term="fall")
+            ProgramCourse.objects.create(program=program, course_code="PHYS100", term="fall")
+            ProgramCourse.objects.create(program=program, course_code="CHEM100", term="winter")
+
+        for code, section, days, start, end in (
+            ("MATH100", "A", "MWF", "0830", "0930"),
+            ("MATH100", "B", "MWF", "1300", "1400"),
+            ("PHYS100", "A", "TR", "1800", "2100"),
+            ("PHYS100", "B", "TR", "1000", "1130"),
+            ("CHEM100", "A", "M", "0900", "1000"),
+        ):
+            Course.objects.create(
+                course_code=code, section=section, instr_type="LEC", days=days,
+                start_time=start, end_time=end, capacity=200
+            )
+        ScheduleBuilder().generate_schedule()
+
+    def test_batched_scores_match_per_term_scoring(self):
+        self.ranker.rank_all_blocks()
+
+        # Each block scored on its own by a ranker with an empty cache
+        single = ScheduleRanker(engine="python")
+        for block in Block.objects.all():
+            self.assertEqual(block.ranking, single._calculate_block_score_and_report(block)[0])
+
+    def test_query_count_does_not_grow_with_blocks(self):
+        with self.assertNumQueries(5):
+            self.ranker.rank_all_blocks()
+
+        Program.objects.update(enrolled=200)
+        ScheduleBuilder().generate_schedule()
+        self.assertGreater(Block.objects.count(), 6)
+
+        with self.assertNumQueries(5):
+            self.ranker.rank_all_blocks()
+
+    def test_identical_terms_are_scored_once(self):
+        self.ranker.rank_all_blocks()
+        distinct = len(self.ranker.cache)
+
+        # 6 blocks x 2 terms, but blocks of one program share their sections
+        self.assertLess(distinct, 12)
+        self.assertEqual(self.ranker.cache.misses, distinct)
+
+        # The report reads the stored breakdown: no scoring, one query
+        with tempfile.TemporaryDirectory() as tmp:
+            with self.assertNumQueries(1):
+                self.ranker.export_ranking_report(os.path.join(tmp, "report.txt"))
+        self.assertEqual(self.ranker.cache.misses, distinct)
+
+    def test_cache_is_shared_and_keyed_by_weights(self):
+        cache = TermScoreCache()
+        ScheduleRanker(cache=cache).rank_all_blocks()
+        distinct = len(cache)
+
+        ScheduleRanker(cache=cache).rank_all_blocks()
+        self.assertEqual(len(cache), distinct)
+
+        tuned = ScheduleRanker(cache=cache)
+        tuned.WEIGHTS = dict(ScheduleRanker.WEIGHTS, compactness=10)
+        tuned.rank_all_blocks()
+        self.assertEqual(len(cache), 2 * distinct)
+
+    def test_incremental_ranking_skips_unchanged_blocks(self):
+        self.assertEqual(self.ranker.rank_all_blocks(incremental=True), {"ranked": 6, "skipped": 0})
+
+        # Nothing changed: no scoring and no writes
+        with self.assertNumQueries(4):
+            self.assertEqual(self.ranker.rank_all_blocks(incremental=True), {"ranked": 0, "skipped": 6})
+
+        term = Term.objects.filter(term_name="fall").first()
+        link = TermCourses.objects.get(term=term, course_code="PHYS100")
+        link.section = "A" if link.section == "B" else "B"
+        link.save()
+
+        result = self.ranker.rank_all_blocks(incremental=True)
+        self.assertEqual(result, {"ranked": 1, "skipped": 5})
+        block = Block.objects.get(pk=term.block_id)
+        self.assertEqual(block.ranking, self.ranker._calculate_block_score_and_report(block)[0])
+
+    @patch.object(ScheduleRanker, "export_ranking_report")
+    def test_api_ranks_every_block_unless_incremental(self, mock_export):
+        url = reverse("api_rank_blocks")
+        self.assertEqual(self.client.post(url).json()["ranked"], 6)
+        self.assertEqual(self.client.post(url).json()["ranked"], 6)
+
+        response = self.client.post(url, json.dumps({"incremental": True}), content_type="application/json")
+        self.assertEqual((response.json()["ranked"], response.json()["skipped"]), (0, 6))
+
+    def test_section_time_change_marks_blocks_stale(self):
+        self.ranker.rank_all_blocks()
+        Course.objects.filter(course_code="CHEM100").update(start_time="0800")
+
+        self.assertEqual(self.ranker.rank_all_blocks(incremental=True), {"ranked": 6, "skipped": 0})
+
+    def test_report_matches_fresh_scoring(self):
+        self.ranker.rank_all_blocks()
+        fresh = ScheduleRanker(engine="python")
+
+        for block in Block.objects.all():
+            self.assertEqual(
+                (block.ranking, self.ranker._report_lines(block.score_breakdown)),
+                fresh._calculate_block_score_and_report(block)
+            )
+
+    def test_breakdown_api_reads_stored_ranking(self):
+        self.ranker.rank_all_blocks()
+        block = Block.objects.first()
+
+        with self.assertNumQueries(1):
+            data = self.client.get(f"/api/block/{block.pk}/breakdown/").json()
+
+        self.assertTrue(data["ranked"])
+        self.assertEqual([t["term"] for t in data["terms"]], ["fall", "winter"])
+        self.assertEqual(set(data["terms"][0]["rules"]), set(ScheduleRanker.WEIGHTS))
+        self.assertIn("[days_used] Days scheduled: 5", data["terms"][0]["notes"])
+
+    def test_block_without_terms(self):
+        block = Block.objects.first()
+        block.terms.all().delete()
+
+        self.assertEqual(
+            self.ranker._calculate_block_score_and_report(block),
+            (0, ["Error: No terms found in block."])
+        )
+
+
+class TermScoreCacheTests(SimpleTestCase):
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = TermScoreCache(max_size=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        self.assertEqual(list(cache.entries), ["a", "c"])
+        self.assertIsNone(cache.get("b"))
+
+    def test_section_order_does_not_change_the_key(self):
+        ranker = ScheduleRanker(engine="python")
+        a = SimpleNamespace(course_code="MATH100", section="A", instr_type="LEC", days="MWF", start_time="0900", end_time="1000")
+        b = SimpleNamespace(course_code="PHYS100", section="A", instr_type="LEC", days="TR", start_time="0900", end_time="1000")
+
+        self.assertEqual(ranker._term_key([a, b])[0], ranker._term_key([b, a])[0])
+        self.assertEqual(ranker.score_terms([[a, b], [b, a]]), [ranker._score_courses([a, b])[0]] * 2)
+        self.assertEqual((ranker.cache.hits, ranker.cache.misses), (0, 1))
+
+
+@skipUnless(vector_ranking.HAS_NUMPY, "NumPy is not installed")
+class VectorRankingTests(SimpleTestCase):
+
+    def _section(self, code, instr_type, days, start, end):
+        return SimpleNamespace(
+            course_code=code, instr_type=instr_type, days=days,
+            start_time=f"{start // 60:02d}{start % 60:02d}", end_time=f"{end // 60:02d}{end % 60:02d}"
+        )
+
+    def test_matches_python_rules(self):
+        rng = random.Random(11)
+        course_lists = [[], [SimpleNamespace(course_code="X", instr_type="PA", days=None, start_time=None, end_time=None)]]
+        for _ in range(300):
+            courses = []
+            for i in range(rng.randint(1, 8)):
+                # Overlaps, shared start times, late evenings and early mornings all occur
+                start = rng.choice(range(420, 1260, 30))
+                days = "".join(d for d in "MTWRF" if rng.random() < 0.4) or "M"
+                courses.append(self._section(
+                    f"C{i % 4}", rng.choice(("LEC", "LAB", "TUT")), days, start, start + rng.choice((50, 80, 170))
+                ))
+            course_lists.append(courses)
+
+        python = ScheduleRanker(engine="python").score_terms(course_lists)
+        vector = ScheduleRanker(engine="numpy").score_terms(course_lists)
+
+        self.assertEqual(vector, python)
+        self.assertGreater(len(set(python)), 10)
+
+    def test_breakdowns_match_python_rules(self):
+        rng = random.Random(5)
+        course_lists = []
+        for _ in range(100):
+            courses = []
+            for i in range(rng.randint(0, 6)):
+                start = rng.choice(range(420, 1260, 30))
+                courses.append(self._section(f"C{i}", "LEC", rng.choice(("MW", "TR", "MTWRF", "F")), start, start + 170))
+            course_lists.append(courses)
+
+        ranker = ScheduleRanker(engine="python")
+        expected = [ranker._term_breakdown(courses) for courses in course_lists]
+
+        self.assertEqual(vector_ranking.term_breakdowns(ranker, course_lists), expected)
+        self.assertTrue(any(len(b["notes"]) > 2 for b in expected))
+
+    def test_default_engine_uses_numpy(self):
+        self.assertEqual(ScheduleRanker().engine, "numpy")
+        self.assertEqual(ScheduleRanker().score_terms([]), [])
+
+
+class RankingEngineTests(SimpleTestCase):
+
+    def test_unknown_engine_is_rejected(self):
+        with self.assertRaises(ValueError):
+            ScheduleRanker(engine="gpu")
@@ -0,0 +1,193 @@
+import io
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from data_app.models import Block, Program, Course, ProgramCourse, ScheduleRun, TermCourses
+from data_app.services.schedule_builder import ScheduleBuilder
+from data_app.services.schedule_runs import diff_runs, restore_run, save_run
+
+
+class ScheduleRunTests(TestCase):
+
+    def setUp(self):
+        self.builder = ScheduleBuilder()
+        self.prog = Program.objects.create(program_name="Engineering", enrolled=20)
+        ProgramCourse.objects.create(program=self.prog, course_code="MATH100", term="fall")
+        self.math_a = Course.objects.create(
+            course_code="MATH100", section="A", instr_type="LEC", days="MWF",
+            start_time="0900", end_time="1000", capacity=100
+        )
+        self.math_b = Course.objects.create(
+            course_code="MATH100", section="B", instr_type="LEC", days="TR",
+            start_time="0900", end_time="1030", capacity=100
+        )
+
+    def _placed_section(self):
+        return TermCourses.objects.get(course_code="MATH100").section
+
+    def test_generation_saves_versioned_runs(self):
+        self.builder.generate_schedule(in_memory=True)
+        self.builder.generate_schedule(in_memory=True)
+
+        self.assertEqual(list(ScheduleRun.objects.values_list("version", flat=True)), [2, 1])
+        run = self.builder.last_run
+        self.assertEqual(run.version, 2)
+        self.assertEqual(sum(len(ids) for ids in run.assignments.values()), 1)
+        placed = Course.objects.get(course_code="MATH100", section=self._placed_section())
+        self.assertEqual(run.enrollment, {str(placed.pk): 20})
+
+    def test_failed_generation_saves_no_run(self):
+        ProgramCourse.objects.all().delete()
+        self.builder.generate_schedule(in_memory=True)
+        self.assertIsNone(self.builder.last_run)
+
+        Program.objects.update(enrolled=0)
+        self.builder.generate_schedule(restarts=2, workers=1)
+        self.assertIsNone(self.builder.last_run)
+
+        self.assertFalse(ScheduleRun.objects.exists())
+
+    def test_restore_after_blocks_were_rebuilt(self):
+        """Term ids change on every full generation; restore matches terms by program/block/term name."""
+        self.builder.generate_schedule(in_memory=True)
+        first = self.builder.last_run
+        first_section = self._placed_section()
+
+        # Force the other section in the next run
+        Course.objects.filter(section=first_section).update(capacity=0)
+        self.builder.generate_schedule(in_memory=True)
+        Course.objects.filter(section=first_section).update(capacity=100)
+        self.assertNotEqual(self._placed_section(), first_section)
+
+        with self.assertNumQueries(11):
+            result = restore_run(first)
+
+        self.assertEqual(result["skipped_terms"], 0)
+        self.assertEqual(self._placed_section(), first_section)
+        self.assertEqual(Course.objects.get(course_code="MATH100", section=first_section).enrolled, 20)
+        self.assertEqual(
+            sum(Course.objects.filter(course_code="MATH100").values_list("enrolled", flat=True)), 20
+        )
+
+    def test_restore_recounts_enrollment_for_changed_blocks(self):
+        """Blocks C and D are gone and block B shrank since v1: seats follow the restored rows."""
+        Program.objects.update(enrolled=70)     # blocks of 20, 20, 20, 10
+        self.builder.generate_schedule(in_memory=True)
+        first = self.builder.last_run
+
+        Program.objects.update(enrolled=30)     # blocks of 20, 10
+        self.builder.generate_schedule(in_memory=True)
+
+        with self.assertRaises(ValueError):
+            restore_run(first)
+        result = restore_run(first, force=True)
+
+        self.assertEqual(result["skipped_terms"], 4)
+        seats = {}
+        for row in TermCourses.objects.select_related("term__block"):
+            key = (row.course_code, row.section)
+            seats[key] = seats.get(key, 0) + row.term.block.size
+        for course in Course.objects.all():
+            self.assertEqual(course.enrolled, seats.get((course.course_code, course.section), 0))
+        self.assertEqual(sum(seats.values()), 30)
+
+    def test_restore_refuses_when_terms_no_longer_exist(self):
+        """A run none of whose terms match is not restored, and never wipes the live schedule."""
+        self.builder.generate_schedule(in_memory=True)
+        first = self.builder.last_run
+        Block.objects.update(block_name="Block Z")
+
+        with self.assertRaises(ValueError):
+            restore_run(first)
+        with self.assertRaises(CommandError):
+            call_command("schedule_runs", restore=first.version, stdout=io.StringIO())
+        self.assertEqual(TermCourses.objects.count(), 1)
+
+        result = restore_run(first, force=True)
+
+        self.assertEqual(result["terms"], 0)
+        self.assertEqual(result["skipped_terms"], 2)
+        self.assertEqual(TermCourses.objects.count(), 1)
+
+    def test_restore_drops_placements_that_overfill_a_section(self):
+        self.builder.generate_schedule(in_memory=True)
+        first = self.builder.last_run
+        placed = self._placed_section()
+        Course.objects.filter(section=placed).update(capacity=10)
+
+        result = restore_run(first)
+
+        self.assertEqual(result["over_capacity"], [f"MATH100 {placed} (20/10)"])
+        self.assertEqual(result["dropped_for_capacity"], ["MATH100 in Block A (fall)"])
+        self.assertEqual(result["rows"], 0)
+        self.assertFalse(TermCourses.objects.exists())
+        self.assertEqual(Course.objects.get(section=placed).enrolled, 0)
+
+    def test_restore_drops_conflicting_placements(self):
+        ProgramCourse.objects.create(program=self.prog, course_code="PHYS100", term="fall")
+        phys = Course.objects.create(
+            course_code="PHYS100", section="A", instr_type="LEC", days="MWF",
+            start_time="1300", end_time="1400", capacity=100
+        )
+        self.builder.generate_schedule(in_memory=True)
+        first = self.builder.last_run
+        math = Course.objects.get(course_code="MATH100", section=self._placed_section())
+        Course.objects.filter(pk=phys.pk).update(
+            days=math.days, start_time=math.start_time, end_time=math.end_time
+        )
+
+        result = restore_run(first)
+
+        self.assertEqual(len(result["conflicts"]), 1)
+        self.assertEqual(result["rows"], 1)
+        self.assertEqual(TermCourses.objects.count(), 1)
+        self.assertEqual(sum(Course.objects.values_list("enrolled", flat=True)), 20)
+
+    def test_restore_skips_groups_with_a_deleted_member(self):
+        """A lecture whose lab was deleted is not restored on its own."""
+        ProgramCourse.objects.create(program=self.prog, course_code="PHYS100", term="fall")
+        lec = Course.objects.create(
+            course_code="PHYS100", section="A", instr_type="LEC", days="MWF",
+            start_time="1300", end_time="1400", capacity=100
+        )
+        for section, day in (("A1", "T"), ("A2", "R")):
+            Course.objects.create(
+                course_code="PHYS100", section=section, instr_type="LAB", days=day,
+                start_time="1400", end_time="1600", capacity=100, parent=lec
+            )
+        self.builder.generate_schedule(in_memory=True)
+        first = self.builder.last_run
+        lab = TermCourses.objects.get(course_code="PHYS100", section__in=["A1", "A2"]).section
+        Course.objects.filter(section=lab).delete()
+
+        with self.assertRaises(ValueError):
+            restore_run(first)
+        result = restore_run(first, force=True)
+
+        self.assertEqual(result["missing_sections"], 1)
+        self.assertEqual(result["invalid_groups"], ["PHYS100 in Block A (fall)"])
+        self.assertFalse(TermCourses.objects.filter(course_code="PHYS100").exists())
+        self.assertEqual(Course.objects.get(pk=lec.pk).enrolled, 0)
+        self.assertEqual(TermCourses.objects.filter(course_code="MATH100").count(), 1)
+
+    def test_diff_lists_changed_terms_and_enrollment(self):
+        self.builder.generate_schedule(in_memory=True)
+        old = self.builder.last_run
+        placed = self._placed_section()
+        other = "B" if placed == "A" else "A"
+
+        TermCourses.objects.filter(course_code="MATH100").update(section=other)
+        Course.objects.filter(section=placed).update(enrolled=0)
+        Course.objects.filter(section=other).update(enrolled=20)
+        new = save_run()
+
+        diff = diff_runs(old, new)
+        self.assertEqual(len(diff["terms"]), 1)
+        self.assertEqual(diff["terms"][0]["added"], [f"MATH100 {other}"])
+        self.assertEqual(diff["terms"][0]["removed"], [f"MATH100 {placed}"])
+        self.assertEqual(len(diff["enrollment"]), 2)
+
+        out = io.StringIO()
+        call_command("schedule_runs", diff=[old.version, new.version], stdout=out)
+        self.assertIn(f"+ MATH100 {other}", out.getvalue())
@@ -0,0 +1,198 @@
+import random
+from unittest import mock
+
+from django.test import TestCase
+from data_app.models import Program, Course, ProgramCourse, TermCourses
+from data_app.services.schedule_builder import ScheduleBuilder
+from data_app.services.schedule_state import ScheduleState
+from data_app.services.utils import group_mask
+
+class InMemoryEngineTests(TestCase):
+
+    def setUp(self):
+        self.builder = ScheduleBuilder()
+        self.prog = Program.objects.create(program_name="Engineering", enrolled=40)
+
+        ProgramCourse.objects.create(program=self.prog, course_code="MATH100", term="fall")
+        ProgramCourse.objects.create(program=self.prog, course_code="PHYS100", term="fall")
+
+        self.math = Course.objects.create(
+            course_code="MATH100", section="A", instr_type="LEC",
+            days="MWF", start_time="0900", end_time="1000", capacity=100
+        )
+        self.phys = Course.objects.create(
+            course_code="PHYS100", section="A", instr_type="LEC",
+            days="TR", start_time="0900", end_time="1030", capacity=100
+        )
+        self.phys_lab = Course.objects.create(
+            course_code="PHYS100", section="A1", instr_type="LAB",
+            days="F", start_time="1300", end_time="1500", capacity=50,
+            parent=self.phys
+        )
+
+    def test_in_memory_generation_writes_results(self):
+        """In-memory mode should produce the same rows and enrollments as the ORM mode."""
+        self.builder.generate_schedule(in_memory=True)
+
+        self.assertEqual(TermCourses.objects.filter(course_code="MATH100").count(), 2)
+        self.assertEqual(TermCourses.objects.filter(course_code="PHYS100").count(), 4)
+
+        self.math.refresh_from_db()
+        self.phys_lab.refresh_from_db()
+        self.assertEqual(self.math.enrolled, 40)
+        self.assertEqual(self.phys_lab.enrolled, 40)
+
+    def test_search_runs_without_queries(self):
+        """Once the snapshot is loaded, the scheduling loop should not hit the database."""
+        self.builder.build_blocks()
+        self.builder._state = ScheduleState.load(reset_enrollment=True)
+        self.builder._catalogue = self.builder._state.catalogue
+
+        with self.assertNumQueries(0):
+            for course_info in self.builder.find_shared_courses():
+                self.builder._schedule_course_globally(course_info['course_code'])
+            self.assertEqual(self.builder._count_missing_courses(), 0)
+
+    def test_load_reads_existing_assignments(self):
+        """A snapshot loaded without reset keeps the current TermCourses rows."""
+        self.builder.generate_schedule(in_memory=True)
+
+        state = ScheduleState.load()
+        self.assertEqual(state.count_missing(), 0)
+        self.assertEqual(state.courses[self.math.pk].enrolled, 40)
+
+    def test_multi_restart_persists_best_attempt(self):
+        """Seeded attempts run in worker processes; only the best one is written back."""
+        self.builder.generate_schedule(restarts=3, workers=2)
+
+        self.assertEqual(TermCourses.objects.filter(course_code="PHYS100").count(), 4)
+        self.math.refresh_from_db()
+        self.assertEqual(self.math.enrolled, 40)
+
+    def test_export_and_apply_assignments_round_trip(self):
+        self.builder.generate_schedule(in_memory=True)
+        encoded = ScheduleState.load().export_assignments()
+
+        state = ScheduleState.load(reset_enrollment=True)
+        self.assertEqual(state.count_missing(), 4)
+        state.apply_assignments(encoded)
+        self.assertEqual(state.count_missing(), 0)
+        self.assertEqual(state.courses[self.phys.pk].enrolled, 40)
+
+    def test_time_budget_returns_best_schedule(self):
+        """Anytime mode keeps searching until the budget is spent and reports progress."""
+        self.builder.generate_schedule(time_budget=0.2)
+
+        self.assertEqual(TermCourses.objects.filter(course_code="MATH100").count(), 2)
+        self.assertTrue(self.builder.progress)
+        self.assertEqual(self.builder.progress[-1]['best_missing'], 0)
+        self.assertGreaterEqual(self.builder.progress[-1]['elapsed'], 0.2)
+
+    def test_rollback_restores_assignments_and_enrollment(self):
+        self.builder.build_blocks()
+        state = ScheduleState.load(reset_enrollment=True)
+        term = next(iter(state.terms.values()))
+        math_bundle = state.catalogue.bundles("MATH100")[0]
+        state.commit(term, math_bundle, 20)
+        mask_before = state.term_mask(term)
+
+        mark = state.checkpoint()
+        state.release(term, "MATH100", 20)
+        state.commit(term, state.catalogue.bundles("PHYS100")[0], 20)
+        state.rollback(mark)
+
+        self.assertTrue(state.has_course(term, "MATH100"))
+        self.assertFalse(state.has_course(term, "PHYS100"))
+        self.assertEqual(state.courses[self.math.pk].enrolled, 20)
+        self.assertEqual(state.courses[self.phys.pk].enrolled, 0)
+        self.assertEqual(state.term_mask(term), mask_before)
+        self.assertEqual(state.trail, [])
+
+    def test_commit_refuses_a_second_bundle_for_the_same_course(self):
+        self.builder.build_blocks()
+        state = ScheduleState.load(reset_enrollment=True)
+        term = next(iter(state.terms.values()))
+        math_bundle = state.catalogue.bundles("MATH100")[0]
+        state.commit(term, math_bundle, 20)
+
+        mark = state.checkpoint()
+        with self.assertRaises(ValueError):
+            state.commit(term, math_bundle, 20)
+        state.rollback(mark)
+
+        # The placement made before the checkpoint survives the rollback
+        self.assertEqual(state.assignments[term.pk]["MATH100"], math_bundle)
+        self.assertEqual(state.courses[self.math.pk].enrolled, 20)
+
+    def test_rollback_of_a_commit_removes_only_its_parts(self):
+        self.builder.build_blocks()
+        state = ScheduleState.load(reset_enrollment=True)
+        term = next(iter(state.terms.values()))
+        state.commit(term, state.catalogue.bundles("MATH100")[0], 20)
+
+        mark = state.checkpoint()
+        phys_bundle = state.catalogue.bundles("PHYS100")[0]
+        state.commit(term, phys_bundle, 20)
+        self.assertEqual(state.trail[-1][3], phys_bundle)
+        state.rollback(mark)
+
+        self.assertTrue(state.has_course(term, "MATH100"))
+        self.assertFalse(state.has_course(term, "PHYS100"))
+        self.assertEqual(state.courses[self.math.pk].enrolled, 20)
+        self.assertEqual(state.courses[self.phys_lab.pk].enrolled, 0)
+        self.assertEqual(state.term_mask(term), group_mask(state.assignments[term.pk]["MATH100"]))
+
+    def test_failed_repair_chain_is_rolled_back(self):
+        """A kick whose victim cannot be placed back is undone instead of trading one gap for another."""
+        Course.objects.filter(pk=self.phys.pk).update(days="MWF", start_time="0900", end_time="1000")
+        self.phys_lab.delete()
+
+        self.builder.build_blocks()
+        state = ScheduleState.load(reset_enrollment=True)
+        self.builder._state = state
+        self.builder._catalogue = state.catalogue
+        for term in state.terms_needing("MATH100"):
+            state.commit(term, state.catalogue.bundles("MATH100")[0], 20)
+
+        self.assertFalse(self.builder._schedule_course_globally("PHYS100"))
+
+        self.assertEqual(state.count_missing(), 2)
+        for term in state.terms_needing("PHYS100"):
+            self.assertTrue(state.has_course(term, "MATH100"))
+        self.assertEqual(state.courses[self.math.pk].enrolled, 40)
+        self.assertGreater(self.builder.stats.rollbacks, 0)
+
+    def test_target_placed_by_an_earlier_repair_is_skipped(self):
+        """A course placed into a later target while handling an earlier one is not placed twice."""
+        self.builder.build_blocks()
+        state = ScheduleState.load(reset_enrollment=True)
+        self.builder._state = state
+        self.builder._catalogue = state.catalogue
+        first, second = state.terms_needing("MATH100")
+        attempt = self.builder._attempt_to_schedule_term
+
+        def place_both(term, course_code, bundle_classes):
+            # Stands in for a repair chain that reaches the other target first
+            if term is first:
+                attempt(second, course_code, list(bundle_classes))
+            return attempt(term, course_code, bundle_classes)
+
+        with mock.patch.object(self.builder, "_attempt_to_schedule_term", side_effect=place_both), \
+                mock.patch.object(self.builder.rng, "shuffle"):
+            self.assertTrue(self.builder._schedule_course_globally("MATH100", targets=[first, second]))
+
+        self.assertEqual(len(state.assignments[second.pk]["MATH100"]), 1)
+        self.assertEqual(state.courses[self.math.pk].enrolled, 40)
+
+    def test_seeded_attempt_leaves_the_global_random_alone(self):
+        """Attempts are seeded on the builder's own Random, so the same seed gives the same schedule."""
+        self.builder.build_blocks()
+        state = ScheduleState.load(reset_enrollment=True)
+        before = random.getstate()
+
+        first = self.builder._run_in_memory_attempt(state, 7)
+        state.clear_assignments()
+        second = self.builder._run_in_memory_attempt(state, 7)
+
+        self.assertEqual(random.getstate(), before)
+        self.assertEqual(first['assignments'], second['assignments'])
@@ -121,4 +121,23 @@ class SchedulerIntegrationTests(TestCase):
 
         link = TermCourses.objects.filter(course_code="MATH100").first()
         self.assertIsNotNone(link)
-        self.assertEqual(link.section, "B", "Should pick Section B because A is too small")
\ No newline at end of file
+        self.assertEqual(link.section, "B", "Should pick Section B because A is too small")
+
+    def test_only_sections_offered_in_term(self):
+        """
+        Integration: Term filter.
+        A winter section must never be placed into a fall term.
+        """
+        Course.objects.create(
+            course_code="MATH100", section="A", instr_type="LEC", term="winter",
+            days="MWF", start_time="0900", end_time="1000", capacity=50
+        )
+        Course.objects.create(
+            course_code="MATH100", section="B", instr_type="LEC", term="fall",
+            days="TR", start_time="1400", end_time="1530", capacity=50
+        )
+
+        for _ in range(5):
+            self.builder.generate_schedule()
+            link = TermCourses.objects.get(course_code="MATH100")
+            self.assertEqual(link.section, "B")
@@ -94,7 +94,8 @@ class SchedulerLogicTests(TestCase):
         """
         Test the conflict detection directly.
         """
-        from data_app.services.schedule_builder import can_add_group_to_term, expand_course, slots_conflict
+        from data_app.services.schedule_validator import can_add_group_to_term
+        from data_app.services.utils import expand_course, slots_conflict
 
         # Course A: Mon 10:00 - 11:00
         cA = Course.objects.create(
@@ -0,0 +1,77 @@
+import io
+import json
+from unittest.mock import patch
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from data_app.models import Program, Block, Course, ProgramCourse, TermCourses
+from data_app.services.schedule_builder import ScheduleBuilder
+
+class ScopedGenerationTests(TestCase):
+
+    def setUp(self):
+        self.eng = Program.objects.create(program_name="Engineering", enrolled=20)
+        self.sci = Program.objects.create(program_name="Science", enrolled=20)
+
+        ProgramCourse.objects.create(program=self.eng, course_code="MATH100", term="fall")
+        ProgramCourse.objects.create(program=self.sci, course_code="MATH100", term="fall")
+
+        # Room for exactly two blocks of 20
+        self.math = Course.objects.create(
+            course_code="MATH100", section="A", instr_type="LEC",
+            days="MWF", start_time="0900", end_time="1000", capacity=40
+        )
+        ScheduleBuilder().generate_schedule(in_memory=True)
+
+    def test_other_programs_are_untouched(self):
+        sci_rows = list(TermCourses.objects.filter(term__block__program=self.sci).values_list("pk", flat=True))
+
+        ScheduleBuilder().generate_schedule(program_ids=[self.eng.pk])
+
+        self.assertEqual(
+            list(TermCourses.objects.filter(term__block__program=self.sci).values_list("pk", flat=True)),
+            sci_rows
+        )
+        self.assertTrue(TermCourses.objects.filter(term__block__program=self.eng).exists())
+        self.math.refresh_from_db()
+        self.assertEqual(self.math.enrolled, 40)
+
+    def test_fixed_load_is_respected(self):
+        """A grown program cannot take seats already used by the other program."""
+        self.eng.enrolled = 40
+        self.eng.save()
+
+        ScheduleBuilder().generate_schedule(program_ids=[self.eng.pk])
+
+        self.assertEqual(Block.objects.filter(program=self.eng).count(), 2)
+        self.assertEqual(TermCourses.objects.filter(term__block__program=self.eng).count(), 1)
+        self.assertEqual(TermCourses.objects.filter(term__block__program=self.sci).count(), 1)
+        self.math.refresh_from_db()
+        self.assertEqual(self.math.enrolled, 40)
+
+    def test_management_command_by_name(self):
+        call_command("generate_schedule", "--program", "Science", stdout=io.StringIO())
+        self.assertEqual(TermCourses.objects.count(), 2)
+
+    @patch.object(ScheduleBuilder, "export_visual_grid")
+    @patch.object(ScheduleBuilder, "export_schedule_to_txt")
+    def test_api_program_ids(self, mock_export_txt, mock_export_grid):
+        url = reverse("api_generate_schedule")
+        response = self.client.post(url, json.dumps({"program_ids": [self.sci.pk]}), content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(TermCourses.objects.count(), 2)
+
+        response = self.client.post(url, json.dumps({"program_ids": [9999]}), content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_repair_stays_inside_the_scope(self):
+        """Courses missing only in other programs are not repaired by a scoped run."""
+        ProgramCourse.objects.create(program=self.sci, course_code="PHYS100", term="fall")
+        builder = ScheduleBuilder()
+        builder._state = builder._load_run_state([self.eng.pk])
+        builder._catalogue = builder._state.catalogue
+
+        with patch.object(builder, "_schedule_course_globally") as schedule:
+            builder._repair_missing_courses()
+
+        schedule.assert_not_called()
@@ -1,5 +1,5 @@
 import pytest
-from data_app.services.utils import expand_course, slots_conflict, intervals_overlap, parse_time
+from data_app.services.utils import expand_course, slots_conflict, intervals_overlap, parse_time, course_mask, masks_conflict
 
 class FakeCourse:
     def __init__(self, days, start_time, end_time):
@@ -47,4 +47,18 @@ def test_slots_conflict_complex():
 
 def test_expand_course_empty_handling():
     c = FakeCourse(None, None, None)
-    assert expand_course(c) == {}
\ No newline at end of file
+    assert expand_course(c) == {}
+
+def test_course_mask_matches_slots_conflict():
+    # Same cases as the slot-based checks, answered with one AND
+    a = FakeCourse("MW", "0900", "1000")
+    b = FakeCourse("M", "1000", "1100")   # Back to back with A
+    c = FakeCourse("W", "0930", "1030")   # Overlaps A on Wednesday
+    d = FakeCourse("TR", "0900", "1000")  # Same time, different days
+
+    for x, y in [(a, b), (a, c), (a, d), (b, c), (c, d)]:
+        assert masks_conflict(course_mask(x), course_mask(y)) == slots_conflict(expand_course(x), expand_course(y))
+
+def test_course_mask_empty_handling():
+    assert course_mask(FakeCourse(None, None, None)) == 0
+    assert course_mask(FakeCourse("M", "", "")) == 0
@@ -1,5 +1,5 @@
 from django.test import SimpleTestCase
-from data_app.services.schedule_validator import can_add_group_to_term, course_conflict, group_conflicts_with_term, can_add_group_to_term
+from data_app.services.schedule_validator import can_add_group_to_term, course_conflict, group_conflicts_with_term, can_add_group_to_term, can_add_group_to_mask, term_mask
 
 
 class FakeCourse:
@@ -49,4 +49,15 @@ class ValidatorTests(SimpleTestCase):
         # Conflict exists
         self.assertFalse(can_add_group_to_term([self.c_overlap], term_courses))
         # No conflict
-        self.assertTrue(can_add_group_to_term([self.c_friday], term_courses))
\ No newline at end of file
+        self.assertTrue(can_add_group_to_term([self.c_friday], term_courses))
+
+    def test_mask_api_matches_reference(self):
+        """The bitmask check should agree with can_add_group_to_term."""
+        term_courses = [[self.c1], [self.c2]]
+        occupied = term_mask(term_courses)
+
+        for group in ([self.c_overlap], [self.c_friday], [self.c_overlap, self.c_friday]):
+            self.assertEqual(
+                can_add_group_to_mask(group, occupied),
+                can_add_group_to_term(group, term_courses)
+            )
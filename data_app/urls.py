@@ -27,6 +27,11 @@ urlpatterns = [
         views.api_rank_blocks,
         name="api_rank_blocks",
     ),
+    path(
+        "api/preflight/",
+        views.api_preflight,
+        name="api_preflight",
+    ),
     path(
         "api/program/<int:program_id>/",
         views.api_program_data,
@@ -37,6 +42,11 @@ urlpatterns = [
         views.api_block_timetable,
         name="api_block_timetable",
     ),
+    path(
+        "api/block/<int:block_id>/breakdown/",
+        views.api_block_breakdown,
+        name="api_block_breakdown",
+    ),
     path(
         "api/rankings/",
         views.api_rankings_data,
@@ -55,6 +55,23 @@ def _ranking_class(score):
         return "poor"
 
 
+def _json_body(request):
+    """Parse a JSON request body into a dict (empty dict if missing or invalid)."""
+    try:
+        data = json.loads(request.body or b"{}")
+    except (ValueError, UnicodeDecodeError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _term_scores(block):
+    """Per-term scores from a block's stored ranking breakdown (empty if never ranked)."""
+    return [
+        {"term": term["term"], "score": term["score"]}
+        for term in (block.score_breakdown or {}).get("terms", [])
+    ]
+
+
 def _get_block_courses_json(term):
     """
     Build a list of course dicts for timetable rendering from a Term object.
@@ -314,6 +331,7 @@ def rankings(request):
                 "block": block,
                 "program_name": block.program.program_name,
                 "ranking_class": _ranking_class(block.ranking or 0),
+                "term_scores": _term_scores(block),
             }
         )
 
@@ -379,9 +397,30 @@ def generate_page(request):
 def api_generate_schedule(request):
     """
     Trigger schedule generation via AJAX. Returns JSON with success status and log output.
+    Optional JSON body: {"program_ids": [1, 2]} regenerates only those programs.
     """
+    program_ids = _json_body(request).get("program_ids")
+    if program_ids is not None:
+        if not isinstance(program_ids, list) or not all(
+            isinstance(pid, int) for pid in program_ids
+        ):
+            return JsonResponse(
+                {"success": False, "error": "program_ids must be a list of integers."},
+                status=400,
+            )
+        unknown = set(program_ids) - set(
+            Program.objects.filter(pk__in=program_ids).values_list("id", flat=True)
+        )
+        if unknown:
+            return JsonResponse(
+                {"success": False, "error": f"Unknown program ids: {sorted(unknown)}"},
+                status=400,
+            )
+
     log_info(
-        "Schedule Generation Started", details="User triggered schedule generation."
+        "Schedule Generation Started",
+        details="User triggered schedule generation."
+        + (f" Programs: {program_ids}" if program_ids else ""),
     )
 
     try:
@@ -392,18 +431,22 @@ def api_generate_schedule(request):
 
         with redirect_stdout(log_buffer):
             builder = ScheduleBuilder()
-            builder.generate_schedule()
+            stats = builder.generate_schedule(in_memory=True, program_ids=program_ids)
             builder.export_schedule_to_txt()
             builder.export_visual_grid()
 
         log_output = log_buffer.getvalue()
+        stats_data = stats.to_dict()
 
-        log_success("Schedule Generation Completed", details=log_output)
+        log_success(
+            "Schedule Generation Completed", details=log_output, metrics=stats_data
+        )
 
         return JsonResponse(
             {
                 "success": True,
                 "log": log_output,
+                "stats": stats_data,
                 "message": "Schedule generated successfully.",
             }
         )
@@ -425,7 +468,10 @@ def api_generate_schedule(request):
 def api_rank_blocks(request):
     """
     Trigger block ranking via AJAX. Returns JSON with success status.
+    Every block is re-ranked; optional JSON body {"incremental": true} only
+    re-scores blocks whose schedule changed since they were last ranked.
     """
+    incremental = bool(_json_body(request).get("incremental"))
     log_info("Block Ranking Started", details="User triggered block ranking.")
 
     try:
@@ -435,7 +481,7 @@ def api_rank_blocks(request):
 
         with redirect_stdout(log_buffer):
             ranker = ScheduleRanker()
-            ranker.rank_all_blocks()
+            counts = ranker.rank_all_blocks(incremental=incremental)
             ranker.export_ranking_report()
 
         log_output = log_buffer.getvalue()
@@ -446,6 +492,8 @@ def api_rank_blocks(request):
             {
                 "success": True,
                 "log": log_output,
+                "ranked": counts["ranked"],
+                "skipped": counts["skipped"],
                 "message": "Ranking complete.",
             }
         )
@@ -462,6 +510,19 @@ def api_rank_blocks(request):
         )
 
 
+@require_GET
+def api_preflight(request):
+    """
+    Return the pre-flight feasibility report: seat demand vs capacity per
+    required course and term, plus courses that cannot be fully placed.
+    """
+    from .services.preflight import analyze_feasibility
+    from .services.schedule_builder import ScheduleBuilder
+
+    report = analyze_feasibility(ScheduleBuilder.BLOCK_SIZE)
+    return JsonResponse(report)
+
+
 @require_GET
 def api_program_data(request, program_id):
     """
@@ -552,12 +613,37 @@ def api_rankings_data(request):
                 "program_name": block.program.program_name,
                 "ranking": block.ranking,
                 "size": block.size,
+                "terms": _term_scores(block),
             }
         )
 
     return JsonResponse({"rankings": data})
 
 
+@require_GET
+def api_block_breakdown(request, block_id):
+    """
+    Return JSON with the per-term, per-rule scores and notes stored by the
+    last ranking of a block (no scoring happens here).
+    """
+    block = get_object_or_404(Block.objects.select_related("program"), pk=block_id)
+    breakdown = block.score_breakdown or {}
+
+    return JsonResponse(
+        {
+            "block": {
+                "id": block.id,
+                "name": block.block_name,
+                "program": block.program.program_name,
+                "ranking": block.ranking,
+                "size": block.size,
+            },
+            "ranked": bool(breakdown),
+            "terms": breakdown.get("terms", []),
+        }
+    )
+
+
 @require_GET
 def api_stats(request):
     """